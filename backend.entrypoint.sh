@@ -38,7 +38,7 @@ else:
     print(f"Superuser '{username}' already exists.")
 EOF
 
-python manage.py rqworker default &
+python manage.py rqworker_pool &
 
 exec gunicorn core.wsgi:application  --bind 0.0.0.0:8000
 
@@ -1,6 +1,41 @@
 # conftest.py
+import random
+
 import pytest
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework.test import APIClient
+
+
+class RecordingQueue:
+    """Stands in for an RQ queue and records what would have been enqueued."""
+
+    def __init__(self, name="default"):
+        self.name = name
+        self.jobs = []
+        self.delayed = []
+
+    def enqueue(self, func, *args, **kwargs):
+        self.jobs.append((func, args, kwargs))
+
+    def enqueue_in(self, delta, func, *args, **kwargs):
+        self.delayed.append((delta, func, args, kwargs))
+
+    def fetch_job(self, job_id):
+        return None  # recorded jobs never run; callers treat them as gone
+
+
+@pytest.fixture(autouse=True)
+def queues(monkeypatch):
+    """Recording queues by name; saving a movie with a source enqueues its processing."""
+    created = {}
+    monkeypatch.setattr("django_rq.get_queue", lambda name="default", **kw: created.setdefault(name, RecordingQueue(name)))
+    return created
+
+
+@pytest.fixture
+def queue(queues):
+    return queues.setdefault("default", RecordingQueue("default"))
 
 
 @pytest.fixture
@@ -30,3 +65,106 @@ def create_user():
 @pytest.fixture
 def user(create_user):
     return create_user()
+
+
+@pytest.fixture
+def api_client(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Catalog payloads, fragments, locks and counters live in the cache; start every test empty."""
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def make_movie(db):
+    """Factory for a movie with a source file, moved to `status` without signals (the default is ready)."""
+    from movies.catalog import bump_catalog_version
+    from movies.models import Movie
+
+    def _make(title, status="ready", **fields):
+        fields.setdefault("description", "d")
+        fields.setdefault("video_file", f"uploads/{title}.mp4")
+        movie = Movie.objects.create(title=title, **fields)
+        Movie.objects.filter(pk=movie.pk).update(processing_status=status)
+        bump_catalog_version()  # a raw update() sends no signal
+        movie.refresh_from_db()
+        return movie
+
+    return _make
+
+
+class FakeRedis:
+    """The set, hash and sorted-set commands the hero pool and the suggest index use."""
+
+    def __init__(self):
+        self.sets, self.strings, self.hashes, self.zsets = {}, {}, {}, {}
+        self.srandmember_calls = 0
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def execute(self):
+        return []
+
+    def set(self, key, value):
+        self.strings[key] = value
+
+    def exists(self, key):
+        return int(key in self.strings or bool(self.sets.get(key)))
+
+    def delete(self, key):
+        self.strings.pop(key, None)
+        self.sets.pop(key, None)
+
+    def sadd(self, key, *members):
+        self.sets.setdefault(key, set()).update(str(m).encode() for m in members)
+
+    def srem(self, key, *members):
+        self.sets.get(key, set()).difference_update(str(m).encode() for m in members)
+
+    def srandmember(self, key, count):
+        self.srandmember_calls += 1
+        members = list(self.sets.get(key, set()))
+        return random.sample(members, min(count, len(members)))
+
+    def hget(self, key, field):
+        return self.hashes.get(key, {}).get(str(field).encode())
+
+    def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[str(field).encode()] = value.encode()
+
+    def hdel(self, key, field):
+        self.hashes.get(key, {}).pop(str(field).encode(), None)
+
+    def hkeys(self, key):
+        return list(self.hashes.get(key, {}))
+
+    def hmget(self, key, fields):
+        return [self.hashes.get(key, {}).get(f) for f in fields]
+
+    def zadd(self, key, mapping):
+        for member, score in mapping.items():
+            self.zsets.setdefault(key, {})[str(member).encode()] = score
+
+    def zrem(self, key, member):
+        self.zsets.get(key, {}).pop(str(member).encode(), None)
+
+    def zrevrange(self, key, start, end):
+        members = sorted(self.zsets.get(key, {}).items(), key=lambda kv: -kv[1])
+        return [m for m, _ in members][start:end + 1]
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    """An in-memory Redis behind the hero pool and the suggest index."""
+    fake = FakeRedis()
+    monkeypatch.setattr("movies.heroes.get_redis", lambda: fake)
+    monkeypatch.setattr("movies.suggest.get_redis", lambda: fake)
+    return fake
@@ -21,6 +21,9 @@ SECURE_PROXY_SSL_HEADER = ("HTTP_X_FORWARDED_PROTO", "https")
 CORS_ALLOWED_ORIGINS = ["https://streamflex.tobias-ruhmanseder.de",
                         "https://api.streamflex.tobias-ruhmanseder.de", "http://localhost:8000", "http://localhost:4200",]
 CORS_ALLOW_CREDENTIALS = True
+# resumable uploads (movies.uploads) negotiate offsets via headers
+CORS_ALLOW_HEADERS = (*default_headers, "upload-offset", "upload-length")
+CORS_EXPOSE_HEADERS = ["Upload-Offset", "Upload-Length", "Location", "Link", "X-Next-Cursor"]
 
 
 # CSRF_COOKIE_DOMAIN = ".tobias-domain.de".  //prod Mode !!!! ≈8h to resolve the CSRF problem in prod mode!!! Don't forget this!!!!
@@ -83,9 +86,37 @@ REST_FRAMEWORK = {
     "DEFAULT_THROTTLE_RATES": {
         "anon": "30/minute",
         "user": "150/minute",
+        # typeahead fires on every keystroke (movies.views.SuggestView)
+        "suggest": "600/minute",
     },
 }
 
+# Movie search (movies.search, PostgreSQL): text search configuration and title typo tolerance
+SEARCH_CONFIG = os.environ.get("SEARCH_CONFIG", "simple")
+SEARCH_TRIGRAM_THRESHOLD = float(os.environ.get("SEARCH_TRIGRAM_THRESHOLD", 0.3))
+
+# Redis typeahead index (movies.suggest); raw redis keys, so prefixed like the cache
+SUGGEST_KEY_PREFIX = "videoflix:movies:suggest"
+# Redis set of ready hero ids (movies.heroes), for random hero picks
+HERO_POOL_KEY = "videoflix:movies:heroes"
+
+# Shared catalog payload cache (movies.catalog); also dropped on every movie/genre change
+CATALOG_CACHE_TIMEOUT = int(os.environ.get("CATALOG_CACHE_TIMEOUT", 600))
+
+# Catalog/home bodies are cached pre-compressed (movies.precompressed: br / zstd if installed, gzip)
+PRECOMPRESS_MIN_SIZE = int(os.environ.get("PRECOMPRESS_MIN_SIZE", 512))
+
+# Per-movie serialized fragments (movies.fragments), keyed by id + updated_at
+MOVIE_FRAGMENT_TIMEOUT = int(os.environ.get("MOVIE_FRAGMENT_TIMEOUT", 3600))
+
+# Home screen aggregate (movies.views.HomeView): movies per genre row, favorites row length
+HOME_ROW_SIZE = int(os.environ.get("HOME_ROW_SIZE", 12))
+HOME_FAVORITES = int(os.environ.get("HOME_FAVORITES", 20))
+
+# Keyset pagination of the movie lists (movies.pagination): ?page_size, next page via Link header
+MOVIE_PAGE_SIZE = int(os.environ.get("MOVIE_PAGE_SIZE", 50))
+MOVIE_MAX_PAGE_SIZE = int(os.environ.get("MOVIE_MAX_PAGE_SIZE", 100))
+
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
@@ -128,6 +159,9 @@ DATABASES = {
         "PASSWORD": os.environ.get("DB_PASSWORD", default="supersecretpassword"),
         "HOST": os.environ.get("DB_HOST", default="db"),
         "PORT": os.environ.get("DB_PORT", default=5432),
+        # keep connections open across requests / jobs of the prefork RQ pool
+        "CONN_MAX_AGE": int(os.environ.get("DB_CONN_MAX_AGE", 60)),
+        "CONN_HEALTH_CHECKS": True,
     }
 }
 
@@ -148,8 +182,57 @@ RQ_QUEUES = {
         "DEFAULT_TIMEOUT": 1800,
         "REDIS_CLIENT_KWARGS": {},
     },
+    # user-facing work (regenerating an evicted rendition someone is waiting for)
+    "high": {
+        "HOST": os.environ.get("REDIS_HOST", default="redis"),
+        "PORT": os.environ.get("REDIS_PORT", default=6379),
+        "DB": os.environ.get("REDIS_DB", default=0),
+        "DEFAULT_TIMEOUT": 1800,
+        "REDIS_CLIENT_KWARGS": {},
+    },
 }
 
+# Resource limits for ffmpeg & co. (web and rqworker share one container). 0 / "" = off.
+PIPELINE_NICE = int(os.environ.get("PIPELINE_NICE", 10))
+PIPELINE_IONICE_CLASS = int(os.environ.get("PIPELINE_IONICE_CLASS", 2))  # 2 = best-effort, 3 = idle
+PIPELINE_IONICE_LEVEL = int(os.environ.get("PIPELINE_IONICE_LEVEL", 7))
+PIPELINE_FFMPEG_THREADS = int(os.environ.get("PIPELINE_FFMPEG_THREADS", 0))
+PIPELINE_CGROUP = os.environ.get("PIPELINE_CGROUP", "")  # delegated cgroup v2 dir
+PIPELINE_CPU_WEIGHT = int(os.environ.get("PIPELINE_CPU_WEIGHT", 20))  # cgroup default is 100
+PIPELINE_IO_WEIGHT = int(os.environ.get("PIPELINE_IO_WEIGHT", 20))
+PIPELINE_MAX_LOAD = float(os.environ.get("PIPELINE_MAX_LOAD", 0))  # 1-min load per CPU
+PIPELINE_ADMISSION_MAX_WAIT = int(os.environ.get("PIPELINE_ADMISSION_MAX_WAIT", 300))
+PIPELINE_ADMISSION_POLL = int(os.environ.get("PIPELINE_ADMISSION_POLL", 5))
+
+# Watchdog for pipeline subprocesses: kill ffmpeg without progress for PIPELINE_STALL_TIMEOUT s;
+# hard step limit = BASE + FACTOR x media duration (capped at MAX).
+PIPELINE_STALL_TIMEOUT = int(os.environ.get("PIPELINE_STALL_TIMEOUT", 60))
+PIPELINE_STEP_TIMEOUT_BASE = int(os.environ.get("PIPELINE_STEP_TIMEOUT_BASE", 120))
+PIPELINE_STEP_TIMEOUT_FACTOR = float(os.environ.get("PIPELINE_STEP_TIMEOUT_FACTOR", 3.0))
+PIPELINE_STEP_TIMEOUT_MAX = int(os.environ.get("PIPELINE_STEP_TIMEOUT_MAX", 4 * 3600))
+
+# Per-movie processing lock (seconds). Extended while the run is alive (jobs get a job_timeout
+# derived from the step limits above), so this is how long a killed worker keeps the movie locked.
+MOVIE_PROCESSING_LOCK_TIMEOUT = int(os.environ.get("MOVIE_PROCESSING_LOCK_TIMEOUT", 1800))
+
+# LRU eviction of cold 1080p/720p renditions (manage.py evict_renditions). 0 = keep everything.
+RENDITION_STORAGE_BUDGET = int(os.environ.get("RENDITION_STORAGE_BUDGET", 0))  # bytes
+RENDITION_MIN_IDLE_DAYS = int(os.environ.get("RENDITION_MIN_IDLE_DAYS", 7))
+RENDITION_TOUCH_INTERVAL = int(os.environ.get("RENDITION_TOUCH_INTERVAL", 300))  # s between access writes
+
+# Prefork RQ worker pool (manage.py rqworker_pool): queue(s) -> number of worker processes.
+# A key may list several queues in priority order, e.g. "high,default".
+RQ_WORKER_POOLS = {
+    "high": int(os.environ.get("RQ_WORKERS_HIGH", 1)),
+    "default": int(os.environ.get("RQ_WORKERS_DEFAULT", 1)),
+}
+RQ_WORKER_MAX_JOBS = int(os.environ.get("RQ_WORKER_MAX_JOBS", 500))  # recycle a worker after N jobs, 0 = never
+
+# Retries of failed pipeline runs (movies.failures): transient failures only, exponential backoff + jitter
+PIPELINE_RETRY_MAX = int(os.environ.get("PIPELINE_RETRY_MAX", 3))
+PIPELINE_RETRY_BASE_DELAY = int(os.environ.get("PIPELINE_RETRY_BASE_DELAY", 30))  # s, doubles per attempt
+PIPELINE_RETRY_MAX_DELAY = int(os.environ.get("PIPELINE_RETRY_MAX_DELAY", 1800))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -198,6 +281,11 @@ STATIC_URL = "/static/"
 STATIC_ROOT = BASE_DIR / "static"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
+# Scratch space for transcode outputs (empty = MEDIA_ROOT/tmp). Same filesystem as
+# MEDIA_ROOT lets finished renditions be renamed into place instead of copied.
+TRANSCODE_SCRATCH_DIR = os.environ.get("TRANSCODE_SCRATCH_DIR") or None
+# "copy": cut teasers from the 720p rendition by keyframe-snapped stream copy; "encode": always re-encode
+TEASER_MODE = os.environ.get("TEASER_MODE", default="copy")
 STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
 # Default primary key field type
@@ -208,3 +296,8 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 FILE_UPLOAD_HANDLERS = [
     "django.core.files.uploadhandler.TemporaryFileUploadHandler",
 ]
+
+# Resumable chunked uploads of source videos (api/movies/uploads/)
+UPLOAD_STAGING_DIR = os.environ.get("UPLOAD_STAGING_DIR") or None  # default MEDIA_ROOT/uploads
+UPLOAD_MAX_SIZE = int(os.environ.get("UPLOAD_MAX_SIZE", 50 * 1024 ** 3))
+UPLOAD_MAX_CHUNK_SIZE = int(os.environ.get("UPLOAD_MAX_CHUNK_SIZE", 64 * 1024 ** 2))
@@ -1,17 +1,79 @@
-from django.contrib import admin
+from pathlib import Path
+from django import forms
+from django.contrib import admin, messages
 from django.db.models import Count
-from .models import Favorite, Genre, Movie
+from django.utils import timezone
+from .mediainfo import UnplayableSource, check_source, store
+from .models import DeadLetter, Favorite, Genre, MediaInfo, Movie, ProcessingRun, ProcessingStep, UploadSession
+from .processing import enqueue_processing
 
 READONLY_ASSETS = ("teaser_video", "thumbnail_image",
                    "video_1080", "video_720", "video_480")
 
+RUN_FIELDS = ("started_at", "finished_at", "status", "wall_seconds", "cpu_seconds", "worker_host")
+STEP_FIELDS = ("name", "wall_seconds", "cpu_seconds", "peak_rss_kb", "output_bytes",
+               "exit_code", "encoder_settings", "error")
+
+
+class ProcessingRunInline(admin.TabularInline):
+    model = ProcessingRun
+    fields = RUN_FIELDS
+    readonly_fields = RUN_FIELDS
+    extra = 0
+    max_num = 0
+    show_change_link = True
+    can_delete = False
+
+
+class ProcessingStepInline(admin.TabularInline):
+    model = ProcessingStep
+    fields = STEP_FIELDS
+    readonly_fields = STEP_FIELDS
+    extra = 0
+    max_num = 0
+    can_delete = False
+
+MEDIA_INFO_FIELDS = ("kind", "width", "height", "fps", "video_codec", "audio_codec",
+                     "bitrate", "keyframe_interval", "duration", "size_bytes")
+
+
+class MediaInfoInline(admin.TabularInline):
+    model = MediaInfo
+    fields = MEDIA_INFO_FIELDS
+    readonly_fields = MEDIA_INFO_FIELDS
+    extra = 0
+    max_num = 0
+    can_delete = False
+
+
+class MovieAdminForm(forms.ModelForm):
+    """Probes an uploaded source and rejects files the pipeline could not play."""
+
+    class Meta:
+        model = Movie
+        fields = "__all__"
+
+    def clean_video_file(self):
+        upload = self.cleaned_data.get("video_file")
+        self.source_media_info = None
+        # TemporaryFileUploadHandler (settings.FILE_UPLOAD_HANDLERS): the upload is already on disk
+        if upload and "video_file" in self.changed_data and hasattr(upload, "temporary_file_path"):
+            try:
+                self.source_media_info = check_source(Path(upload.temporary_file_path()))
+            except UnplayableSource as e:
+                raise forms.ValidationError(f"Unplayable video: {e.reason}")
+        return upload
+
 
 @admin.register(Movie)
 class MovieAdmin(admin.ModelAdmin):
-    list_display = ("id", "title", "genre_display", "is_hero", "created_at")
-    list_filter = ("is_hero", "created_at")
+    form = MovieAdminForm
+    list_display = ("id", "title", "genre_display", "is_hero", "processing_status", "created_at")
+    list_filter = ("is_hero", "processing_status", "created_at")
     search_fields = ("title", "description")
     readonly_fields = READONLY_ASSETS
+    actions = ("reprocess_movies",)
+    inlines = (MediaInfoInline, ProcessingRunInline)
 
     fieldsets = (
         (None, {
@@ -28,10 +90,21 @@ class MovieAdmin(admin.ModelAdmin):
         qs = super().get_queryset(request)
         return qs.select_related("genre")
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        info = getattr(form, "source_media_info", None)
+        if info is not None:
+            store(obj, "source", obj.video_file.name, info)
+
     @admin.display(description="Genre")
     def genre_display(self, obj):
         return obj.genre.name if obj.genre_id else "—"
 
+    @admin.action(description="Reprocess selected movies")
+    def reprocess_movies(self, request, queryset):
+        queued = sum(1 for movie in queryset if enqueue_processing(movie, force=True))
+        self.message_user(request, f"{queued} movie(s) queued for processing.")
+
 
 @admin.register(Genre)
 class GenreAdmin(admin.ModelAdmin):
@@ -51,4 +124,45 @@ class GenreAdmin(admin.ModelAdmin):
 class FavoriteAdmin(admin.ModelAdmin):
     list_display = ('user', 'movie', 'created_at')
     list_filter = ('created_at',)
-    search_fields = ('user__email', 'movie__title')
\ No newline at end of file
+    search_fields = ('user__email', 'movie__title')
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    list_display = ("id", "movie", "filename", "offset", "length", "completed_at", "created_at")
+    list_filter = ("completed_at", "created_at")
+    search_fields = ("movie__title", "filename", "sha256")
+    readonly_fields = ("offset", "sha256", "completed_at", "error")
+
+
+@admin.register(ProcessingRun)
+class ProcessingRunAdmin(admin.ModelAdmin):
+    list_display = ("id", "movie", "status", "started_at", "wall_seconds", "cpu_seconds", "worker_host")
+    list_filter = ("status", "worker_host", "started_at")
+    search_fields = ("movie__title", "source_name")
+    readonly_fields = ("movie", "source_name", "error") + RUN_FIELDS
+    inlines = (ProcessingStepInline,)
+
+
+@admin.register(DeadLetter)
+class DeadLetterAdmin(admin.ModelAdmin):
+    list_display = ("id", "movie", "failure_class", "reason", "attempts", "created_at", "resolved_at")
+    list_filter = ("failure_class", "resolved_at", "created_at")
+    search_fields = ("movie__title", "reason")
+    readonly_fields = ("movie", "failure_class", "reason", "attempts", "diagnostics", "created_at")
+    actions = ("retry_dead_letters",)
+
+    @admin.action(description="Retry processing (resolves the entry)")
+    def retry_dead_letters(self, request, queryset):
+        queued, refused = 0, []
+        for letter in queryset.filter(resolved_at__isnull=True).select_related("movie"):
+            # refused (no source, or a worker holds the movie): the entry stays unresolved
+            if not enqueue_processing(letter.movie, force=True):
+                refused.append(str(letter.movie))
+                continue
+            queued += 1
+            letter.resolved_at = timezone.now()
+            letter.save(update_fields=["resolved_at"])
+        self.message_user(request, f"{queued} movie(s) queued for processing.")
+        if refused:
+            self.message_user(request, f"Not queued (no source or being processed): {', '.join(refused)}.",
+                              level=messages.WARNING)
@@ -5,4 +5,10 @@ class MoviesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "movies"
     def ready(self):
+        from django.db.models.signals import post_migrate, pre_migrate
+
         from . import signals
+        from .search import create_extensions, install_search
+
+        pre_migrate.connect(create_extensions, sender=self)
+        post_migrate.connect(install_search, sender=self)
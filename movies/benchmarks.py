@@ -0,0 +1,193 @@
+# movies/benchmarks.py
+from __future__ import annotations
+
+import os
+import platform
+import resource
+import socket
+import subprocess
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Optional
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+from . import tasks, watchdog
+from .models import Movie
+
+# Synthetic sources: resolution (w, h) x duration (s). Deterministic lavfi input,
+# so sizes and timings are comparable between runs on the same machine.
+DEFAULT_RESOLUTIONS = [(640, 360), (1280, 720), (1920, 1080)]
+DEFAULT_DURATIONS = [10, 30]
+HELPER_STEPS = ("transcode_480", "transcode_720", "transcode_1080", "frame_to_image", "cut_teaser")
+ALL_STEPS = HELPER_STEPS + ("process_movie",)
+
+
+def make_synthetic_source(out: Path, width: int, height: int, seconds: int, fps: int = 25) -> Path:
+    """
+    Render a deterministic H.264/AAC test clip (ffmpeg `testsrc2` + `sine`) to `out`.
+    """
+    out.parent.mkdir(parents=True, exist_ok=True)
+    cmd = [
+        tasks.FFMPEG, "-y", "-hide_banner", "-loglevel", "error",
+        "-f", "lavfi", "-i", f"testsrc2=size={width}x{height}:rate={fps}:duration={seconds}",
+        "-f", "lavfi", "-i", f"sine=frequency=440:sample_rate=48000:duration={seconds}",
+        "-c:v", "libx264", "-preset", "veryfast", "-pix_fmt", "yuv420p", "-g", str(fps * 2),
+        "-c:a", "aac", "-b:a", "128k",
+        "-fflags", "+bitexact", "-flags:v", "+bitexact", "-flags:a", "+bitexact", "-map_metadata", "-1",
+        str(out),
+    ]
+    subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    return out
+
+
+def ffmpeg_version() -> Optional[str]:
+    """First line of `ffmpeg -version`, or None if ffmpeg is missing."""
+    try:
+        proc = subprocess.run([tasks.FFMPEG, "-version"], check=True, stdout=subprocess.PIPE, text=True)
+        return proc.stdout.splitlines()[0] if proc.stdout else None
+    except Exception:
+        return None
+
+
+@contextmanager
+def child_peak_rss() -> Iterator[List[int]]:
+    """
+    Collect the peak RSS (KiB) of every pipeline subprocess started while active, as reported by
+    the watchdog's wait4. getrusage(RUSAGE_CHILDREN) only keeps a process-lifetime maximum.
+    """
+    peaks: List[int] = []
+    original = watchdog.run_supervised
+
+    def run(*args, **kwargs):
+        result = original(*args, **kwargs)
+        if result.rusage is not None:
+            peaks.append(result.rusage.ru_maxrss)
+        return result
+
+    watchdog.run_supervised = run
+    try:
+        yield peaks
+    finally:
+        watchdog.run_supervised = original
+
+
+def _cpu_seconds() -> float:
+    total = 0.0
+    for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN):
+        usage = resource.getrusage(who)
+        total += usage.ru_utime + usage.ru_stime
+    return total
+
+
+def measure(name: str, fn: Callable[[], None], outputs: Callable[[], Iterable[Path]] = lambda: ()) -> dict:
+    """
+    Run `fn` once and return wall time, CPU time (this process + children), peak child RSS
+    and the sizes of the files reported by `outputs` afterwards. Failures are recorded, not raised.
+    """
+    error = None
+    with child_peak_rss() as peaks:
+        cpu_started = _cpu_seconds()
+        started = time.perf_counter()
+        try:
+            fn()
+        except Exception as e:
+            error = repr(e)
+        wall = time.perf_counter() - started
+        cpu = _cpu_seconds() - cpu_started
+    sizes = {p.name: p.stat().st_size for p in outputs() if p and p.exists()}
+    return {
+        "step": name,
+        "wall_s": round(wall, 4),
+        "cpu_s": round(cpu, 4),
+        "peak_rss_kb": max(peaks) if peaks else None,
+        "output_bytes": sizes,
+        "error": error,
+    }
+
+
+def _helper_steps(src: Path, out_dir: Path, seconds: int) -> dict:
+    """The individual pipeline helpers as name -> (callable, produced files)."""
+    def out(name):
+        return out_dir / name
+
+    return {
+        "transcode_480": (lambda: tasks._transcode(src, out("480.mp4"), 480), [out("480.mp4")]),
+        "transcode_720": (lambda: tasks._transcode(src, out("720.mp4"), 720), [out("720.mp4")]),
+        "transcode_1080": (lambda: tasks._transcode(src, out("1080.mp4"), 1080), [out("1080.mp4")]),
+        "frame_to_image": (lambda: tasks._frame_to_image(src, out("hero.jpg"), 1280, 720, max(1, seconds // 3)),
+                           [out("hero.jpg")]),
+        "cut_teaser": (lambda: tasks._cut_teaser(src, out("teaser.mp4"), max(1, seconds // 5), min(8, seconds)),
+                       [out("teaser.mp4")]),
+    }
+
+
+def _bench_process_movie(src: Path, label: str) -> dict:
+    """
+    Run the full `process_movie` on a throwaway Movie whose source is `src` (copied into media storage).
+    The movie and its files are deleted afterwards.
+    """
+    rel = f"bench/{label}{src.suffix}"
+    if default_storage.exists(rel):
+        default_storage.delete(rel)
+    with open(src, "rb") as fh:
+        rel = default_storage.save(rel, fh)
+    movie = Movie.objects.create(title=f"bench-{label}-{int(time.time())}"[:64])
+    # set the source without post_save: the benchmark runs the pipeline itself, not via RQ
+    Movie.objects.filter(pk=movie.pk).update(video_file=rel)
+
+    def outputs():
+        movie.refresh_from_db()
+        fields = (movie.video_1080, movie.video_720, movie.video_480,
+                  movie.thumbnail_image, movie.hero_image, movie.teaser_video)
+        return [Path(f.path) for f in fields if f]
+
+    try:
+        result = measure("process_movie", lambda: tasks.process_movie(movie.pk), outputs)
+        movie.refresh_from_db()
+        result["processing_status"] = movie.processing_status
+        return result
+    finally:
+        movie.delete()
+
+
+def run_benchmarks(
+    work_dir: Path,
+    resolutions: Iterable[tuple] = DEFAULT_RESOLUTIONS,
+    durations: Iterable[int] = DEFAULT_DURATIONS,
+    steps: Iterable[str] = ALL_STEPS,
+) -> dict:
+    """
+    Generate synthetic sources and time the selected steps against each of them.
+    Returns a JSON-serializable report (meta + one entry per source).
+    """
+    steps = list(steps)
+    report = {
+        "meta": {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "host": socket.gethostname(),
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "ffmpeg": ffmpeg_version(),
+            "media_root": str(settings.MEDIA_ROOT),
+        },
+        "sources": [],
+    }
+    for width, height in resolutions:
+        for seconds in durations:
+            label = f"{width}x{height}_{seconds}s"
+            src = make_synthetic_source(work_dir / "sources" / f"{label}.mp4", width, height, seconds)
+            entry = {"source": label, "width": width, "height": height, "seconds": seconds,
+                     "source_bytes": src.stat().st_size, "results": []}
+            out_dir = work_dir / "out" / label
+            for name, (fn, files) in _helper_steps(src, out_dir, seconds).items():
+                if name in steps:
+                    entry["results"].append(measure(name, fn, lambda files=files: files))
+            if "process_movie" in steps:
+                entry["results"].append(_bench_process_movie(src, label))
+            report["sources"].append(entry)
+    return report
@@ -0,0 +1,86 @@
+# movies/catalog.py
+from __future__ import annotations
+
+import hashlib
+from typing import Callable, Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from .fragments import url_base
+from .models import Favorite, Movie
+from .serializers import project
+
+# Shared catalog cache: the movie lists are identical for every user except `is_favorite`.
+# The serialized, user-independent payload is cached under the current catalog version;
+# movies.signals bumps the version on every movie/genre change, which orphans all entries at
+# once (they expire after CATALOG_CACHE_TIMEOUT). Per request only the user's favorite ids are
+# read and merged in.
+
+VERSION_KEY = "movies:catalog-version"
+
+
+def catalog_version() -> int:
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, 1, None)
+        version = cache.get(VERSION_KEY, 1)
+    return version
+
+
+def bump_catalog_version() -> None:
+    """Invalidate every cached catalog payload."""
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:  # key missing (first bump / cache flushed)
+        cache.add(VERSION_KEY, 2, None)
+
+
+def cache_key(name: str, request, params: dict) -> str:
+    """
+    Key of a payload: catalog version + endpoint + URL base + the normalized params that
+    shape it. Other query params (tracking junk, cache busters) map to the same entry.
+    """
+    shape = repr(sorted(params.items()))
+    return f"movies:catalog:{catalog_version()}:{name}:{url_base(request)}:{hashlib.sha1(shape.encode()).hexdigest()}"
+
+
+def cached_payload(name: str, request, params: dict, build: Callable[[], dict]) -> dict:
+    """The cached payload for `params`, built (and stored) on a miss."""
+    key = cache_key(name, request, params)
+    payload = cache.get(key)
+    if payload is None:
+        payload = build()
+        cache.set(key, payload, int(getattr(settings, "CATALOG_CACHE_TIMEOUT", 600)))
+    return payload
+
+
+def favorite_ids_for(user) -> set:
+    return set(Favorite.objects.filter(user=user).values_list("movie_id", flat=True))
+
+
+def with_favorites(items: Iterable[dict], favorite_ids: set, fields: Optional[Iterable[str]] = None) -> List[dict]:
+    """Copies of the cached movie dicts with the user's `is_favorite` merged in (and cut to `fields`)."""
+    items = [{**item, "is_favorite": item["id"] in favorite_ids} for item in items]
+    return items if fields is None else project(items, fields)
+
+
+def top_per_genre(per_genre: int, fields: Iterable[str]) -> Dict[int, List[Movie]]:
+    """
+    Newest `per_genre` ready movies of every genre in one query:
+    ROW_NUMBER() OVER (PARTITION BY genre_id ORDER BY created_at DESC, id DESC) <= per_genre.
+    """
+    ranked = (
+        Movie.objects.filter(processing_status="ready", genre__isnull=False)
+        .annotate(row=Window(RowNumber(), partition_by=[F("genre_id")],
+                             order_by=[F("created_at").desc(), F("id").desc()]))
+        .filter(row__lte=per_genre)
+        .only(*fields, "genre_id")
+        .order_by("genre_id", "row")
+    )
+    rows: Dict[int, List[Movie]] = {}
+    for movie in ranked:
+        rows.setdefault(movie.genre_id, []).append(movie)
+    return rows
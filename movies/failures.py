@@ -0,0 +1,120 @@
+# movies/failures.py
+from __future__ import annotations
+
+import errno
+import random
+import re
+import socket
+import subprocess
+from typing import Tuple
+
+from django.conf import settings
+from django.db import InterfaceError, OperationalError
+
+from .models import DeadLetter, Movie, ProcessingRun
+from .processing import schedule_retry
+
+# Failed pipeline runs are either retried (transient: disk full, OOM-killed or stalled ffmpeg,
+# DB/Redis blip) with exponential backoff + jitter, or parked as a DeadLetter (permanent:
+# the input itself is broken, so another run would only burn CPU again). Anything not
+# recognised as transient is treated as permanent; the dead letter keeps the diagnostics.
+
+TRANSIENT = "transient"
+PERMANENT = "permanent"
+
+# matched against the lower-cased error text; transient wins over permanent
+TRANSIENT_PATTERNS = (
+    ("no space left on device", "disk full"),
+    ("cannot allocate memory", "out of memory"),
+    ("resource temporarily unavailable", "resource temporarily unavailable"),
+    ("too many open files", "too many open files"),
+    ("stalled: no progress", "ffmpeg stalled"),
+    ("timeout: step exceeded", "step timeout"),
+    ("connection refused", "connection refused"),
+    ("connection reset", "connection reset"),
+    ("input/output error", "I/O error"),
+)
+PERMANENT_PATTERNS = (
+    ("invalid data found when processing input", "corrupt or unsupported input"),
+    ("moov atom not found", "truncated MP4 (moov atom missing)"),
+    ("could not find codec parameters", "unreadable stream parameters"),
+    ("does not contain any stream", "no usable streams"),
+    ("matches no streams", "no video stream"),
+    ("decoder not found", "unsupported codec"),
+    ("unknown encoder", "encoder missing in ffmpeg build"),
+    ("no such file or directory", "source file missing"),
+)
+KILLED_RETURNCODES = {-9, 137}  # SIGKILL: OOM killer or our watchdog
+NOT_FOUND_RETURNCODE = 127  # binary missing: a broken deployment, retrying won't help
+
+
+def classify_text(text: str) -> Tuple[str, str]:
+    """(failure class, short reason) for an error summary like Movie.processing_error."""
+    low = (text or "").lower()
+    for pattern, reason in TRANSIENT_PATTERNS:
+        if pattern in low:
+            return TRANSIENT, reason
+    codes = {int(c) for c in re.findall(r"rc=(-?\d+)", text or "")}
+    if codes & KILLED_RETURNCODES:
+        return TRANSIENT, "killed (out of memory?)"
+    for pattern, reason in PERMANENT_PATTERNS:
+        if pattern in low:
+            return PERMANENT, reason
+    if NOT_FOUND_RETURNCODE in codes:
+        return PERMANENT, "command not found"
+    return PERMANENT, "unclassified"
+
+
+def classify_exception(exc: BaseException) -> Tuple[str, str]:
+    """(failure class, short reason) for an exception that escaped the pipeline."""
+    if isinstance(exc, subprocess.CalledProcessError):
+        return classify_text(f"rc={exc.returncode} {exc.stderr or ''}")
+    if isinstance(exc, (OperationalError, InterfaceError)):
+        return TRANSIENT, "database unavailable"
+    if isinstance(exc, FileNotFoundError):
+        return PERMANENT, "source file missing"
+    if isinstance(exc, OSError) and exc.errno in (errno.ENOSPC, errno.ENOMEM, errno.EIO, errno.EAGAIN, errno.EMFILE):
+        return TRANSIENT, exc.strerror or "OS error"
+    return classify_text(repr(exc))
+
+
+def backoff_delay(attempt: int) -> float:
+    """
+    Seconds before retry number `attempt` (0-based): exponential with full jitter,
+    uniform(0, min(cap, base * 2^attempt)), so retries of many movies don't synchronize.
+    """
+    base = float(getattr(settings, "PIPELINE_RETRY_BASE_DELAY", 30))
+    cap = float(getattr(settings, "PIPELINE_RETRY_MAX_DELAY", 1800))
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def handle_failure(movie_id: int, attempt: int, failure_class: str, reason: str) -> str:
+    """
+    Decide what happens to a failed run: schedule a retry ("retry") or park it as a
+    DeadLetter ("dead"). Returns the decision.
+    """
+    max_retries = int(getattr(settings, "PIPELINE_RETRY_MAX", 3))
+    if failure_class == TRANSIENT and attempt < max_retries:
+        if schedule_retry(movie_id, attempt + 1, backoff_delay(attempt)):
+            return "retry"
+        return "skipped"  # no longer 'failed' (reprocessed meanwhile)
+    if failure_class == TRANSIENT:
+        reason = f"{reason} (gave up after {attempt + 1} attempts)"
+
+    movie = Movie.objects.filter(pk=movie_id).only("id", "video_file", "processing_error").first()
+    if movie is None:
+        return "skipped"
+    run = ProcessingRun.objects.filter(movie_id=movie_id).order_by("-started_at").first()
+    DeadLetter.objects.create(
+        movie=movie,
+        failure_class=failure_class,
+        reason=reason[:255],
+        attempts=attempt + 1,
+        diagnostics={
+            "error": movie.processing_error or "",
+            "source": movie.video_file.name if movie.video_file else "",
+            "run_id": run.pk if run else None,
+            "worker_host": socket.gethostname(),
+        },
+    )
+    return "dead"
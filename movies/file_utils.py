@@ -1,5 +1,12 @@
+import errno
+import os
+import shutil
+from pathlib import Path
 from typing import Iterable
 
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
 
 def delete_file_field(instance, field_name: str) -> None:
     """
@@ -34,3 +41,47 @@ def delete_many_file_fields(instance, fields: Iterable[str]) -> None:
     """
     for name in fields:
         delete_file_field(instance, name)
+
+
+def promote_file(tmp_path: Path, dest: Path) -> None:
+    """
+    Move `tmp_path` to `dest`: atomic rename when both are on one filesystem,
+    else copy next to the target and swap it in (e.g. scratch dir on tmpfs).
+    """
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.replace(tmp_path, dest)
+        return
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+    partial = dest.with_name(dest.name + ".partial")
+    shutil.copyfile(tmp_path, partial)
+    os.replace(partial, dest)
+    tmp_path.unlink(missing_ok=True)
+
+
+def save_tmp_to_field(field, tmp_path: Path, final_rel_name: str, replace: bool = True) -> None:
+    """
+    Store a temp file into the FileField's storage under `final_rel_name`, then remove the temp file.
+    Ensures no duplicate/suffixed filenames by replacing any pre-existing final file
+    (with `replace=False` a free name is picked instead, e.g. for uploaded sources).
+    Filesystem storage gets the file moved into place (no second write of multi-GB renditions);
+    the streaming copy is only used for other (remote) storage backends.
+    """
+    storage = field.storage
+    name = field.field.generate_filename(field.instance, final_rel_name)
+    if not replace:
+        name = storage.get_available_name(name)
+    if isinstance(storage, FileSystemStorage):
+        promote_file(tmp_path, Path(storage.path(name)))
+        field.name = name
+        return
+    if storage.exists(name):
+        storage.delete(name)
+    with open(tmp_path, "rb") as fh:
+        field.name = storage.save(name, File(fh))
+    try:
+        tmp_path.unlink()
+    except Exception:
+        pass
@@ -0,0 +1,63 @@
+# movies/fragments.py
+from __future__ import annotations
+
+import hashlib
+from typing import Iterable, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Movie
+from .serializers import MOVIE_FIELDS, MOVIE_LIST_FIELDS, MovieValuesSerializer
+
+# Per-movie fragment cache: MovieSerializer output (absolute URLs included) cached under
+# movie id + updated_at, so any save produces a new key and the old fragment just expires.
+# Writes that bypass save() (queryset UPDATEs in processing/tasks/renditions) set updated_at
+# themselves. Lists load only (id, created_at, updated_at), fetch all fragments with one
+# get_many (a single MGET on Redis) and serialize the misses from one values() query.
+
+FRAGMENT_FIELDS = ("id", "created_at", "updated_at")
+
+
+def url_base(request) -> str:
+    """Fragments embed absolute URLs (endpoints on SITE_BASE_URL, files on the request host)."""
+    base = f'{getattr(settings, "SITE_BASE_URL", None) or ""}|{request.build_absolute_uri("/") if request else ""}'
+    return hashlib.sha1(base.encode()).hexdigest()[:12]
+
+
+def fragment_key(pk: int, updated_at, base: str) -> str:
+    return f"movies:fragment:{base}:{pk}:{updated_at.timestamp() if updated_at else 0}"
+
+
+def shape_for(fields: Optional[Iterable[str]]) -> tuple:
+    """The cached shape that covers `fields`: the slim list shape if it can, else all fields."""
+    return MOVIE_LIST_FIELDS if fields is not None and set(fields) <= set(MOVIE_LIST_FIELDS) else MOVIE_FIELDS
+
+
+def movie_dicts(movies: Iterable[Movie], request, fields: Optional[Iterable[str]] = None) -> List[dict]:
+    """
+    Serialized movies in the given order (is_favorite left False for the caller to overlay),
+    in the smallest cached shape that has all of `fields` (callers project afterwards).
+    Only pk and updated_at of `movies` are read; misses are loaded with one values() query
+    of just the shape's columns and serialized by MovieValuesSerializer.
+    """
+    movies = list(movies)
+    shape = shape_for(fields)
+    base = url_base(request) + (":list" if shape is MOVIE_LIST_FIELDS else "")
+    keys = {movie.pk: fragment_key(movie.pk, movie.updated_at, base) for movie in movies}
+    found = cache.get_many(list(keys.values()))
+
+    missing = [movie.pk for movie in movies if keys[movie.pk] not in found]
+    if missing:
+        serializer = MovieValuesSerializer(request, favorite_ids=set(), fields=shape)
+        rows = Movie.objects.filter(pk__in=missing).values(*serializer.columns, "updated_at")
+        fresh = {}
+        for row in rows:
+            # the row may be newer than the listed instance; serve what was serialized
+            keys[row["id"]] = fragment_key(row["id"], row["updated_at"], base)
+            fresh[keys[row["id"]]] = serializer.to_representation(row)
+        cache.set_many(fresh, int(getattr(settings, "MOVIE_FRAGMENT_TIMEOUT", 3600)))
+        found.update(fresh)
+
+    # a movie deleted since it was listed has no row and is skipped
+    return [found[keys[movie.pk]] for movie in movies if keys[movie.pk] in found]
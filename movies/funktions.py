@@ -2,13 +2,13 @@ from django.http import Http404
 import random  # needed for the tests
 
 
-def parse_limit(request, default=3, min_value=1, max_value=10):
+def parse_limit(request, default=3, min_value=1, max_value=10, name="limit"):
     """
-    Read ?limit from request.query_params and return a safe integer.
-    Clamps the value between min_value and max_value and falls back to
-    the provided default on missing/invalid input.
+    Read ?limit (or the query param `name`) from request.query_params and
+    return a safe integer. Clamps the value between min_value and max_value
+    and falls back to the provided default on missing/invalid input.
     """
-    raw = request.query_params.get("limit")
+    raw = request.query_params.get(name)
     try:
         value = int(raw) if raw is not None else default
     except Exception:
@@ -47,16 +47,25 @@ def pick_random(qs, limit):
     else:
         # Use the module-level `random` so tests can patch
         selected_ids = random.sample(ids, k=limit)
-    objs = list(qs.model.objects.filter(id__in=selected_ids))
+    objs = list(qs.filter(id__in=selected_ids))
     # Preserve the selected order
-    objs.sort(key=selected_ids.index)
+    position = {pk: i for i, pk in enumerate(selected_ids)}
+    objs.sort(key=lambda obj: position[obj.pk])
     return objs
 
 
-def choose_quality(has_1080, has_720, has_480, screen_h=None, downlink_mbps=None):
+# a rendition fits the connection if downlink >= its bitrate x headroom (bursts, other traffic)
+BITRATE_HEADROOM = 1.5
+# downlink (Mbit/s) a rendition needs when its bitrate is unknown (the fixed speed-aware rule)
+SPEED_THRESHOLDS_MBPS = {"1080": 7, "720": 3, "480": 0}
+
+
+def choose_quality(has_1080, has_720, has_480, screen_h=None, downlink_mbps=None, bitrates=None):
     """
     Decide the streaming quality ("1080"/"720"/"480") based on available files,
     optional screen height, and optional network speed (downlink_mbps).
+    With `bitrates` ({"720": bit/s, ...} from MediaInfo) the speed check uses the real
+    bitrate of each rendition instead of the fixed 7/3 Mbit/s thresholds.
     Returns a tuple (quality_str, i18n_key). Always emits key `player.quality.{q}`.
     """
     # Determine the maximum sensible level based on screen height
@@ -83,6 +92,20 @@ def choose_quality(has_1080, has_720, has_480, screen_h=None, downlink_mbps=None
     else:
         candidates = ["480"]
 
+    if downlink_mbps is not None and bitrates:
+        # highest rendition (within the screen bucket) that fits the downlink: by its measured
+        # bitrate, or by the fixed thresholds if it was never probed
+        budget = downlink_mbps * 1_000_000 / BITRATE_HEADROOM
+        for opt in candidates:
+            if not available.get(opt):
+                continue
+            if bitrates.get(opt):
+                fits = bitrates[opt] <= budget
+            else:
+                fits = downlink_mbps >= SPEED_THRESHOLDS_MBPS[opt]
+            if fits:
+                return opt, f"player.quality.{opt}"
+
     # Pick a quality (q) using the exact same selection logic as before,
     # but always return a unified i18n key: player.quality.{q}
     q = None
@@ -134,17 +157,20 @@ def choose_quality(has_1080, has_720, has_480, screen_h=None, downlink_mbps=None
 def getSource(movie, q):
     """
     Pick the Movie FileField for the requested quality string.
-    If `q` is empty/unknown, fall back to 720→480→1080.
+    Renditions are added one after another while a movie is already playable, so a
+    missing quality falls back to the next lower one, then higher (720→480→1080 if `q`
+    is empty/unknown).
     """
-    if q == "1080":
-        src = movie.video_1080
-    elif q == "720":
-        src = movie.video_720
-    elif q == "480":
-        src = movie.video_480
-    else:
-        src = movie.video_720 or movie.video_480 or movie.video_1080
-    return src
+    fields = {"1080": movie.video_1080, "720": movie.video_720, "480": movie.video_480}
+    order = {
+        "1080": ["1080", "720", "480"],
+        "720": ["720", "480", "1080"],
+        "480": ["480", "720", "1080"],
+    }.get(q, ["720", "480", "1080"])
+    for opt in order:
+        if fields[opt]:
+            return fields[opt]
+    return fields[order[0]]
 
 
 def check_or_404(file_field):
@@ -0,0 +1,102 @@
+# movies/governance.py
+from __future__ import annotations
+
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from django.conf import settings
+
+# Resource limits for pipeline subprocesses (ffmpeg), so transcodes running next to
+# gunicorn in the same container don't starve the web workers. All knobs are settings
+# (PIPELINE_*), 0 / empty disables the respective limit.
+
+
+def _setting(name: str, default):
+    return getattr(settings, name, default)
+
+
+def governed_command(cmd: List[str]) -> List[str]:
+    """
+    Wrap `cmd` with `nice`/`ionice` and cap ffmpeg's encoder threads.
+    Binaries that are not installed are skipped (the command still runs, just unthrottled).
+    """
+    cmd = list(cmd)
+    threads = int(_setting("PIPELINE_FFMPEG_THREADS", 0))
+    if threads > 0 and cmd and Path(cmd[0]).name == "ffmpeg":
+        # output option right before the output path: limits the encoder (libx264) threads
+        cmd[-1:-1] = ["-threads", str(threads)]
+        cmd[1:1] = ["-filter_threads", str(threads)]
+
+    prefix: List[str] = []
+    nice = int(_setting("PIPELINE_NICE", 0))
+    if nice and shutil.which("nice"):
+        prefix += ["nice", "-n", str(nice)]
+    io_class = int(_setting("PIPELINE_IONICE_CLASS", 0))
+    if io_class and shutil.which("ionice"):
+        prefix += ["ionice", "-c", str(io_class)]
+        if io_class == 2:
+            prefix += ["-n", str(int(_setting("PIPELINE_IONICE_LEVEL", 7)))]
+    return prefix + cmd
+
+
+def _cgroup_dir() -> Optional[Path]:
+    path = _setting("PIPELINE_CGROUP", "")
+    return Path(path) if path else None
+
+
+def ensure_cgroup() -> Optional[Path]:
+    """
+    Create the configured cgroup v2 directory and apply cpu.weight / io.weight (best effort).
+    Needs a delegated, writable cgroup (e.g. a subtree of the container's own cgroup).
+    """
+    cgroup = _cgroup_dir()
+    if cgroup is None:
+        return None
+    try:
+        cgroup.mkdir(parents=True, exist_ok=True)
+        for name, key in (("cpu.weight", "PIPELINE_CPU_WEIGHT"), ("io.weight", "PIPELINE_IO_WEIGHT")):
+            weight = int(_setting(key, 0))
+            control = cgroup / name
+            if weight and control.exists():
+                control.write_text(f"{'default ' if name == 'io.weight' else ''}{weight}\n")
+        return cgroup
+    except OSError:
+        return None
+
+
+def attach_to_cgroup(pid: int) -> bool:
+    """Move a started subprocess into the pipeline cgroup. Returns False if not configured/possible."""
+    cgroup = ensure_cgroup()
+    if cgroup is None:
+        return False
+    try:
+        (cgroup / "cgroup.procs").write_text(f"{pid}\n")
+        return True
+    except OSError:
+        return False
+
+
+def host_load() -> float:
+    """1-minute load average per CPU."""
+    return os.getloadavg()[0] / (os.cpu_count() or 1)
+
+
+def wait_for_capacity() -> float:
+    """
+    Admission check before a pipeline step: while the per-CPU load is above PIPELINE_MAX_LOAD,
+    wait (polling every PIPELINE_ADMISSION_POLL s), but at most PIPELINE_ADMISSION_MAX_WAIT s
+    so jobs can't starve. Returns the seconds waited.
+    """
+    max_load = float(_setting("PIPELINE_MAX_LOAD", 0))
+    if max_load <= 0:
+        return 0.0
+    max_wait = float(_setting("PIPELINE_ADMISSION_MAX_WAIT", 300))
+    poll = float(_setting("PIPELINE_ADMISSION_POLL", 5))
+    waited = 0.0
+    while waited < max_wait and host_load() > max_load:
+        time.sleep(poll)
+        waited += poll
+    return waited
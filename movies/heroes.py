@@ -0,0 +1,81 @@
+# movies/heroes.py
+from __future__ import annotations
+
+from typing import Iterable, List, Optional
+
+from django.conf import settings
+from redis.exceptions import RedisError
+
+from .models import Movie
+from .redis_client import get_redis
+
+# Pool of ready hero ids in a Redis set, kept current by movies.signals. A random pick is
+# one SRANDMEMBER (constant cost however many movies are flagged is_hero) followed by a
+# lookup of just the chosen rows. The pool is rebuilt from the database when its marker key
+# is missing (first use, Redis flushed); without Redis, callers fall back to the database.
+
+
+def _key(suffix: str = "") -> str:
+    return getattr(settings, "HERO_POOL_KEY", "videoflix:movies:heroes") + suffix
+
+
+def _eligible(movie_id: int) -> bool:
+    return Movie.objects.filter(pk=movie_id, is_hero=True, processing_status="ready").exists()
+
+
+def sync_movie(movie_id: int) -> None:
+    """Add or remove one movie according to its current is_hero / status."""
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        if _eligible(movie_id):
+            client.sadd(_key(), movie_id)
+        else:
+            client.srem(_key(), movie_id)
+    except RedisError:
+        pass  # picks are re-checked against the database; `rebuild` repairs missed adds
+
+
+def remove_movie(movie_id: int) -> None:
+    remove_movies([movie_id])
+
+
+def remove_movies(movie_ids: Iterable[int]) -> None:
+    """Drop ids from the pool (deleted movies, or stale ids a pick found no ready hero for)."""
+    movie_ids = list(movie_ids)
+    client = get_redis()
+    if client is None or not movie_ids:
+        return
+    try:
+        client.srem(_key(), *movie_ids)
+    except RedisError:
+        pass
+
+
+def rebuild() -> int:
+    """Replace the pool with the ready heroes from the database. Returns its size."""
+    client = get_redis()
+    if client is None:
+        return 0
+    ids = list(Movie.objects.filter(is_hero=True, processing_status="ready").values_list("id", flat=True))
+    pipe = client.pipeline()
+    pipe.delete(_key())
+    if ids:
+        pipe.sadd(_key(), *ids)
+    pipe.set(_key(":built"), 1)
+    pipe.execute()
+    return len(ids)
+
+
+def sample(limit: int) -> Optional[List[int]]:
+    """Up to `limit` distinct random hero ids, or None if there is no Redis pool to ask."""
+    client = get_redis()
+    if client is None:
+        return None
+    try:
+        if not client.exists(_key(":built")):
+            rebuild()
+        return [int(pk) for pk in client.srandmember(_key(), limit)]
+    except RedisError:
+        return None
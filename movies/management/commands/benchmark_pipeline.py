@@ -0,0 +1,62 @@
+from __future__ import annotations
+import json
+import shutil
+import tempfile
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from movies.benchmarks import ALL_STEPS, DEFAULT_DURATIONS, DEFAULT_RESOLUTIONS, ffmpeg_version, run_benchmarks
+
+# to measure the transcode pipeline against synthetic sources (results as JSON)
+#
+# docker compose exec web \
+#   python manage.py benchmark_pipeline \
+#   --resolutions 1280x720 1920x1080 --durations 30 \
+#   --out /app/media/bench/$(date +%F).json
+
+
+def parse_resolution(value: str) -> tuple:
+    """'1280x720' -> (1280, 720)."""
+    try:
+        w, h = value.lower().split("x")
+        return int(w), int(h)
+    except ValueError:
+        raise CommandError(f"Resolution must look like 1280x720, got '{value}'.")
+
+
+class Command(BaseCommand):
+    help = "Benchmark the transcode pipeline (process_movie and its ffmpeg helpers) on synthetic lavfi sources."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--resolutions",
+            nargs="+",
+            default=[f"{w}x{h}" for w, h in DEFAULT_RESOLUTIONS],
+            help="Source resolutions, e.g. 640x360 1920x1080.",
+        )
+        parser.add_argument(
+            "--durations", nargs="+", type=int, default=DEFAULT_DURATIONS, help="Source durations in seconds."
+        )
+        parser.add_argument("--steps", nargs="+", choices=ALL_STEPS, default=list(ALL_STEPS), help="Steps to run.")
+        parser.add_argument("--out", type=str, default=None, help="Write the JSON report here (default: stdout).")
+        parser.add_argument("--work-dir", type=str, default=None, help="Keep sources/outputs here (default: temp dir).")
+
+    def handle(self, *args, **opts):
+        if not ffmpeg_version():
+            raise CommandError("ffmpeg not found in PATH.")
+        resolutions = [parse_resolution(r) for r in opts["resolutions"]]
+
+        work_dir = Path(opts["work_dir"]) if opts.get("work_dir") else Path(tempfile.mkdtemp(prefix="bench-"))
+        try:
+            report = run_benchmarks(work_dir, resolutions, opts["durations"], opts["steps"])
+        finally:
+            if not opts.get("work_dir"):
+                shutil.rmtree(work_dir, ignore_errors=True)
+
+        payload = json.dumps(report, indent=2)
+        if opts.get("out"):
+            out = Path(opts["out"])
+            out.parent.mkdir(parents=True, exist_ok=True)
+            out.write_text(payload)
+            self.stdout.write(self.style.SUCCESS(f"Benchmark report written to {out}"))
+        else:
+            self.stdout.write(payload)
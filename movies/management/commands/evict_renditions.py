@@ -0,0 +1,42 @@
+from __future__ import annotations
+import re
+from django.core.management.base import BaseCommand, CommandError
+from movies.renditions import evict_cold, rendition_usage
+
+# to delete cold 1080p/720p renditions until the variants fit into a storage budget
+# (run periodically, e.g. from cron; evicted renditions are re-encoded on demand)
+#
+# docker compose exec web \
+#   python manage.py evict_renditions --budget 500G --dry-run
+
+UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+
+
+def parse_size(value: str) -> int:
+    """'500G' / '750M' / '1073741824' -> bytes."""
+    match = re.fullmatch(r"\s*(\d+)\s*([KMGT]?)B?\s*", value or "", re.IGNORECASE)
+    if not match:
+        raise CommandError(f"Size must look like 500G or a number of bytes, got '{value}'.")
+    return int(match.group(1)) * UNITS[match.group(2).upper()]
+
+
+class Command(BaseCommand):
+    help = "Evict least recently requested 1080p/720p renditions until the variants fit into the storage budget."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--budget", type=str, default=None,
+                            help="Storage budget for all renditions, e.g. 500G (default: RENDITION_STORAGE_BUDGET).")
+        parser.add_argument("--dry-run", action="store_true", help="Only list what would be evicted.")
+
+    def handle(self, *args, **opts):
+        budget = parse_size(opts["budget"]) if opts.get("budget") else None
+        total = sum(r["bytes"] for r in rendition_usage())
+        evicted = evict_cold(budget, dry_run=opts.get("dry_run", False))
+
+        for row in evicted:
+            self.stdout.write(f"movie {row['movie_id']} {row['quality']}p  {row['bytes']} B  "
+                              f"last requested {row['last_accessed_at']:%Y-%m-%d}")
+        freed = sum(r["bytes"] for r in evicted)
+        verb = "Would evict" if opts.get("dry_run") else "Evicted"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {len(evicted)} rendition(s), {freed} of {total} bytes."))
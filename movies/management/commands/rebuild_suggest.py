@@ -0,0 +1,20 @@
+from __future__ import annotations
+from django.core.management.base import BaseCommand, CommandError
+from movies.redis_client import get_redis
+from movies.suggest import rebuild
+
+# to (re)build the Redis typeahead index from the ready movies
+# (the signals keep it current afterwards; needed once, or after flushing Redis)
+#
+# docker compose exec web \
+#   python manage.py rebuild_suggest
+
+
+class Command(BaseCommand):
+    help = "Rebuild the Redis search-as-you-type index of ready movie titles."
+
+    def handle(self, *args, **opts):
+        if get_redis() is None:
+            raise CommandError("The default cache is not Redis; there is no suggest index to build.")
+        count = rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} movie(s)."))
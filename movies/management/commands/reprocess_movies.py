@@ -0,0 +1,181 @@
+from __future__ import annotations
+import resource
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import Optional
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+from django.db.models import Q
+from movies.models import Movie, Genre
+from movies.processing import enqueue_processing
+from movies.tasks import process_movie
+
+# to re-run the pipeline over (parts of) the catalog, e.g. after changing encoding settings
+#
+# docker compose exec web \
+#   python manage.py reprocess_movies \
+#   --status ready --genre comedy --missing-variants \
+#   --rate 2 --dry-run
+#
+# --sync --concurrency 2 runs the jobs in this process (no RQ) and reports throughput.
+
+
+def parse_day(value: Optional[str], flag: str) -> Optional[date]:
+    """Parse a YYYY-MM-DD option value or raise a CommandError naming the flag."""
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f"{flag} must be YYYY-MM-DD, got '{value}'.")
+
+
+def select_movies(opts):
+    """
+    Build the queryset of movies to reprocess from the command options.
+    Movies without a source file are always excluded.
+    """
+    qs = Movie.objects.exclude(video_file="").exclude(video_file__isnull=True)
+    if opts.get("ids"):
+        qs = qs.filter(pk__in=opts["ids"])
+    if opts.get("status"):
+        qs = qs.filter(processing_status__in=opts["status"])
+    if opts.get("genre"):
+        genre = (
+            Genre.objects.filter(slug__iexact=opts["genre"]).first()
+            or Genre.objects.filter(name__iexact=opts["genre"]).first()
+        )
+        if not genre:
+            raise CommandError(f"Genre '{opts['genre']}' not found (by slug or name).")
+        qs = qs.filter(genre=genre)
+    created_after = parse_day(opts.get("created_after"), "--created-after")
+    created_before = parse_day(opts.get("created_before"), "--created-before")
+    if created_after:
+        qs = qs.filter(created_at__date__gte=created_after)
+    if created_before:
+        qs = qs.filter(created_at__date__lte=created_before)
+    if opts.get("missing_variants"):
+        qs = qs.filter(Q(video_1080="") | Q(video_720="") | Q(video_480="")
+                       | Q(video_1080__isnull=True) | Q(video_720__isnull=True) | Q(video_480__isnull=True))
+    qs = qs.order_by("created_at", "id")
+    if opts.get("limit"):
+        qs = qs[: opts["limit"]]
+    return qs
+
+
+def cpu_seconds() -> float:
+    """User+system CPU of this process and its finished children (ffmpeg/ffprobe)."""
+    total = 0.0
+    for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN):
+        usage = resource.getrusage(who)
+        total += usage.ru_utime + usage.ru_stime
+    return total
+
+
+def throughput_report(processed: int, wall_s: float, cpu_s: float, output_s: int) -> dict:
+    """Movies per hour and CPU seconds per minute of produced output."""
+    return {
+        "movies_per_hour": (processed * 3600.0 / wall_s) if wall_s > 0 else 0.0,
+        "cpu_s_per_output_min": (cpu_s / (output_s / 60.0)) if output_s > 0 else None,
+    }
+
+
+def _process_in_thread(movie_id: int) -> None:
+    """Run the pipeline synchronously; each thread uses (and closes) its own DB connection."""
+    try:
+        close_old_connections()
+        process_movie(movie_id)
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = "Re-run the transcode pipeline for selected movies (enqueue to RQ, or --sync in this process)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ids", type=int, nargs="+", default=None, help="Only these movie ids.")
+        parser.add_argument(
+            "--status",
+            nargs="+",
+            choices=[value for value, _ in Movie.PROCESSING_CHOICES],
+            default=None,
+            help="Only movies with one of these processing statuses.",
+        )
+        parser.add_argument("--genre", type=str, default=None, help="Only movies of this genre (slug or name).")
+        parser.add_argument("--created-after", type=str, default=None, help="Only movies created on/after YYYY-MM-DD.")
+        parser.add_argument("--created-before", type=str, default=None, help="Only movies created on/before YYYY-MM-DD.")
+        parser.add_argument("--missing-variants", action="store_true", help="Only movies missing a 1080/720/480 variant.")
+        parser.add_argument("--limit", type=int, default=None, help="Process at most this many movies.")
+        parser.add_argument("--dry-run", action="store_true", help="Only list the movies that would be reprocessed.")
+        parser.add_argument("--rate", type=float, default=None, help="Max enqueues per second (default: unlimited).")
+        parser.add_argument("--sync", action="store_true", help="Run the pipeline in this process instead of RQ.")
+        parser.add_argument("--concurrency", type=int, default=1, help="Parallel movies with --sync (default: 1).")
+
+    def handle(self, *args, **opts):
+        movies = list(select_movies(opts))
+        if not movies:
+            self.stdout.write("No movies match the given filters.")
+            return
+
+        for movie in movies:
+            self.stdout.write(f"#{movie.id} '{movie.title}' [{movie.processing_status}]")
+
+        if opts["dry_run"]:
+            self.stdout.write(self.style.WARNING(f"Dry run: {len(movies)} movie(s) would be reprocessed."))
+            return
+
+        if opts["sync"]:
+            self._run_sync(movies, max(1, opts["concurrency"]))
+        else:
+            self._enqueue(movies, opts.get("rate"))
+
+    def _enqueue(self, movies, rate: Optional[float]):
+        interval = (1.0 / rate) if rate and rate > 0 else 0.0
+        started = time.monotonic()
+        queued = 0
+        for i, movie in enumerate(movies):
+            if interval and i:
+                time.sleep(interval)
+            if enqueue_processing(movie, force=True):
+                queued += 1
+            else:
+                self.stdout.write(self.style.WARNING(f"Skipped #{movie.id}: currently processing."))
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Done. Enqueued {queued}/{len(movies)} movies in {elapsed:.1f}s. "
+            "Throughput is reported for --sync runs only (encoding happens on the RQ workers)."
+        ))
+
+    def _run_sync(self, movies, concurrency: int):
+        ids = [m.id for m in movies]
+        wall_started = time.monotonic()
+        cpu_started = cpu_seconds()
+
+        if concurrency == 1:
+            for movie_id in ids:
+                try:
+                    process_movie(movie_id)
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f"#{movie_id} crashed: {e!r}"))
+        else:
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                for movie_id, future in [(i, pool.submit(_process_in_thread, i)) for i in ids]:
+                    try:
+                        future.result()
+                    except Exception as e:
+                        self.stdout.write(self.style.ERROR(f"#{movie_id} crashed: {e!r}"))
+
+        wall_s = time.monotonic() - wall_started
+        cpu_s = cpu_seconds() - cpu_started
+        done = Movie.objects.filter(pk__in=ids)
+        ready = [m for m in done if m.processing_status == "ready"]
+        output_s = sum(m.duration_seconds or 0 for m in ready)
+        report = throughput_report(len(ids), wall_s, cpu_s, output_s)
+
+        per_min = report["cpu_s_per_output_min"]
+        self.stdout.write(self.style.SUCCESS(
+            f"Done. {len(ready)} ready, {len(ids) - len(ready)} not ready, {wall_s:.1f}s wall, {cpu_s:.1f}s CPU. "
+            f"{report['movies_per_hour']:.1f} movies/hour, "
+            f"{'n/a' if per_min is None else f'{per_min:.1f}'} CPU-s per output minute."
+        ))
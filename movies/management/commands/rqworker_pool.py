@@ -0,0 +1,38 @@
+from __future__ import annotations
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from movies.workers import configured_pools, parse_pools, run_pools
+
+# to run a pool of pre-initialized RQ workers (Django imported once, jobs run in-process)
+#
+# docker compose exec web \
+#   python manage.py rqworker_pool --pool high=2 --pool default=1
+#
+# without --pool the sizes come from RQ_WORKER_POOLS.
+
+
+class Command(BaseCommand):
+    help = "Run a supervised pool of preloaded RQ workers with a configurable size per queue."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--pool", action="append", default=None,
+                            help="queue=size, repeatable; 'high,default=2' listens on both in priority order.")
+        parser.add_argument("--max-jobs", type=int, default=None,
+                            help="Recycle a worker after this many jobs (default: RQ_WORKER_MAX_JOBS, 0 = never).")
+        parser.add_argument("--burst", action="store_true", help="Exit once all queues are empty.")
+        parser.add_argument("--fork-per-job", action="store_true",
+                            help="Classic RQ behaviour: fork a work horse for every job.")
+
+    def handle(self, *args, **opts):
+        try:
+            pools = parse_pools(opts["pool"]) if opts.get("pool") else configured_pools()
+        except ValueError as e:
+            raise CommandError(str(e))
+        pools = {queues: size for queues, size in pools.items() if size > 0}
+        if not pools:
+            raise CommandError("No worker pools configured.")
+        max_jobs = opts["max_jobs"] if opts.get("max_jobs") is not None else getattr(settings, "RQ_WORKER_MAX_JOBS", 0)
+
+        self.stdout.write(", ".join(f"{queues}: {size}" for queues, size in pools.items()))
+        run_pools(pools, burst=opts.get("burst", False), max_jobs=max_jobs,
+                  fork_per_job=opts.get("fork_per_job", False))
@@ -0,0 +1,155 @@
+# movies/mediainfo.py
+from __future__ import annotations
+
+import json
+import subprocess
+from fractions import Fraction
+from pathlib import Path
+from typing import Dict, Optional
+
+from .models import MediaInfo, Movie
+
+# One ffprobe per file: the source is probed when it is uploaded (and rejected if it is not
+# playable), each rendition right after it was encoded. Everything else (pipeline duration,
+# quality selection by bitrate) reads the stored MediaInfo instead of running ffprobe again.
+
+FFPROBE = "ffprobe"
+PROBE_TIMEOUT = 60
+KEYFRAME_SCAN_SECONDS = 30
+
+
+class ProbeFailed(Exception):
+    """ffprobe could not read the file; `str(e)` is its last error line."""
+
+
+class UnplayableSource(Exception):
+    """The uploaded source can't be transcoded (no video stream, no duration, unreadable)."""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+def _ffprobe(args: list, path: Path) -> dict:
+    proc = subprocess.run([FFPROBE, "-v", "error", "-of", "json", *args, str(path)],
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, timeout=PROBE_TIMEOUT)
+    if proc.returncode != 0:
+        lines = (proc.stderr or "").strip().splitlines()
+        raise ProbeFailed(lines[-1] if lines else f"ffprobe exited with {proc.returncode}")
+    return json.loads(proc.stdout or "{}")
+
+
+def _rate(value: Optional[str]) -> Optional[float]:
+    """'30000/1001' -> 29.97."""
+    try:
+        rate = Fraction(value)
+        return round(float(rate), 3) if rate else None
+    except (TypeError, ValueError, ZeroDivisionError):
+        return None
+
+
+def _float(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _int(value) -> Optional[int]:
+    number = _float(value)
+    return int(number) if number is not None else None
+
+
+def keyframe_interval(path: Path, seconds: int = KEYFRAME_SCAN_SECONDS) -> Optional[float]:
+    """Mean distance (s) between keyframes in the first `seconds` of the video stream."""
+    try:
+        data = _ffprobe(["-select_streams", "v:0", "-read_intervals", f"%+{seconds}",
+                         "-show_entries", "packet=pts_time,flags"], path)
+    except (ProbeFailed, OSError, subprocess.TimeoutExpired, ValueError):
+        return None
+    times = sorted(float(p["pts_time"]) for p in data.get("packets", [])
+                   if "K" in p.get("flags", "") and p.get("pts_time") not in (None, "N/A"))
+    if len(times) < 2:
+        return None
+    return round((times[-1] - times[0]) / (len(times) - 1), 3)
+
+
+def summarize(data: dict) -> dict:
+    """MediaInfo field values from ffprobe -show_format -show_streams JSON."""
+    streams = data.get("streams") or []
+    fmt = data.get("format") or {}
+    video = next((s for s in streams if s.get("codec_type") == "video"
+                  and not (s.get("disposition") or {}).get("attached_pic")), None)
+    audio = next((s for s in streams if s.get("codec_type") == "audio"), None)
+    return {
+        "size_bytes": _int(fmt.get("size")),
+        "duration": _float(fmt.get("duration")),
+        "width": _int((video or {}).get("width")),
+        "height": _int((video or {}).get("height")),
+        "fps": _rate((video or {}).get("avg_frame_rate")) or _rate((video or {}).get("r_frame_rate")),
+        "video_codec": (video or {}).get("codec_name") or "",
+        "audio_codec": (audio or {}).get("codec_name") or "",
+        "bitrate": _int(fmt.get("bit_rate")),
+        "video_bitrate": _int((video or {}).get("bit_rate")),
+        "probe": data,
+    }
+
+
+def probe(path: Path) -> dict:
+    """Probe a file into MediaInfo field values. Raises ProbeFailed / OSError."""
+    fields = summarize(_ffprobe(["-show_format", "-show_streams"], path))
+    if fields["video_codec"]:
+        fields["keyframe_interval"] = keyframe_interval(path)
+    return fields
+
+
+def check_source(path: Path) -> Optional[dict]:
+    """
+    Probe an uploaded source and raise UnplayableSource if the pipeline could not use it.
+    Returns the MediaInfo field values, or None if ffprobe isn't installed (nothing to check with).
+    """
+    try:
+        fields = probe(path)
+    except FileNotFoundError:
+        return None
+    except subprocess.TimeoutExpired:
+        raise UnplayableSource("ffprobe timed out reading the file")
+    except (ProbeFailed, ValueError) as e:
+        raise UnplayableSource(str(e) or "unreadable file")
+    if not fields["video_codec"]:
+        raise UnplayableSource("no video stream")
+    if not fields["width"] or not fields["height"]:
+        raise UnplayableSource("video stream has no resolution")
+    if not fields["duration"]:
+        raise UnplayableSource("unknown duration")
+    return fields
+
+
+def store(movie: Movie, kind: str, file_name: str, fields: dict) -> MediaInfo:
+    """Save probe results for `kind` ('source' / '1080' / '720' / '480') of a movie."""
+    info, _ = MediaInfo.objects.update_or_create(
+        movie=movie, kind=kind, defaults={"file_name": file_name, **fields})
+    return info
+
+
+def record(movie: Movie, kind: str, path: Path, file_name: str) -> Optional[MediaInfo]:
+    """Probe and store, best effort (None if the file can't be probed)."""
+    try:
+        return store(movie, kind, file_name, probe(path))
+    except (ProbeFailed, OSError, subprocess.TimeoutExpired, ValueError):
+        return None
+
+
+def current(movie: Movie, kind: str) -> Optional[MediaInfo]:
+    """Stored info for `kind`, if it still belongs to the file the movie points at."""
+    field = movie.video_file if kind == "source" else getattr(movie, f"video_{kind}")
+    if not field:
+        return None
+    return MediaInfo.objects.filter(movie=movie, kind=kind, file_name=field.name).first()
+
+
+def bitrates(movie: Movie) -> Dict[str, int]:
+    """{'1080': bit/s, ...} of the renditions the movie currently has (probed ones only)."""
+    names = {q: getattr(movie, f"video_{q}").name for q in ("1080", "720", "480") if getattr(movie, f"video_{q}")}
+    rows = MediaInfo.objects.filter(movie=movie, kind__in=list(names)).values_list("kind", "file_name", "bitrate")
+    return {kind: rate for kind, name, rate in rows if rate and names.get(kind) == name}
@@ -1,3 +1,5 @@
+import uuid
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.utils.text import slugify
 from core import settings
@@ -38,9 +40,12 @@ class Movie(models.Model):
         upload_to="movies/variants/", blank=True, null=True)
     is_hero = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    # part of the serialized fragment cache key (movies.fragments): bump it on every write
+    updated_at = models.DateTimeField(auto_now=True)
 
     PROCESSING_CHOICES = [
         ("pending", "Pending"),
+        ("queued", "Queued"),
         ("processing", "Processing"),
         ("ready", "Ready"),
         ("failed", "Failed"),
@@ -49,6 +54,21 @@ class Movie(models.Model):
         max_length=12, choices=PROCESSING_CHOICES, default="pending")
     processing_error = models.TextField(blank=True, null=True)
     duration_seconds = models.PositiveIntegerField(blank=True, null=True)
+    # maintained by a database trigger on PostgreSQL (movies.search), unused elsewhere
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # keyset pagination of the catalog: WHERE (created_at, id) < cursor ORDER BY both DESC
+            models.Index(fields=["processing_status", "-created_at", "-id"], name="movie_status_created_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        # auto_now only reaches the DB if updated_at is among update_fields
+        update_fields = kwargs.get("update_fields")
+        if update_fields and "updated_at" not in update_fields:
+            kwargs["update_fields"] = {*update_fields, "updated_at"}
+        return super().save(*args, **kwargs)
 
     def __str__(self):
         return self.title
@@ -64,6 +84,128 @@ class Favorite(models.Model):
     class Meta:
         constraints = [models.UniqueConstraint(
             fields=["user", "movie"], name="uniq_favorite_user_movie")]
+        indexes = [models.Index(fields=["user", "-created_at", "-id"], name="favorite_user_created_idx")]
 
     def __str__(self):
         return f"{self.user_id} ♥ {self.movie_id}"
+
+
+class UploadSession(models.Model):
+    """Resumable (chunked) upload of a movie's source video; bytes are staged on disk until complete."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    movie = models.ForeignKey("movies.Movie", on_delete=models.CASCADE, related_name="upload_sessions")
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    filename = models.CharField(max_length=255)
+    length = models.PositiveBigIntegerField()
+    offset = models.PositiveBigIntegerField(default=0)
+    sha256 = models.CharField(max_length=64, blank=True)
+    completed_at = models.DateTimeField(blank=True, null=True)
+    error = models.CharField(max_length=255, blank=True)  # why the finished file was rejected
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def is_complete(self) -> bool:
+        return self.completed_at is not None
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.length})"
+
+
+class ProcessingRun(models.Model):
+    """One execution of the transcode pipeline for a movie (see movies.runs)."""
+    movie = models.ForeignKey("movies.Movie", on_delete=models.CASCADE, related_name="processing_runs")
+    source_name = models.CharField(max_length=255, blank=True)
+    status = models.CharField(max_length=12, default="processing")
+    worker_host = models.CharField(max_length=255, blank=True)
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField(blank=True, null=True)
+    wall_seconds = models.FloatField(blank=True, null=True)
+    cpu_seconds = models.FloatField(blank=True, null=True)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ["-started_at"]
+
+    def __str__(self):
+        return f"{self.movie_id} @ {self.started_at:%Y-%m-%d %H:%M} ({self.status})"
+
+
+class ProcessingStep(models.Model):
+    """A single pipeline step of a run (transcode_720, thumbnail, ...) with its resource usage."""
+    run = models.ForeignKey("movies.ProcessingRun", on_delete=models.CASCADE, related_name="steps")
+    name = models.CharField(max_length=32)
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField(blank=True, null=True)
+    wall_seconds = models.FloatField(default=0)
+    cpu_seconds = models.FloatField(default=0)  # user+sys of the step's subprocesses
+    peak_rss_kb = models.PositiveBigIntegerField(blank=True, null=True)
+    output_bytes = models.PositiveBigIntegerField(blank=True, null=True)
+    encoder_settings = models.JSONField(default=list, blank=True)  # argv of the subprocesses
+    exit_code = models.IntegerField(blank=True, null=True)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ["started_at", "id"]
+
+    def __str__(self):
+        return f"{self.name} ({self.wall_seconds:.1f}s)"
+
+
+class RenditionAccess(models.Model):
+    """Last demand for one rendition of a movie; drives LRU eviction of cold variants (see movies.renditions)."""
+    movie = models.ForeignKey("movies.Movie", on_delete=models.CASCADE, related_name="rendition_access")
+    quality = models.CharField(max_length=4)  # "1080" / "720" / "480"
+    last_accessed_at = models.DateTimeField(blank=True, null=True)
+    evicted_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(
+            fields=["movie", "quality"], name="uniq_rendition_access_movie_quality")]
+
+    def __str__(self):
+        return f"{self.movie_id} {self.quality}p"
+
+
+class DeadLetter(models.Model):
+    """A pipeline job we gave up on (permanent failure or retries exhausted), with diagnostics."""
+    movie = models.ForeignKey("movies.Movie", on_delete=models.CASCADE, related_name="dead_letters")
+    failure_class = models.CharField(max_length=12)  # "permanent" / "transient"
+    reason = models.CharField(max_length=255)
+    attempts = models.PositiveSmallIntegerField(default=1)
+    diagnostics = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    resolved_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.movie_id}: {self.reason}"
+
+
+class MediaInfo(models.Model):
+    """ffprobe result of a movie's source or one of its renditions, probed once (see movies.mediainfo)."""
+    KIND_CHOICES = [("source", "Source"), ("1080", "1080p"), ("720", "720p"), ("480", "480p")]
+
+    movie = models.ForeignKey("movies.Movie", on_delete=models.CASCADE, related_name="media_info")
+    kind = models.CharField(max_length=8, choices=KIND_CHOICES)
+    file_name = models.CharField(max_length=255)  # storage name the probe belongs to
+    size_bytes = models.PositiveBigIntegerField(blank=True, null=True)
+    duration = models.FloatField(blank=True, null=True)
+    width = models.PositiveIntegerField(blank=True, null=True)
+    height = models.PositiveIntegerField(blank=True, null=True)
+    fps = models.FloatField(blank=True, null=True)
+    video_codec = models.CharField(max_length=32, blank=True)
+    audio_codec = models.CharField(max_length=32, blank=True)
+    bitrate = models.PositiveBigIntegerField(blank=True, null=True)  # bit/s, whole file
+    video_bitrate = models.PositiveBigIntegerField(blank=True, null=True)
+    keyframe_interval = models.FloatField(blank=True, null=True)  # seconds, mean GOP length
+    probe = models.JSONField(default=dict, blank=True)  # raw ffprobe -show_format -show_streams
+    probed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["movie", "kind"], name="uniq_media_info_movie_kind")]
+
+    def __str__(self):
+        return f"{self.movie_id} {self.kind}: {self.width}x{self.height} {self.video_codec}"
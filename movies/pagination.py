@@ -0,0 +1,100 @@
+# movies/pagination.py
+from __future__ import annotations
+
+import base64
+import json
+from datetime import datetime
+from typing import Optional
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Descending keyset pagination on (sort_field, id), newest first by default: a page is
+    `WHERE (t, id) < (cursor_t, cursor_id) ORDER BY t DESC, id DESC LIMIT n`, so deep pages
+    cost the same as the first one (no OFFSET). The body stays a plain list; the next page
+    is announced in the `Link` (rel="next") and `X-Next-Cursor` headers.
+    """
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    sort_field = "created_at"
+    id_field = "id"
+
+    def __init__(self, sort_field: Optional[str] = None, id_field: Optional[str] = None):
+        self.sort_field = sort_field or self.sort_field
+        self.id_field = id_field or self.id_field
+        self.next_cursor: Optional[str] = None
+        self.request = None
+
+    def get_page_size(self, request) -> int:
+        default = int(getattr(settings, "MOVIE_PAGE_SIZE", 50))
+        maximum = int(getattr(settings, "MOVIE_MAX_PAGE_SIZE", 100))
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, default))
+        except (TypeError, ValueError):
+            size = default
+        return max(1, min(size, maximum))
+
+    @staticmethod
+    def encode_cursor(value, pk: int) -> str:
+        """Opaque cursor for (sort value, id); the sort value is a datetime or a number (search rank)."""
+        if isinstance(value, datetime):
+            value = {"t": value.isoformat()}
+        raw = json.dumps([value, pk], separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> tuple:
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            value, pk = json.loads(raw)
+            if isinstance(value, dict):
+                value = datetime.fromisoformat(value["t"])
+            elif not isinstance(value, (int, float)) or isinstance(value, bool):
+                raise ValueError(value)
+            return value, int(pk)
+        except (ValueError, TypeError, KeyError):
+            raise NotFound("Invalid cursor.")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        size = self.get_page_size(request)
+        queryset = queryset.order_by(f"-{self.sort_field}", f"-{self.id_field}")
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            value, pk = self.decode_cursor(cursor)
+            queryset = queryset.filter(
+                Q(**{f"{self.sort_field}__lt": value})
+                | Q(**{self.sort_field: value, f"{self.id_field}__lt": pk})
+            )
+        rows = list(queryset[: size + 1])
+        page, has_more = rows[:size], len(rows) > size
+        if has_more:
+            last = page[-1]
+            self.next_cursor = self.encode_cursor(_value(last, self.sort_field), _value(last, self.id_field))
+        return page
+
+    def get_next_link(self) -> Optional[str]:
+        if not self.next_cursor:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        response = Response(data)
+        next_link = self.get_next_link()
+        if next_link:
+            response["Link"] = f'<{next_link}>; rel="next"'
+            response["X-Next-Cursor"] = self.next_cursor
+        return response
+
+
+def _value(obj, path: str):
+    for part in path.split("__"):
+        obj = getattr(obj, part)
+    return obj
@@ -0,0 +1,103 @@
+# movies/precompressed.py
+from __future__ import annotations
+
+import gzip
+import hashlib
+from typing import Callable, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+# Catalog responses are served already compressed: the JSON body is rendered once per request
+# (cheap), and its brotli / zstd / gzip variants are cached under a digest of that body, so
+# the expensive part (compression) runs once per distinct body instead of on every request.
+# That only pays off for shared bodies (no favorites on the page, identical for every user);
+# a body with the user's favorites overlaid is compressed at fast levels and not cached, so
+# no user pays a high-level compression and a cache entry of their own. brotli and zstandard
+# are optional packages; the encodings whose package is missing are simply not offered.
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+
+def _compressors(fast: bool = False) -> Dict[str, Callable[[bytes], bytes]]:
+    """Available encodings in server preference order (best ratio first); `fast` for per-user bodies."""
+    found = {}
+    if brotli is not None:
+        found["br"] = lambda body: brotli.compress(body, quality=4 if fast else 9)
+    if zstandard is not None:
+        found["zstd"] = lambda body: zstandard.ZstdCompressor(level=3 if fast else 12).compress(body)
+    found["gzip"] = lambda body: gzip.compress(body, compresslevel=6 if fast else 9, mtime=0)
+    return found
+
+
+COMPRESSORS = _compressors()
+FAST_COMPRESSORS = _compressors(fast=True)
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """The encoding to send for an Accept-Encoding header: highest client q, ties by server preference."""
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, *params = [p.strip() for p in part.split(";")]
+        weight = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        if name:
+            weights[name.lower()] = weight
+
+    best, best_weight = None, 0.0
+    for encoding in COMPRESSORS:
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def encoded(request, response, shared: bool = True):
+    """
+    `response` (a DRF Response) as pre-compressed bytes if the client accepts an encoding we have
+    and the JSON renderer was chosen; otherwise `response` unchanged (browsable API, small bodies).
+    `shared` says the body is the same for every user (cached at high levels); per-user bodies
+    are compressed fast and not cached.
+    """
+    encoding = negotiate(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+    renderer = getattr(request, "accepted_renderer", None)
+    if encoding is None or renderer is None or renderer.format != "json":
+        return response
+
+    body = renderer.render(response.data, request.accepted_media_type, {"request": request, "response": response})
+    if len(body) < int(getattr(settings, "PRECOMPRESS_MIN_SIZE", 512)):
+        return response
+
+    if shared:
+        key = f"movies:encoded:{encoding}:{hashlib.sha1(body).hexdigest()}"
+        compressed = cache.get(key)
+        if compressed is None:
+            compressed = COMPRESSORS[encoding](body)
+            cache.set(key, compressed, int(getattr(settings, "CATALOG_CACHE_TIMEOUT", 600)))
+    else:
+        compressed = FAST_COMPRESSORS[encoding](body)
+
+    out = HttpResponse(compressed, status=response.status_code, content_type=renderer.media_type)
+    for header, value in response.items():
+        if header.lower() != "content-type":
+            out[header] = value
+    out["Content-Encoding"] = encoding
+    out["Content-Length"] = str(len(compressed))
+    patch_vary_headers(out, ["Accept-Encoding"])
+    return out
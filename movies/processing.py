@@ -0,0 +1,189 @@
+# movies/processing.py
+from __future__ import annotations
+
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Iterator, Optional
+
+import django_rq
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.dispatch import Signal
+from django.utils import timezone
+
+from . import watchdog
+from .models import MediaInfo, Movie
+
+# Which processing_status values may move into a given status.
+# pending -> queued -> processing -> ready|failed; ready|failed -> queued on reprocess.
+PROCESSING_TRANSITIONS = {
+    "queued": ("pending", "ready", "failed"),
+    "processing": ("pending", "queued", "ready", "failed"),
+    "ready": ("processing",),
+    "failed": ("processing", "queued"),
+}
+
+TRANSCODE_JOB = "movies.tasks.process_movie"
+
+# Steps of a run that read the whole title (shared audio + three renditions); stills and
+# the teaser only touch a few seconds and get PIPELINE_STEP_TIMEOUT_BASE each.
+FULL_LENGTH_STEPS = 4
+SHORT_STEPS = 3
+
+# Sent after processing_status changed through a queryset UPDATE (no post_save for those);
+# kwargs: movie_id, status.
+status_changed = Signal()
+
+
+def job_id_for(movie_id: int) -> str:
+    """Stable RQ job id for a movie's transcode job."""
+    return f"movie-{movie_id}-transcode"
+
+
+def lock_key_for(movie_id: int) -> str:
+    """Cache key of the per-movie processing lock."""
+    return f"movies:processing-lock:{movie_id}"
+
+
+def job_timeout_for(movie_id: int, full_length_steps: int = FULL_LENGTH_STEPS) -> int:
+    """
+    RQ job timeout for a run over `movie_id`: the watchdog step limit (scaled to the media
+    duration, see movies.watchdog.step_timeout) for every full-length step plus the short ones.
+    Without it RQ's DEFAULT_TIMEOUT would kill long titles that the step limits allow.
+    """
+    row = Movie.objects.filter(pk=movie_id).values_list("duration_seconds", "video_file").first()
+    duration = None
+    if row:
+        duration = row[0] or MediaInfo.objects.filter(
+            movie_id=movie_id, kind="source", file_name=row[1]).values_list("duration", flat=True).first()
+    base = float(getattr(settings, "PIPELINE_STEP_TIMEOUT_BASE", 120))
+    return int(full_length_steps * watchdog.step_timeout(duration or None) + SHORT_STEPS * base)
+
+
+def lock_held(movie_id: int) -> bool:
+    """True while a worker holds the movie's processing lock (see `movie_lock`)."""
+    return cache.get(lock_key_for(movie_id)) is not None
+
+
+def transition(movie_id: int, to: str, only_from: Optional[tuple] = None, **fields) -> bool:
+    """
+    Move a movie into `to` with a single conditional UPDATE (compare-and-set).
+    Returns False if the current status does not allow the transition, so two
+    callers racing for the same step can never both win. `only_from` narrows the
+    allowed source statuses further (e.g. only out of 'processing').
+    """
+    allowed = [status for status in PROCESSING_TRANSITIONS[to] if only_from is None or status in only_from]
+    qs = Movie.objects.filter(pk=movie_id, processing_status__in=allowed)
+    fields.setdefault("updated_at", timezone.now())
+    if qs.update(processing_status=to, **fields) != 1:
+        return False
+    status_changed.send(sender=Movie, movie_id=movie_id, status=to)
+    return True
+
+
+def enqueue_processing(movie: Movie, force: bool = False) -> bool:
+    """
+    Put a movie on the transcode queue unless it is already queued or processing.
+    `force` is meant for explicit reprocess requests: it re-queues whatever the status
+    says (a movie stuck in 'queued' because the Redis job was lost, or left in
+    'processing' by a killed worker) unless a worker actually holds the movie lock.
+    The job is enqueued once the surrounding transaction commits, so the worker never
+    sees the row before the new source does. Returns True if a job was enqueued.
+    """
+    if not movie.pk or not movie.video_file:
+        return False
+    if force:
+        if lock_held(movie.pk):
+            return False
+        claimed = Movie.objects.filter(pk=movie.pk).update(
+            processing_status="queued", updated_at=timezone.now()) == 1
+        if claimed:
+            status_changed.send(sender=Movie, movie_id=movie.pk, status="queued")
+    else:
+        claimed = transition(movie.pk, "queued")
+    if not claimed:
+        return False
+    movie.processing_status = "queued"
+    movie_id = movie.pk
+    transaction.on_commit(lambda: django_rq.get_queue("default").enqueue(
+        TRANSCODE_JOB, movie_id, job_id=job_id_for(movie_id), job_timeout=job_timeout_for(movie_id)))
+    return True
+
+
+def schedule_retry(movie_id: int, attempt: int, delay: float) -> bool:
+    """
+    Re-queue a failed movie for another attempt in `delay` seconds (RQ scheduler).
+    Returns False if the movie left 'failed' meanwhile (e.g. someone reprocessed it).
+    """
+    if not transition(movie_id, "queued"):
+        return False
+    queue = django_rq.get_queue("default")
+    queue.enqueue_in(timedelta(seconds=delay), TRANSCODE_JOB, movie_id, attempt,
+                     job_id=job_id_for(movie_id), job_timeout=job_timeout_for(movie_id))
+    return True
+
+
+@contextmanager
+def movie_lock(movie_id: int, timeout: Optional[int] = None) -> Iterator[bool]:
+    """
+    Per-movie distributed lock on the shared cache (SET NX with expiry on Redis).
+    Yields True if the lock was acquired, False if another worker holds it.
+    While held, a background thread extends it every `timeout` / 3 seconds, so a run may take
+    as long as its job timeout; a killed worker stops extending and the lock expires after
+    `timeout` seconds, so it cannot block a movie forever.
+    """
+    key = lock_key_for(movie_id)
+    token = uuid.uuid4().hex
+    ttl = timeout or getattr(settings, "MOVIE_PROCESSING_LOCK_TIMEOUT", 1800)
+    acquired = cache.add(key, token, ttl)
+    stop = threading.Event()
+    keeper = None
+    if acquired:
+        keeper = threading.Thread(target=_keep_lock, args=(key, token, ttl, stop), daemon=True)
+        keeper.start()
+    try:
+        yield acquired
+    finally:
+        stop.set()
+        if keeper is not None:
+            keeper.join()
+        # only release our own lock (it may have expired and been taken over)
+        if acquired and cache.get(key) == token:
+            cache.delete(key)
+
+
+@contextmanager
+def maintenance_lock(movie_id: int, timeout: Optional[int] = None) -> Iterator[bool]:
+    """
+    `movie_lock` for work beside the pipeline (rendition regeneration, eviction). A transcode
+    job that arrives meanwhile bounces off the lock and leaves the movie 'queued'; once the
+    lock is released, such a movie is enqueued again (unless its job is still waiting).
+    """
+    acquired = False
+    try:
+        with movie_lock(movie_id, timeout) as acquired:
+            yield acquired
+    finally:
+        if acquired:
+            requeue_bounced(movie_id)
+
+
+def requeue_bounced(movie_id: int) -> bool:
+    """Enqueue a 'queued' movie whose job ran (and bounced off the lock) while it was held."""
+    movie = Movie.objects.filter(pk=movie_id, processing_status="queued").first()
+    if movie is None:
+        return False
+    job = django_rq.get_queue("default").fetch_job(job_id_for(movie_id))
+    if job is not None and job.get_status() in ("queued", "scheduled", "deferred"):
+        return False  # not run yet: it will find the lock free
+    return enqueue_processing(movie, force=True)
+
+
+def _keep_lock(key: str, token: str, ttl: float, stop: threading.Event) -> None:
+    while not stop.wait(ttl / 3):
+        if cache.get(key) != token:
+            return
+        cache.touch(key, ttl)
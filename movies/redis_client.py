@@ -0,0 +1,15 @@
+# movies/redis_client.py
+from __future__ import annotations
+
+# Raw Redis access for the indexes kept next to the cache (movies.suggest, movies.heroes).
+# They use the default cache's connection; without django-redis (LocMemCache in tests)
+# there is no client and callers fall back to the database.
+
+
+def get_redis():
+    """Raw client of the default cache, or None if the cache isn't django-redis."""
+    try:
+        from django_redis import get_redis_connection
+        return get_redis_connection("default")
+    except (ImportError, NotImplementedError):
+        return None
@@ -0,0 +1,150 @@
+# movies/renditions.py
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import List, Optional
+
+import django_rq
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .catalog import bump_catalog_version
+from .models import Movie, RenditionAccess
+from .processing import job_timeout_for, maintenance_lock
+
+# Cold renditions: every stream request records (throttled) which rendition was asked for.
+# Under a storage budget the least recently wanted 1080p/720p files are deleted; 480p and the
+# original are always kept, so an evicted movie stays playable and can be re-encoded.
+# A request for an evicted rendition is served from the best available one while a
+# regeneration job runs on the "high" queue.
+
+EVICTABLE = ("1080", "720")
+REGENERATE_JOB = "movies.tasks.regenerate_rendition"
+
+
+def regenerate_job_id_for(movie_id: int, quality: str) -> str:
+    """Stable RQ job id of a rendition regeneration."""
+    return f"movie-{movie_id}-rendition-{quality}"
+
+
+def touch(movie_id: int, quality: str) -> None:
+    """
+    Record that `quality` of a movie was requested. At most one write per movie/rendition
+    every RENDITION_TOUCH_INTERVAL seconds (the cache key absorbs the rest).
+    """
+    if quality not in ("1080", "720", "480"):
+        return
+    interval = int(getattr(settings, "RENDITION_TOUCH_INTERVAL", 300))
+    if not cache.add(f"movies:rendition-touch:{movie_id}:{quality}", 1, interval):
+        return
+    now = timezone.now()
+    updated = RenditionAccess.objects.filter(movie_id=movie_id, quality=quality).update(last_accessed_at=now)
+    if not updated:
+        RenditionAccess.objects.get_or_create(movie_id=movie_id, quality=quality,
+                                              defaults={"last_accessed_at": now})
+
+
+def is_evicted(movie: Movie, quality: str) -> bool:
+    """True if the rendition was removed by eviction (not just never produced) and is still missing."""
+    if quality not in EVICTABLE or getattr(movie, f"video_{quality}"):
+        return False
+    return RenditionAccess.objects.filter(movie=movie, quality=quality, evicted_at__isnull=False).exists()
+
+
+def request_regeneration(movie: Movie, quality: str) -> bool:
+    """
+    Enqueue a high-priority re-encode of an evicted rendition (once per movie/rendition
+    while it is pending). Returns True if a job was enqueued.
+    """
+    key = f"movies:rendition-regenerate:{movie.pk}:{quality}"
+    if not cache.add(key, 1, int(getattr(settings, "MOVIE_PROCESSING_LOCK_TIMEOUT", 1800))):
+        return False
+    django_rq.get_queue("high").enqueue(
+        REGENERATE_JOB, movie.pk, int(quality), job_id=regenerate_job_id_for(movie.pk, quality),
+        job_timeout=job_timeout_for(movie.pk, full_length_steps=1))
+    return True
+
+
+def regeneration_done(movie_id: int, quality: str, restored: bool) -> None:
+    """Called by the regeneration job: clear the pending marker (and the eviction if it succeeded)."""
+    cache.delete(f"movies:rendition-regenerate:{movie_id}:{quality}")
+    if restored:
+        RenditionAccess.objects.filter(movie_id=movie_id, quality=quality).update(evicted_at=None)
+
+
+def _size(field) -> int:
+    try:
+        return field.storage.size(field.name)
+    except (OSError, NotImplementedError):
+        return 0
+
+
+def rendition_usage() -> List[dict]:
+    """All stored renditions of ready movies with size and last access (None = never requested)."""
+    last = {
+        (a.movie_id, a.quality): a.last_accessed_at
+        for a in RenditionAccess.objects.all().only("movie_id", "quality", "last_accessed_at")
+    }
+    rows = []
+    for movie in Movie.objects.filter(processing_status="ready").only(
+            "id", "created_at", "video_1080", "video_720", "video_480"):
+        for quality in ("1080", "720", "480"):
+            field = getattr(movie, f"video_{quality}")
+            if not field:
+                continue
+            rows.append({
+                "movie_id": movie.pk,
+                "quality": quality,
+                "name": field.name,
+                "bytes": _size(field),
+                "last_accessed_at": last.get((movie.pk, quality)) or movie.created_at,
+                "field": field,
+            })
+    return rows
+
+
+def evict_cold(budget_bytes: Optional[int] = None, dry_run: bool = False) -> List[dict]:
+    """
+    Delete least recently requested 1080p/720p files until all renditions fit into
+    `budget_bytes` (default RENDITION_STORAGE_BUDGET, 0 = no eviction). Renditions requested
+    within RENDITION_MIN_IDLE_DAYS and movies currently being processed are never touched.
+    Returns the evicted (or, with dry_run, the would-be evicted) renditions.
+    """
+    budget = int(budget_bytes if budget_bytes is not None else getattr(settings, "RENDITION_STORAGE_BUDGET", 0))
+    if budget <= 0:
+        return []
+    rows = rendition_usage()
+    total = sum(r["bytes"] for r in rows)
+    idle_since = timezone.now() - timedelta(days=int(getattr(settings, "RENDITION_MIN_IDLE_DAYS", 7)))
+    candidates = sorted(
+        (r for r in rows if r["quality"] in EVICTABLE and r["last_accessed_at"] < idle_since),
+        key=lambda r: r["last_accessed_at"],
+    )
+
+    evicted = []
+    for row in candidates:
+        if total <= budget:
+            break
+        if not dry_run and not _evict(row):
+            continue
+        total -= row["bytes"]
+        evicted.append({k: v for k, v in row.items() if k != "field"})
+    return evicted
+
+
+def _evict(row: dict) -> bool:
+    """Remove one rendition file and clear its field, unless the movie is locked by a job."""
+    field_name = f"video_{row['quality']}"
+    with maintenance_lock(row["movie_id"], timeout=60) as acquired:
+        if not acquired:
+            return False
+        # conditional: the file may have been replaced since we listed it
+        if not Movie.objects.filter(pk=row["movie_id"], **{field_name: row["name"]}).update(
+                **{field_name: ""}, updated_at=timezone.now()):
+            return False
+        row["field"].storage.delete(row["name"])
+        bump_catalog_version()  # the cached lists still link the deleted file
+        RenditionAccess.objects.update_or_create(
+            movie_id=row["movie_id"], quality=row["quality"], defaults={"evicted_at": timezone.now()})
+    return True
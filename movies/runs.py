@@ -0,0 +1,176 @@
+# movies/runs.py
+from __future__ import annotations
+
+import contextvars
+import socket
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional
+
+from django.db.models import Avg, Count, Max, Q, Sum
+from django.utils import timezone
+
+from .models import Movie, ProcessingRun, ProcessingStep
+
+# Run history of the transcode pipeline: `process_movie` opens a run, each pipeline step is
+# wrapped in `step(...)`, and every subprocess started through tasks._run reports its exit code,
+# argv and resource usage (from the watchdog's wait4) to the step that is currently active.
+# Without an active run all of this is a no-op (benchmarks, direct helper calls).
+
+
+@dataclass
+class _StepState:
+    name: str
+    started: float
+    cpu_s: float = 0.0
+    peak_rss_kb: Optional[int] = None
+    exit_code: Optional[int] = None
+    commands: List[list] = field(default_factory=list)
+
+
+@dataclass
+class _RunState:
+    movie_id: int
+    started: float
+    run: Optional[ProcessingRun] = None
+    cpu_s: float = 0.0
+    step: Optional[_StepState] = None
+
+
+_current: contextvars.ContextVar[Optional[_RunState]] = contextvars.ContextVar("processing_run", default=None)
+
+
+@contextmanager
+def processing_run(movie_id: int) -> Iterator[None]:
+    """
+    Scope of one pipeline execution. The ProcessingRun row is only created by `start()`,
+    i.e. once the pipeline actually has a source to work on; on exit it is closed with the
+    movie's resulting processing status (or 'failed' and the exception if one escaped).
+    """
+    state = _RunState(movie_id=movie_id, started=time.monotonic())
+    token = _current.set(state)
+    error = ""
+    try:
+        yield
+    except BaseException as e:
+        error = repr(e)
+        raise
+    finally:
+        _current.reset(token)
+        if state.run is not None:
+            status = Movie.objects.filter(pk=movie_id).values_list("processing_status", flat=True).first()
+            state.run.status = "failed" if error else (status or "failed")
+            state.run.error = error
+            state.run.finished_at = timezone.now()
+            state.run.wall_seconds = round(time.monotonic() - state.started, 3)
+            state.run.cpu_seconds = round(state.cpu_s, 3)
+            state.run.save(update_fields=["status", "error", "finished_at", "wall_seconds", "cpu_seconds"])
+
+
+def start(source_name: str) -> Optional[ProcessingRun]:
+    """Create the ProcessingRun row for the active run (no-op outside `processing_run`)."""
+    state = _current.get()
+    if state is None:
+        return None
+    state.run = ProcessingRun.objects.create(
+        movie_id=state.movie_id,
+        source_name=source_name,
+        worker_host=socket.gethostname(),
+        started_at=timezone.now(),
+    )
+    return state.run
+
+
+def _size(paths: Iterable[Optional[Path]]) -> Optional[int]:
+    existing = [p for p in paths if p and p.exists()]
+    return sum(p.stat().st_size for p in existing) if existing else None
+
+
+@contextmanager
+def step(name: str, outputs: Iterable[Optional[Path]] = ()) -> Iterator[None]:
+    """
+    Record one pipeline step. `outputs` are measured when the step ends (before the files
+    are moved into storage). An exception is recorded on the step and re-raised.
+    """
+    state = _current.get()
+    if state is None or state.run is None:
+        yield
+        return
+    current = _StepState(name=name, started=time.monotonic())
+    state.step = current
+    started_at = timezone.now()
+    error = ""
+    try:
+        yield
+    except Exception as e:
+        error = repr(e)[:4000]
+        raise
+    finally:
+        state.step = None
+        state.cpu_s += current.cpu_s
+        ProcessingStep.objects.create(
+            run=state.run,
+            name=name,
+            started_at=started_at,
+            finished_at=timezone.now(),
+            wall_seconds=round(time.monotonic() - current.started, 3),
+            cpu_seconds=round(current.cpu_s, 3),
+            peak_rss_kb=current.peak_rss_kb,
+            output_bytes=_size(outputs),
+            encoder_settings=current.commands,
+            exit_code=current.exit_code,
+            error=error,
+        )
+
+
+def note_subprocess(cmd: List[str], returncode: int, rusage=None) -> None:
+    """Attribute a finished subprocess to the active step (called by tasks._run)."""
+    state = _current.get()
+    current = state.step if state is not None else None
+    if current is None:
+        return
+    current.commands.append([str(c) for c in cmd])
+    current.exit_code = returncode  # last one wins: a fallback that succeeded leaves 0
+    if rusage is not None:
+        current.cpu_s += rusage.ru_utime + rusage.ru_stime
+        current.peak_rss_kb = max(current.peak_rss_kb or 0, rusage.ru_maxrss)
+
+
+def summary(since=None, movie_id: Optional[int] = None) -> dict:
+    """
+    Aggregate finished runs (optionally since a datetime / for one movie) per step name,
+    sorted by total wall time, so the step dominating the pipeline comes first.
+    """
+    run_qs = ProcessingRun.objects.exclude(finished_at=None)
+    if since is not None:
+        run_qs = run_qs.filter(started_at__gte=since)
+    if movie_id is not None:
+        run_qs = run_qs.filter(movie_id=movie_id)
+
+    runs_agg = run_qs.aggregate(
+        count=Count("id"),
+        failed=Count("id", filter=Q(status="failed")),
+        avg_wall_s=Avg("wall_seconds"),
+        avg_cpu_s=Avg("cpu_seconds"),
+    )
+    steps = list(
+        ProcessingStep.objects.filter(run__in=run_qs)
+        .values("name")
+        .annotate(
+            count=Count("id"),
+            failures=Count("id", filter=(Q(exit_code__isnull=False) & ~Q(exit_code=0)) | ~Q(error="")),
+            total_wall_s=Sum("wall_seconds"),
+            avg_wall_s=Avg("wall_seconds"),
+            max_wall_s=Max("wall_seconds"),
+            avg_cpu_s=Avg("cpu_seconds"),
+            max_peak_rss_kb=Max("peak_rss_kb"),
+            avg_output_bytes=Avg("output_bytes"),
+        )
+        .order_by("-total_wall_s")
+    )
+    total = sum(s["total_wall_s"] or 0 for s in steps)
+    for s in steps:
+        s["share"] = round((s["total_wall_s"] or 0) / total, 4) if total else None
+    return {"runs": runs_agg, "steps": steps}
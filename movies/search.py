@@ -0,0 +1,92 @@
+# movies/search.py
+from __future__ import annotations
+
+import re
+from typing import Tuple
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db import connections
+from django.db.models import F, FloatField, Q, QuerySet
+from django.db.models.functions import Cast
+
+from .models import Movie
+
+# Movie search on PostgreSQL: `search_vector` (title weighted A, description B) is kept up to
+# date by a trigger and GIN-indexed; a pg_trgm GIN index on the title catches typos. Matches are
+# ranked by full-text rank + title similarity. Indexes, trigger and extension are not model
+# Meta (GIN / gin_trgm_ops don't exist elsewhere): they are installed by the migrate signals
+# below. Any other database (the SQLite test settings) falls back to icontains, newest first.
+
+SEARCH_VECTOR_TRIGGER = "movies_movie_search_vector"
+SEARCH_VECTOR_INDEX = "movie_search_vector_gin"
+TITLE_TRGM_INDEX = "movie_title_trgm_gin"
+
+
+def search_config() -> str:
+    """Text search configuration ('simple', 'german', ...), validated as it is spliced into SQL."""
+    config = str(getattr(settings, "SEARCH_CONFIG", "simple"))
+    if not re.fullmatch(r"[a-z_]+", config):
+        raise ValueError(f"Invalid SEARCH_CONFIG '{config}'.")
+    return config
+
+
+def is_postgres(using: str = "default") -> bool:
+    return connections[using].vendor == "postgresql"
+
+
+def search_movies(qs: QuerySet, q: str) -> Tuple[QuerySet, str]:
+    """
+    Restrict `qs` to movies matching `q`. Returns the queryset and the field to page it by
+    (descending): 'rank' on PostgreSQL, 'created_at' on the fallback.
+    """
+    q = (q or "").strip()
+    if not q:
+        return qs, "created_at"
+    if not is_postgres(qs.db):
+        return qs.filter(Q(title__icontains=q) | Q(description__icontains=q)), "created_at"
+
+    query = SearchQuery(q, config=search_config(), search_type="websearch")
+    threshold = float(getattr(settings, "SEARCH_TRIGRAM_THRESHOLD", 0.3))
+    qs = qs.annotate(similarity=TrigramSimilarity("title", q)).filter(
+        Q(search_vector=query) | Q(similarity__gt=threshold))
+    # ts_rank and similarity are float4; as double precision the value survives the JSON
+    # cursor round trip exactly, so `rank = cursor` still matches rows tied on rank
+    rank = Cast(SearchRank(F("search_vector"), query) + F("similarity"), FloatField())
+    return qs.annotate(rank=rank), "rank"
+
+
+def create_extensions(sender, using="default", **kwargs) -> None:
+    """pre_migrate: pg_trgm has to exist before anything uses gin_trgm_ops."""
+    if not is_postgres(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+
+def install_search(sender, using="default", **kwargs) -> None:
+    """post_migrate: (re)create the search_vector trigger and the GIN indexes, fill missing vectors."""
+    if not is_postgres(using):
+        return
+    connection = connections[using]
+    table = connection.ops.quote_name(Movie._meta.db_table)
+    config = search_config()
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            CREATE OR REPLACE FUNCTION {SEARCH_VECTOR_TRIGGER}_update() RETURNS trigger AS $$
+            BEGIN
+                NEW.search_vector :=
+                    setweight(to_tsvector('{config}', coalesce(NEW.title, '')), 'A') ||
+                    setweight(to_tsvector('{config}', coalesce(NEW.description, '')), 'B');
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql""")
+        cursor.execute(f"DROP TRIGGER IF EXISTS {SEARCH_VECTOR_TRIGGER} ON {table}")
+        # Model.save() writes title too, so the vector is recomputed; .update(status=...) skips it
+        cursor.execute(f"""
+            CREATE TRIGGER {SEARCH_VECTOR_TRIGGER}
+            BEFORE INSERT OR UPDATE OF title, description ON {table}
+            FOR EACH ROW EXECUTE FUNCTION {SEARCH_VECTOR_TRIGGER}_update()""")
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {SEARCH_VECTOR_INDEX} ON {table} USING gin (search_vector)")
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {TITLE_TRGM_INDEX} ON {table} USING gin (title gin_trgm_ops)")
+        cursor.execute(f"UPDATE {table} SET title = title WHERE search_vector IS NULL")
@@ -1,8 +1,9 @@
 from rest_framework import serializers
 from django.urls import reverse
 from django.conf import settings
+from django.utils.encoding import iri_to_uri
 from urllib.parse import urljoin
-from .models import Favorite, Genre, Movie
+from .models import Favorite, Genre, Movie, UploadSession
 
 
 class GenreSerializer(serializers.ModelSerializer):
@@ -89,3 +90,148 @@ class MovieSerializer(serializers.ModelSerializer):
 
         # Fallback (one more request in the db
         return Favorite.objects.filter(user=user, movie_id=obj.id).exists()
+
+
+class MovieValuesSerializer:
+    """
+    List-mode twin of MovieSerializer: works on `.values(*self.columns)` rows instead of model
+    instances and builds the endpoint URLs from templates computed once per request
+    (no reverse() / build_absolute_uri per field). Like MovieSerializer, an endpoint is only
+    reversed once a row has that file. Emits exactly MovieSerializer's JSON, restricted to
+    `fields` (default: all).
+    """
+    COLUMNS = (
+        "id", "title", "description", "logo", "hero_image", "thumbnail_image", "teaser_video",
+        "video_1080", "video_720", "video_480", "duration_seconds", "processing_status",
+        "is_hero", "genre_id", "created_at",
+    )
+    ENDPOINTS = {
+        "logo": "logo",
+        "hero_image": "hero-image",
+        "thumbnail_image": "thumbnail",
+        "teaser_video": "teaser-stream",
+    }
+    PK_PLACEHOLDER = 918273645
+
+    def __init__(self, request=None, favorite_ids=None, fields=None):
+        self.request = request
+        self.favorite_ids = favorite_ids
+        self.fields = tuple(f for f in MOVIE_FIELDS if f in (fields or MOVIE_FIELDS))
+        # only what the fields need: a slim list never reads description or the video paths
+        self.columns = tuple(dict.fromkeys(c for f in ("id", *self.fields) for c in FIELD_COLUMNS.get(f, (f,))))
+        user = getattr(request, "user", None)
+        self.authenticated = bool(user and user.is_authenticated)
+        self.templates = {}
+        self.storage = {name: Movie._meta.get_field(name).storage for name in ("video_1080", "video_720", "video_480")}
+        self.created_at = serializers.DateTimeField()
+        self.origin = request.build_absolute_uri("/")[:-1] if request is not None else None
+
+    def _template(self, field: str):
+        """(prefix, suffix) around the pk of MovieSerializer._abs() for this field's endpoint."""
+        if field not in self.templates:
+            url = MovieSerializer()._abs(self.request, self.ENDPOINTS[field], self.PK_PLACEHOLDER)
+            prefix, _, suffix = url.partition(str(self.PK_PLACEHOLDER))
+            self.templates[field] = prefix, suffix
+        return self.templates[field]
+
+    def _file_url(self, field: str, name):
+        if not name:
+            return None
+        url = self.storage[field].url(name)
+        if self.request is None:
+            return url
+        if url.startswith("/") and not url.startswith("//"):
+            return iri_to_uri(self.origin + url)  # what build_absolute_uri does for these
+        return self.request.build_absolute_uri(url)
+
+    def to_representation(self, row: dict) -> dict:
+        pk = row["id"]
+        data = {}
+        for field in self.fields:
+            if field in self.ENDPOINTS:
+                if row[field]:
+                    prefix, suffix = self._template(field)
+                    data[field] = f"{prefix}{pk}{suffix}"
+                else:
+                    data[field] = None
+            elif field in self.storage:
+                data[field] = self._file_url(field, row[field])
+            elif field == "genre":
+                data[field] = row["genre_id"]
+            elif field == "created_at":
+                data[field] = self.created_at.to_representation(row["created_at"])
+            elif field == "is_favorite":
+                data[field] = self._is_favorite(pk)
+            else:
+                data[field] = row[field]
+        return data
+
+    def _is_favorite(self, pk: int) -> bool:
+        if not self.authenticated:
+            return False
+        if self.favorite_ids is not None:
+            return pk in self.favorite_ids
+        return Favorite.objects.filter(user=self.request.user, movie_id=pk).exists()
+
+    def serialize(self, rows) -> list:
+        return [self.to_representation(row) for row in rows]
+
+
+MOVIE_FIELDS = MovieSerializer.Meta.fields
+# default shape of list items (grids): no description, no rendition URLs, no status (always ready)
+MOVIE_LIST_FIELDS = (
+    "id", "title", "logo", "hero_image", "thumbnail_image", "teaser_video",
+    "duration_seconds", "is_hero", "genre", "created_at", "is_favorite",
+)
+FIELD_COLUMNS = {"genre": ("genre_id",), "is_favorite": ()}
+
+
+def sparse_fields(request, default=MOVIE_FIELDS) -> tuple:
+    """
+    Movie fields to return: `?fields=a,b` (replaces the default) and/or `?omit=c`, in
+    MovieSerializer order. `id` is always kept. Unknown names are a 400.
+    """
+    def names(param):
+        raw = request.query_params.get(param) if request is not None else None
+        if raw is None:
+            return None
+        wanted = [n.strip() for n in raw.split(",") if n.strip()]
+        unknown = sorted(set(wanted) - set(MOVIE_FIELDS))
+        if unknown:
+            raise serializers.ValidationError({param: f"Unknown field(s): {', '.join(unknown)}."})
+        return set(wanted)
+
+    fields = names("fields")
+    chosen = set(default) if fields is None else fields
+    chosen -= names("omit") or set()
+    chosen.add("id")
+    return tuple(f for f in MOVIE_FIELDS if f in chosen)
+
+
+def project(items, fields) -> list:
+    """Movie dicts cut down to `fields`."""
+    return [{f: item[f] for f in fields if f in item} for item in items]
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    """Serializer for resumable source uploads. Client sends movie, filename and total length."""
+    completed = serializers.BooleanField(source="is_complete", read_only=True)
+
+    class Meta:
+        model = UploadSession
+        fields = ("id", "movie", "filename", "length", "offset", "sha256", "completed", "error", "created_at")
+        read_only_fields = ("id", "offset", "sha256", "completed", "error", "created_at")
+
+    def validate_length(self, value):
+        max_size = getattr(settings, "UPLOAD_MAX_SIZE", None)
+        if value <= 0:
+            raise serializers.ValidationError("Length must be positive.")
+        if max_size and value > max_size:
+            raise serializers.ValidationError(f"Uploads are limited to {max_size} bytes.")
+        return value
+
+    def validate_filename(self, value):
+        name = value.replace("\\", "/").rsplit("/", 1)[-1].strip()
+        if not name or name in (".", ".."):
+            raise serializers.ValidationError("Invalid filename.")
+        return name
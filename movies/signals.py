@@ -1,20 +1,36 @@
-import django_rq
-from django.db.models.signals import post_save, post_delete
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
-from .models import Movie
+from .models import Genre, Movie
 from .file_utils import delete_many_file_fields
+from .processing import enqueue_processing, status_changed
+from . import heroes, suggest
+from .catalog import bump_catalog_version
+
+
+@receiver(pre_save, sender=Movie)
+def remember_source_change(sender, instance: Movie, **kwargs):
+    """Flag the instance when its source video differs from the stored one."""
+    if not instance.pk:
+        instance._source_changed = bool(instance.video_file)
+        return
+    update_fields = kwargs.get("update_fields")
+    if update_fields is not None and "video_file" not in update_fields:
+        instance._source_changed = False
+        return
+    previous = Movie.objects.filter(pk=instance.pk).values_list("video_file", flat=True).first()
+    instance._source_changed = (previous or "") != (instance.video_file.name or "")
 
 
 @receiver(post_save, sender=Movie)
 def enqueue_transcode(sender, instance, created, **kwargs):
-    """Start video transcoding job when a new movie is created or missing transcoded files."""
+    """Start video transcoding only when a movie gets a new or replaced source file.
+    Saves from the pipeline itself or plain metadata edits never enqueue a job."""
     if not instance.video_file:
         return
-    if created or not (instance.video_1080 and instance.video_720 and instance.video_480):
-        queue = django_rq.get_queue("default")
-        job_id = f"movie-{instance.pk}-transcode"
-        if not queue.fetch_job(job_id):
-            queue.enqueue("movies.tasks.process_movie", instance.pk, job_id=job_id)
+    if created or getattr(instance, "_source_changed", False):
+        instance._source_changed = False
+        enqueue_processing(instance)
 
 
 @receiver(post_delete, sender=Movie)
@@ -33,3 +49,61 @@ def delete_files_on_movie_delete(sender, instance: Movie, **kwargs):
             "logo",
         ],
     )
+
+
+@receiver(post_save, sender=Movie)
+def update_suggest_index(sender, instance: Movie, **kwargs):
+    """Keep the typeahead index in line with title edits and saved status changes."""
+    update_fields = kwargs.get("update_fields")
+    if update_fields is not None and not {"title", "processing_status"} & set(update_fields):
+        return
+    transaction.on_commit(lambda: suggest.index_movie_id(instance.pk))
+
+
+@receiver(status_changed, sender=Movie)
+def update_suggest_index_on_status(sender, movie_id: int, status: str, **kwargs):
+    """Movies enter the typeahead index when they become ready and leave it on reprocess."""
+    if status == "ready":
+        transaction.on_commit(lambda: suggest.index_movie_id(movie_id))
+    else:
+        transaction.on_commit(lambda: suggest.remove_movie(movie_id))
+
+
+@receiver(post_delete, sender=Movie)
+def remove_from_suggest_index(sender, instance: Movie, **kwargs):
+    movie_id = instance.pk
+    transaction.on_commit(lambda: suggest.remove_movie(movie_id))
+
+
+@receiver(post_save, sender=Movie)
+@receiver(post_delete, sender=Movie)
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def invalidate_catalog(sender, **kwargs):
+    """Any movie or genre change makes the cached catalog payloads stale (once it is committed)."""
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(status_changed, sender=Movie)
+def invalidate_catalog_on_status(sender, **kwargs):
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(post_save, sender=Movie)
+def update_hero_pool(sender, instance: Movie, **kwargs):
+    """Keep the random hero pool in line with is_hero and saved status changes."""
+    update_fields = kwargs.get("update_fields")
+    if update_fields is not None and not {"is_hero", "processing_status"} & set(update_fields):
+        return
+    transaction.on_commit(lambda: heroes.sync_movie(instance.pk))
+
+
+@receiver(status_changed, sender=Movie)
+def update_hero_pool_on_status(sender, movie_id: int, **kwargs):
+    transaction.on_commit(lambda: heroes.sync_movie(movie_id))
+
+
+@receiver(post_delete, sender=Movie)
+def remove_from_hero_pool(sender, instance: Movie, **kwargs):
+    movie_id = instance.pk
+    transaction.on_commit(lambda: heroes.remove_movie(movie_id))
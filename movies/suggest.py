@@ -0,0 +1,129 @@
+# movies/suggest.py
+from __future__ import annotations
+
+import json
+import re
+import unicodedata
+from typing import Iterable, List, Optional
+
+from django.conf import settings
+from redis.exceptions import RedisError
+
+from .models import Movie
+from .redis_client import get_redis
+
+# Typeahead index in Redis, so search-as-you-type never touches the database:
+#   <prefix>:p:<text>  sorted set of movie ids whose normalized title has a word sequence
+#                      starting with <text> ("stranger things" -> "s", "st", ... "things", "th", ...)
+#   <prefix>:titles    hash movie id -> {"id", "title"} (what the endpoint returns, and the
+#                      old title to unindex on rename)
+# Scores are the movie's created_at timestamp (newest first). Only ready movies are indexed;
+# movies.signals keeps the index current. Without Redis (LocMemCache in tests) every write is
+# a no-op and lookups fall back to a title prefix query.
+
+MAX_PREFIX_LENGTH = 20
+
+
+def _key(*parts) -> str:
+    return ":".join([getattr(settings, "SUGGEST_KEY_PREFIX", "videoflix:movies:suggest"), *map(str, parts)])
+
+
+def normalize(text: str) -> str:
+    """'Amélie – Die fabelhafte Welt!' -> 'amelie die fabelhafte welt'."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c)).casefold()
+    return " ".join(re.findall(r"\w+", text))
+
+
+def prefixes(title: str) -> set:
+    """Edge n-grams of every word-suffix of the normalized title, up to MAX_PREFIX_LENGTH chars."""
+    words = normalize(title).split()
+    result = set()
+    for i in range(len(words)):
+        phrase = " ".join(words[i:])[:MAX_PREFIX_LENGTH]
+        result.update(phrase[:n].rstrip() for n in range(1, len(phrase) + 1))
+    return result
+
+
+def index_movie(movie: Movie) -> bool:
+    """Add or refresh a ready movie in the index (removes it if it isn't ready). False without Redis."""
+    if movie.processing_status != "ready":
+        return remove_movie(movie.pk)
+    client = get_redis()
+    if client is None:
+        return False
+    try:
+        previous = client.hget(_key("titles"), movie.pk)
+        old = prefixes(json.loads(previous)["title"]) if previous else set()
+        new = prefixes(movie.title)
+        score = movie.created_at.timestamp() if movie.created_at else 0
+        pipe = client.pipeline(transaction=False)
+        for text in old - new:
+            pipe.zrem(_key("p", text), movie.pk)
+        for text in new:
+            pipe.zadd(_key("p", text), {movie.pk: score})
+        pipe.hset(_key("titles"), movie.pk, json.dumps({"id": movie.pk, "title": movie.title}))
+        pipe.execute()
+    except RedisError:
+        return False
+    return True
+
+
+def remove_movie(movie_id: int) -> bool:
+    """Drop a movie from the index. False without Redis."""
+    client = get_redis()
+    if client is None:
+        return False
+    try:
+        previous = client.hget(_key("titles"), movie_id)
+        if not previous:
+            return True
+        pipe = client.pipeline(transaction=False)
+        for text in prefixes(json.loads(previous)["title"]):
+            pipe.zrem(_key("p", text), movie_id)
+        pipe.hdel(_key("titles"), movie_id)
+        pipe.execute()
+    except RedisError:
+        return False
+    return True
+
+
+def index_movie_id(movie_id: int) -> bool:
+    movie = Movie.objects.filter(pk=movie_id).only("id", "title", "processing_status", "created_at").first()
+    return index_movie(movie) if movie else remove_movie(movie_id)
+
+
+def rebuild(movies: Optional[Iterable[Movie]] = None) -> int:
+    """(Re)index all ready movies, dropping stale entries. Returns the number indexed."""
+    client = get_redis()
+    if client is None:
+        return 0
+    if movies is None:
+        movies = Movie.objects.filter(processing_status="ready").only("id", "title", "processing_status", "created_at")
+    movies = list(movies)
+    keep = {str(m.pk) for m in movies}
+    for movie_id in client.hkeys(_key("titles")):
+        if movie_id.decode() not in keep:
+            remove_movie(int(movie_id))
+    return sum(index_movie(m) for m in movies)
+
+
+def suggest(query: str, limit: int = 10) -> List[dict]:
+    """Up to `limit` {"id", "title"} whose title has a word sequence starting with `query`, newest first."""
+    text = normalize(query)[:MAX_PREFIX_LENGTH].rstrip()
+    if not text:
+        return []
+    client = get_redis()
+    if client is None:
+        return _suggest_from_db(query, limit)
+    try:
+        ids = client.zrevrange(_key("p", text), 0, limit - 1)
+        rows = client.hmget(_key("titles"), ids) if ids else []
+    except RedisError:
+        return _suggest_from_db(query, limit)
+    return [json.loads(row) for row in rows if row]
+
+
+def _suggest_from_db(query: str, limit: int) -> List[dict]:
+    qs = Movie.objects.filter(processing_status="ready", title__istartswith=query.strip()).order_by("-created_at")
+    return list(qs.values("id", "title")[:limit])
@@ -1,19 +1,24 @@
 # movies/tasks.py
 from __future__ import annotations
 
+import json
 import subprocess
 from pathlib import Path
 from typing import Optional, List
 
 from django.conf import settings
-from django.core.files import File
-from django.db import transaction
+from django.utils import timezone
 
-from .models import Movie
+from . import failures, governance, mediainfo, renditions, runs, uploads, watchdog
+from .file_utils import save_tmp_to_field
+from .models import Movie, UploadSession
+from .processing import enqueue_processing, maintenance_lock, movie_lock, status_changed, transition
 
 # Binaries must be available in the container PATH
 FFMPEG = "ffmpeg"
 FFPROBE = "ffprobe"
+# ffprobe only reads headers / a few packets; anything slower is a broken input
+PROBE_TIMEOUT = 60
 
 
 # -----------------------------
@@ -22,14 +27,24 @@ FFPROBE = "ffprobe"
 
 def _run(cmd: list[str]) -> None:
     """
-    Run a subprocess and raise with captured stderr on non-zero exit.
+    Run a pipeline subprocess under the configured resource limits (see movies.governance)
+    and the stall/timeout watchdog (see movies.watchdog); raise with captured stderr on
+    non-zero exit. A stalled or timed-out process is killed and raises StalledProcessError.
+    Exit code, argv and resource usage are recorded on the current run step (movies.runs).
     """
-    proc = subprocess.run(
-        cmd, check=False, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
-    )
-    if proc.returncode != 0:
+    governance.wait_for_capacity()
+    try:
+        result = watchdog.run_supervised(
+            governance.governed_command(watchdog.with_progress(cmd)),
+            on_start=governance.attach_to_cgroup,
+        )
+    except watchdog.StalledProcessError as e:
+        runs.note_subprocess(cmd, e.returncode)
+        raise
+    runs.note_subprocess(cmd, result.returncode, result.rusage)
+    if result.returncode != 0:
         raise subprocess.CalledProcessError(
-            proc.returncode, cmd, output=proc.stdout, stderr=proc.stderr
+            result.returncode, cmd, output=result.stdout, stderr=result.stderr
         )
 
 
@@ -45,40 +60,102 @@ def _probe_duration(src: Path) -> Optional[int]:
             "-of", "default=nw=1:nk=1",
             str(src),
         ]
-        proc = subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        proc = subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                              timeout=PROBE_TIMEOUT)
         return int(float(proc.stdout.strip()))
     except Exception:
         return None
 
 
-def _transcode(src: Path, out_tmp: Path, height: int) -> None:
+def _probe_audio_codec(src: Path) -> Optional[str]:
+    """
+    Return the codec name of the first audio stream, or None if there is none / unknown.
+    """
+    try:
+        cmd = [
+            FFPROBE,
+            "-v", "error",
+            "-select_streams", "a:0",
+            "-show_entries", "stream=codec_name",
+            "-of", "default=nw=1:nk=1",
+            str(src),
+        ]
+        proc = subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                              timeout=PROBE_TIMEOUT)
+        return proc.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def _extract_audio(src: Path, out_tmp: Path) -> bool:
+    """
+    Produce the one shared AAC track (M4A) that gets muxed into every rendition.
+    AAC sources are stream-copied, anything else is encoded once to AAC 128k.
+    Returns False if the source has no audio.
+    """
+    codec = _probe_audio_codec(src)
+    if codec is None:
+        return False
+    out_tmp.parent.mkdir(parents=True, exist_ok=True)
+    audio_args = ["-c:a", "copy"] if codec == "aac" else ["-c:a", "aac", "-b:a", "128k"]
+    cmd = [
+        FFMPEG, "-y", "-hide_banner", "-loglevel", "error",
+        "-i", str(src),
+        "-map", "0:a:0", "-vn",
+        *audio_args,
+        str(out_tmp),
+    ]
+    _run(cmd)
+    return True
+
+
+def _safe_extract_audio(src: Path, out_tmp: Path) -> Optional[Path]:
+    """
+    Shared audio track or None; on failure the renditions fall back to encoding audio themselves.
+    """
+    try:
+        return out_tmp if _extract_audio(src, out_tmp) else None
+    except Exception:
+        return None
+
+
+def _transcode(src: Path, out_tmp: Path, height: int, audio: Optional[Path] = None) -> None:
     """
     Transcode to MP4 (H.264/AAC), fixed height, keep aspect ratio (no padding),
     even width, normalized SAR. Use a temp path (`out_tmp`).
+    With `audio` (see `_extract_audio`) only video is encoded and the shared AAC track is muxed in.
     """
     out_tmp.parent.mkdir(parents=True, exist_ok=True)
     # Robust: compute even width from output height (oh) & aspect (a)
     vf = f"scale=trunc(oh*a/2)*2:{height},setsar=1"
+    if audio is not None:
+        inputs = ["-i", str(src), "-i", str(audio)]
+        maps = ["-map", "0:v:0", "-map", "1:a:0"]
+        audio_args = ["-c:a", "copy"]
+    else:
+        inputs = ["-i", str(src)]
+        maps = ["-map", "0:v:0", "-map", "0:a?"]
+        audio_args = ["-c:a", "aac", "-b:a", "128k"]
     cmd = [
         FFMPEG, "-y", "-hide_banner", "-loglevel", "error",
-        "-i", str(src),
-        "-map", "0:v:0", "-map", "0:a?",
+        *inputs,
+        *maps,
         "-c:v", "libx264", "-preset", "veryfast", "-crf", "21",
         "-vf", vf,
         "-pix_fmt", "yuv420p",
-        "-c:a", "aac", "-b:a", "128k",
+        *audio_args,
         "-movflags", "+faststart",
         str(out_tmp),
     ]
     _run(cmd)
 
 
-def _safe_transcode(src: Path, out_tmp: Path, height: int, errors: List[str]) -> bool:
+def _safe_transcode(src: Path, out_tmp: Path, height: int, errors: List[str], audio: Optional[Path] = None) -> bool:
     """
     Transcode a single variant; collect readable error instead of raising.
     """
     try:
-        _transcode(src, out_tmp, height)
+        _transcode(src, out_tmp, height, audio=audio)
         return True
     except subprocess.CalledProcessError as e:
         msg = f"[{height}p] rc={e.returncode} err={(e.stderr or '').strip()[:4000]}"
@@ -106,152 +183,353 @@ def _frame_to_image(src: Path, out_tmp: Path, w: int, h: int, ss: int) -> None:
     _run(cmd)
 
 
-def _cut_teaser(src: Path, out_tmp: Path, start: int, duration: int, w: int = 1280, h: int = 720) -> None:
+def _cut_teaser(src: Path, out_tmp: Path, start: int, duration: int, w: int = 1280, h: int = 720,
+                audio: Optional[Path] = None) -> None:
     """
     Cut a short teaser MP4 (H.264/AAC) from `start` with given `duration`, scaled+letterboxed to (w,h).
+    With `audio` the shared AAC track is stream-copied instead of re-encoded.
     """
     out_tmp.parent.mkdir(parents=True, exist_ok=True)
     vf = f"scale=w={w}:h={h}:force_original_aspect_ratio=decrease,pad={w}:{h}:(ow-iw)/2:(oh-ih)/2"
+    if audio is not None:
+        inputs = ["-ss", str(start), "-i", str(src), "-ss", str(start), "-i", str(audio)]
+        maps = ["-map", "0:v:0", "-map", "1:a:0"]
+        audio_args = ["-c:a", "copy"]
+    else:
+        inputs = ["-ss", str(start), "-i", str(src)]
+        maps = ["-map", "0:v:0", "-map", "0:a?"]
+        audio_args = ["-c:a", "aac", "-b:a", "128k"]
     cmd = [
         FFMPEG, "-y", "-hide_banner", "-loglevel", "error",
-        "-ss", str(start), "-i", str(src),
+        *inputs,
         "-t", str(duration),
-        "-map", "0:v:0", "-map", "0:a?",
+        *maps,
         "-c:v", "libx264", "-preset", "veryfast", "-crf", "22",
         "-vf", vf,
         "-pix_fmt", "yuv420p",
-        "-c:a", "aac", "-b:a", "128k",
+        *audio_args,
         "-movflags", "+faststart",
         str(out_tmp),
     ]
     _run(cmd)
 
 
-def _save_tmp_to_field(field, tmp_path: Path, final_rel_name: str) -> None:
+def _probe_video_stream(src: Path) -> Optional[dict]:
+    """
+    Return codec_name/width/height of the first video stream, or None if unknown.
+    """
+    try:
+        cmd = [
+            FFPROBE,
+            "-v", "error",
+            "-select_streams", "v:0",
+            "-show_entries", "stream=codec_name,width,height",
+            "-of", "json",
+            str(src),
+        ]
+        proc = subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                              timeout=PROBE_TIMEOUT)
+        streams = json.loads(proc.stdout or "{}").get("streams") or []
+        return streams[0] if streams else None
+    except Exception:
+        return None
+
+
+def _nearest_keyframe(src: Path, around: float, window: int = 10) -> Optional[float]:
     """
-    Store a temp file into the FileField's storage under `final_rel_name`, then remove the temp file.
-    Ensures no duplicate/suffixed filenames by deleting any pre-existing final file first.
+    Timestamp (seconds) of the keyframe closest to `around`, looking `window` seconds each way.
+    Only the packets in that interval are read, not the whole file.
     """
-    storage = field.storage
-    if storage.exists(final_rel_name):
-        storage.delete(final_rel_name)
-    with open(tmp_path, "rb") as fh:
-        field.save(final_rel_name, File(fh), save=False)
     try:
-        tmp_path.unlink()
+        start = max(0.0, around - window)
+        cmd = [
+            FFPROBE,
+            "-v", "error",
+            "-select_streams", "v:0",
+            "-skip_frame", "nokey",
+            "-read_intervals", f"{start}%{around + window}",
+            "-show_entries", "frame=pts_time",
+            "-of", "csv=p=0",
+            str(src),
+        ]
+        proc = subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                              timeout=PROBE_TIMEOUT)
+        times = [float(line.strip().rstrip(",")) for line in proc.stdout.splitlines() if line.strip()]
+        return min(times, key=lambda t: abs(t - around)) if times else None
     except Exception:
-        pass
+        return None
+
+
+def _copy_teaser(src: Path, out_tmp: Path, start: float, duration: int) -> None:
+    """
+    Extract a teaser by stream copy (no decode/encode). `start` should be a keyframe of `src`.
+    """
+    out_tmp.parent.mkdir(parents=True, exist_ok=True)
+    cmd = [
+        FFMPEG, "-y", "-hide_banner", "-loglevel", "error",
+        "-ss", f"{start:.3f}", "-i", str(src),
+        "-t", str(duration),
+        "-map", "0:v:0", "-map", "0:a?",
+        "-c", "copy",
+        "-avoid_negative_ts", "make_zero",
+        "-movflags", "+faststart",
+        str(out_tmp),
+    ]
+    _run(cmd)
+
+
+def _can_copy_teaser(src: Optional[Path], w: int, h: int) -> bool:
+    """
+    A rendition can be cut by stream copy if it is already H.264 at exactly (w,h),
+    i.e. what `_cut_teaser` would produce without any letterboxing.
+    """
+    if src is None or not src.exists():
+        return False
+    stream = _probe_video_stream(src)
+    return bool(stream) and stream.get("codec_name") == "h264" and (stream.get("width"), stream.get("height")) == (w, h)
+
+
+def _build_teaser(rendition: Optional[Path], fallback_src: Path, out_tmp: Path, start: int, duration: int,
+                  audio: Optional[Path] = None, w: int = 1280, h: int = 720) -> None:
+    """
+    Teaser from the 720p rendition by keyframe-snapped stream copy (TEASER_MODE "copy", default),
+    re-encoding via `_cut_teaser` only if the rendition doesn't match codec/size or copying fails.
+    """
+    mode = getattr(settings, "TEASER_MODE", "copy")
+    if mode == "copy" and _can_copy_teaser(rendition, w, h):
+        snapped = _nearest_keyframe(rendition, float(start))
+        try:
+            _copy_teaser(rendition, out_tmp, snapped if snapped is not None else float(start), duration)
+            return
+        except Exception:
+            pass
+    _cut_teaser(fallback_src, out_tmp, start, duration=duration, w=w, h=h, audio=audio)
+
+
+def _scratch_dir() -> Path:
+    """
+    Directory for in-progress ffmpeg outputs (TRANSCODE_SCRATCH_DIR, default MEDIA_ROOT/tmp).
+    Put it on fast local disk; on the same filesystem as MEDIA_ROOT outputs are promoted
+    into storage by rename instead of a copy.
+    """
+    configured = getattr(settings, "TRANSCODE_SCRATCH_DIR", None)
+    scratch = Path(configured) if configured else Path(settings.MEDIA_ROOT) / "tmp"
+    scratch.mkdir(parents=True, exist_ok=True)
+    return scratch
 
 
 # -----------------------------
 # Main task entry
 # -----------------------------
 
-def process_movie(movie_id: int) -> None:
+def process_movie(movie_id: int, attempt: int = 0) -> None:
+    """
+    Queue task. Holds the per-movie lock for the whole run, so a second job for the
+    same movie (double click, replaced source) returns immediately instead of encoding
+    the same title twice. A source replaced while we were encoding is re-queued at the end.
+    A failed run is classified (movies.failures): transient failures are retried with
+    backoff (`attempt` counts the retries), permanent ones end up as a DeadLetter.
+    """
+    crash: Optional[BaseException] = None
+    with movie_lock(movie_id) as acquired, watchdog.media_duration(None):
+        if not acquired:
+            return
+        try:
+            with runs.processing_run(movie_id):
+                source_name = _process_movie_locked(movie_id)
+        except Exception as e:
+            crash = e
+            # unconditional (a published movie may crash too, and ready -> failed is no transition),
+            # so the signal is sent here: suggest index, catalog cache and hero pool drop the movie
+            Movie.objects.filter(pk=movie_id).update(
+                processing_status="failed", processing_error=f"[run] unexpected: {e!r}"[:8000],
+                updated_at=timezone.now())
+            status_changed.send(sender=Movie, movie_id=movie_id, status="failed")
+
+    # retries are scheduled after the lock is released, so they can't bounce off it
+    if crash is not None:
+        failures.handle_failure(movie_id, attempt, *failures.classify_exception(crash))
+        return
+    if source_name is None:
+        return
+    movie = Movie.objects.filter(pk=movie_id).first()
+    # a replaced source, or a reprocess request whose job bounced off our lock, runs again
+    if movie and movie.video_file and (movie.video_file.name != source_name or movie.processing_status == "queued"):
+        enqueue_processing(movie, force=True)
+    elif movie and movie.processing_status == "failed":
+        failures.handle_failure(movie_id, attempt, *failures.classify_text(movie.processing_error or ""))
+
+
+def regenerate_rendition(movie_id: int, height: int) -> None:
+    """
+    High-priority queue task: re-encode a rendition removed by LRU eviction (see
+    movies.renditions). Skips if the full pipeline holds the movie (it produces all
+    renditions anyway) or the rendition is already back. A transcode job that bounced off
+    the lock meanwhile is enqueued again afterwards (see processing.maintenance_lock).
+    """
+    quality = str(height)
+    restored = False
+    try:
+        with maintenance_lock(movie_id) as acquired, watchdog.media_duration(None):
+            if not acquired:
+                return
+            movie = Movie.objects.filter(pk=movie_id, processing_status="ready").first()
+            if not movie or not movie.video_file:
+                return
+            field_name = f"video_{height}"
+            if getattr(movie, field_name):
+                restored = True
+                return
+            watchdog.set_media_duration(movie.duration_seconds)
+            rel = f"movie_{movie.id}.{height}.mp4"
+            tmp = _scratch_dir() / rel
+            errors: List[str] = []
+            if _safe_transcode(Path(movie.video_file.path), tmp, height, errors) and tmp.exists():
+                field = getattr(movie, field_name)
+                save_tmp_to_field(field, tmp, rel)
+                movie.save(update_fields=[field_name])
+                mediainfo.record(movie, quality, Path(field.path), field.name)
+                restored = True
+    finally:
+        renditions.regeneration_done(movie_id, quality, restored)
+
+
+def finish_upload(session_id) -> None:
+    """
+    High-priority queue task: hash, probe and attach a fully received upload (see
+    movies.uploads.finish), so the last chunk's request doesn't read the whole file.
+    """
+    session = UploadSession.objects.select_related("movie").filter(pk=session_id).first()
+    if session is None or not uploads.is_finishing(session):
+        return  # aborted, or already finished by an earlier run of this job
+    uploads.finish(session)
+
+
+def _process_movie_locked(movie_id: int) -> Optional[str]:
     """
-    Queue task:
-      1 mark movie as 'processing'
-      2 transcode MP4 variants (1080/720/480) to temp files, then save into FileFields
-      3 set duration if available
-      4 build assets: thumbnail (640x360), hero (1280x720), teaser (~8s)
-      5 mark 'ready' if any variant succeeded, else 'failed'; persist error summary
+    Pipeline body, runs under the movie lock. Ordered for time-to-first-playable:
+      1 mark movie as 'processing', probe duration, extract the shared audio track
+      2 transcode 480p and save it, render the thumbnail (640x360)
+      3 publish: mark 'ready' as soon as one rendition exists (the movie is playable now)
+      4 transcode 720p, then 1080p, saving each as soon as it is done
+      5 build the remaining assets: hero (1280x720), teaser (~8s)
+      6 final status: 'ready' if any variant succeeded, else 'failed'; persist error summary
+    choose_quality/getSource only offer renditions that exist, so the higher ones simply
+    show up while the movie is already in the catalog.
+    Returns the name of the source file that was processed (None if nothing was done).
     """
     movie = Movie.objects.get(pk=movie_id)
 
     if not movie.video_file:
         # Nothing to do without an input file
-        return
+        return None
 
-    media_root = Path(settings.MEDIA_ROOT)
-    tmp_dir = media_root / "tmp"
-    tmp_dir.mkdir(parents=True, exist_ok=True)
+    source_name = movie.video_file.name
+    tmp_dir = _scratch_dir()
+    runs.start(source_name)
 
     source = Path(movie.video_file.path)
 
-    # Mark processing (and clear previous error)
-    Movie.objects.filter(pk=movie.pk).update(processing_status="processing", processing_error="")
+    # Mark processing (and clear previous error). We hold the lock, so this also
+    # takes over a movie left in 'processing' by a worker that died.
+    Movie.objects.filter(pk=movie.pk).update(processing_status="processing", processing_error="", updated_at=timezone.now())
+    status_changed.send(sender=Movie, movie_id=movie.pk, status="processing")
+    movie.processing_status = "processing"
 
-    # Probe duration early (best effort)
-    probed_duration = _probe_duration(source)
+    # Duration from the MediaInfo probed at upload; sources that predate it are probed (and stored) now
+    info = mediainfo.current(movie, "source") or mediainfo.record(movie, "source", source, source_name)
+    probed_duration = int(info.duration) if info and info.duration else _probe_duration(source)
+    # Step timeouts of all ffmpeg runs below scale with the media duration
+    watchdog.set_media_duration(probed_duration or movie.duration_seconds)
 
     errors: List[str] = []
+    asset_errors: List[str] = []
 
-    # --- 2 Transcode variants to temp files ---
-    tmp1080 = tmp_dir / f"movie_{movie.id}.1080.mp4"
-    tmp720  = tmp_dir / f"movie_{movie.id}.720.mp4"
-    tmp480  = tmp_dir / f"movie_{movie.id}.480.mp4"
-
-    ok1080 = _safe_transcode(source, tmp1080, 1080, errors)
-    ok720  = _safe_transcode(source, tmp720,   720, errors)
-    ok480  = _safe_transcode(source, tmp480,   480, errors)
-
-    rel1080 = f"movie_{movie.id}.1080.mp4"
-    rel720  = f"movie_{movie.id}.720.mp4"
-    rel480  = f"movie_{movie.id}.480.mp4"
-
-    # Save available variants into FileFields (no duplicates; temp files removed)
-    with transaction.atomic():
-        if ok1080 and tmp1080.exists():
-            _save_tmp_to_field(movie.video_1080, tmp1080, rel1080)
-        if ok720 and tmp720.exists():
-            _save_tmp_to_field(movie.video_720, tmp720, rel720)
-        if ok480 and tmp480.exists():
-            _save_tmp_to_field(movie.video_480, tmp480, rel480)
-        # Update duration if we probed one and it isn't set yet
-        if probed_duration and not movie.duration_seconds:
-            movie.duration_seconds = probed_duration
-        movie.save()
-
-    any_ok = ok1080 or ok720 or ok480
+    # Audio is the same for every rendition: encode (or copy) it once, renditions encode video only
+    tmp_audio = tmp_dir / f"movie_{movie.id}.audio.m4a"
+    with runs.step("extract_audio", outputs=[tmp_audio]):
+        audio = _safe_extract_audio(source, tmp_audio)
+
+    def rendition(height: int) -> bool:
+        """Transcode one variant and save it into its FileField right away."""
+        tmp = tmp_dir / f"movie_{movie.id}.{height}.mp4"
+        with runs.step(f"transcode_{height}", outputs=[tmp]):
+            ok = _safe_transcode(source, tmp, height, errors, audio=audio)
+        if not (ok and tmp.exists()):
+            return False
+        field_name = f"video_{height}"
+        field = getattr(movie, field_name)
+        save_tmp_to_field(field, tmp, f"movie_{movie.id}.{height}.mp4")
+        movie.save(update_fields=[field_name])
+        mediainfo.record(movie, str(height), Path(field.path), field.name)
+        return True
 
-    # Choose best available source for assets: prefer variants, else original
-    def _first_existing(paths: list[Optional[Path]]) -> Path:
-        for p in paths:
-            if p and p.exists():
-                return p
+    def best_src() -> Path:
+        """Best available input for stills/teaser: highest saved variant, else the original."""
+        for f in (movie.video_1080, movie.video_720, movie.video_480):
+            if f and Path(f.path).exists():
+                return Path(f.path)
         return source
 
-    best_src = _first_existing([
-        Path(movie.video_1080.path) if getattr(movie, "video_1080", None) and movie.video_1080 else None,
-        Path(movie.video_720.path)  if getattr(movie, "video_720",  None) and movie.video_720  else None,
-        Path(movie.video_480.path)  if getattr(movie, "video_480",  None) and movie.video_480  else None,
-    ])
-
-    # --- 4 Build assets (errors should not turn a successful transcode into "failed") ---
-    asset_errors: List[str] = []
-    try:
-        # Determine a few reasonable timestamps
-        dur = probed_duration or _probe_duration(best_src) or 0
-        ss_frame  = max(1, dur // 3)   # still frame around 1/3
-        ss_teaser = max(1, dur // 5)   # teaser start around 1/5
-
-        # Temp output paths
-        tmp_thumb  = tmp_dir / f"movie_{movie.id}_thumb.jpg"
-        tmp_hero   = tmp_dir / f"movie_{movie.id}_hero.jpg"
-        tmp_teaser = tmp_dir / f"movie_{movie.id}_teaser.mp4"
-
-        # Render
-        _frame_to_image(best_src, tmp_thumb, 640, 360, ss_frame)
-        _frame_to_image(best_src, tmp_hero,  1280, 720, ss_frame)
-        _cut_teaser(best_src, tmp_teaser, ss_teaser, duration=8)
-
-        # Save into fields (final relative names)
-        with transaction.atomic():
-            if dur and not movie.duration_seconds:
-                movie.duration_seconds = dur
-            _save_tmp_to_field(movie.thumbnail_image, tmp_thumb,  f"movie_{movie.id}_thumb.jpg")
-            _save_tmp_to_field(movie.hero_image,      tmp_hero,   f"movie_{movie.id}_hero.jpg")
-            _save_tmp_to_field(movie.teaser_video,    tmp_teaser, f"movie_{movie.id}_teaser.mp4")
-            movie.save()
+    def asset(name: str, tmp: Path, field, build) -> None:
+        """Render one asset (errors never turn a successful transcode into 'failed')."""
+        try:
+            with runs.step(name, outputs=[tmp]):
+                build()
+            save_tmp_to_field(field, tmp, tmp.name)
+            movie.save(update_fields=[field.field.name])
+        except subprocess.CalledProcessError as e:
+            asset_errors.append(f"[assets] {name} rc={e.returncode} err={(e.stderr or '').strip()[:4000]}")
+        except Exception as e:
+            asset_errors.append(f"[assets] {name} unexpected: {e!r}")
+
+    # --- 2 lowest rendition + thumbnail first ---
+    ok480 = rendition(480)
+
+    # Timestamps for stills/teaser (a rendition may probe where the source did not)
+    rendition_info = mediainfo.current(movie, "480")
+    dur = probed_duration or (int(rendition_info.duration) if rendition_info and rendition_info.duration else 0)
+    if dur and not movie.duration_seconds:
+        movie.duration_seconds = dur
+        movie.save(update_fields=["duration_seconds"])
+    ss_frame  = max(1, dur // 3)   # still frame around 1/3
+    ss_teaser = max(1, dur // 5)   # teaser start around 1/5
+
+    tmp_thumb = tmp_dir / f"movie_{movie.id}_thumb.jpg"
+    asset("thumbnail", tmp_thumb, movie.thumbnail_image,
+          lambda: _frame_to_image(best_src(), tmp_thumb, 640, 360, ss_frame))
+
+    # --- 3 publish ---
+    published = ok480 and transition(movie.pk, "ready")
+
+    # --- 4 higher renditions, added incrementally ---
+    ok720 = rendition(720)
+    if ok720 and not ok480:
+        published = transition(movie.pk, "ready")
+    ok1080 = rendition(1080)
+    any_ok = ok1080 or ok720 or ok480
 
-    except subprocess.CalledProcessError as e:
-        asset_errors.append(f"[assets] rc={e.returncode} err={(e.stderr or '').strip()[:4000]}")
-    except Exception as e:
-        asset_errors.append(f"[assets] unexpected: {e!r}")
-
-    # --- 5 Final status & errors ---
-    with transaction.atomic():
-        movie.processing_status = "ready" if any_ok else "failed"
-        combined = errors + asset_errors
-        movie.processing_error = "" if not combined else "\n".join(combined)[:8000]
-        movie.save()
\ No newline at end of file
+    # --- 5 remaining assets ---
+    tmp_hero = tmp_dir / f"movie_{movie.id}_hero.jpg"
+    asset("hero", tmp_hero, movie.hero_image,
+          lambda: _frame_to_image(best_src(), tmp_hero, 1280, 720, ss_frame))
+    tmp_teaser = tmp_dir / f"movie_{movie.id}_teaser.mp4"
+    src720 = Path(movie.video_720.path) if movie.video_720 else None
+    asset("teaser", tmp_teaser, movie.teaser_video,
+          lambda: _build_teaser(src720, best_src(), tmp_teaser, ss_teaser, duration=8, audio=audio))
+
+    if audio is not None:
+        audio.unlink(missing_ok=True)
+
+    # --- 6 Final status & errors ---
+    # Conditional: a reprocess request that moved the movie to 'queued' meanwhile is kept
+    # (process_movie re-enqueues it once the lock is released).
+    combined = errors + asset_errors
+    error = "" if not combined else "\n".join(combined)[:8000]
+    if published:
+        Movie.objects.filter(pk=movie.pk, processing_status="ready").update(
+            processing_error=error, updated_at=timezone.now())
+    else:
+        transition(movie.pk, "ready" if any_ok else "failed", only_from=("processing",), processing_error=error)
+
+    return source_name
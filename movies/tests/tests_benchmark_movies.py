@@ -0,0 +1,71 @@
+# movies/tests/tests_benchmark_movies.py
+from __future__ import annotations
+
+import json
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+from django.core.management.base import CommandError
+
+import movies.benchmarks as benchmarks
+import movies.tasks as tasks
+import movies.watchdog as watchdog
+from movies.management.commands.benchmark_pipeline import parse_resolution
+
+
+# -----------------------------
+# harness helpers (always run)
+# -----------------------------
+def test_measure_records_child_rss_sizes_and_errors(tmp_path):
+    out = tmp_path / "o.bin"
+
+    def step():
+        tasks._run(["sh", "-c", f"printf abc > {out}"])
+
+    result = benchmarks.measure("step", step, lambda: [out])
+    assert result["step"] == "step" and result["error"] is None
+    assert result["wall_s"] >= 0 and result["cpu_s"] >= 0
+    assert result["peak_rss_kb"] and result["peak_rss_kb"] > 0
+    assert result["output_bytes"] == {"o.bin": 3}
+
+    failed = benchmarks.measure("bad", lambda: tasks._run(["sh", "-c", "echo nope >&2; exit 3"]))
+    assert "CalledProcessError" in failed["error"]
+
+
+def test_child_peak_rss_restores_run():
+    original = watchdog.run_supervised
+    with benchmarks.child_peak_rss() as peaks:
+        assert watchdog.run_supervised is not original
+        tasks._run(["true"])
+    assert watchdog.run_supervised is original and len(peaks) == 1
+
+
+def test_parse_resolution():
+    assert parse_resolution("1280x720") == (1280, 720)
+    with pytest.raises(CommandError):
+        parse_resolution("720p")
+
+
+# -----------------------------
+# real benchmark (pytest -m benchmark)
+# -----------------------------
+@pytest.mark.benchmark
+@pytest.mark.django_db
+@pytest.mark.skipif(shutil.which("ffmpeg") is None or shutil.which("ffprobe") is None, reason="needs ffmpeg")
+def test_benchmark_pipeline_small(tmp_path, settings):
+    settings.MEDIA_ROOT = tmp_path / "media"
+    settings.STORAGES = {**settings.STORAGES,
+                         "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"}}
+
+    report = benchmarks.run_benchmarks(tmp_path / "work", resolutions=[(320, 180)], durations=[3])
+
+    results = {r["step"]: r for r in report["sources"][0]["results"]}
+    assert set(results) == set(benchmarks.ALL_STEPS)
+    assert all(r["error"] is None for r in results.values())
+    assert results["transcode_480"]["output_bytes"]["480.mp4"] > 0
+
+    out = Path(os.environ.get("BENCH_OUTPUT", tmp_path / "bench.json"))
+    out.write_text(json.dumps(report, indent=2))
+    assert json.loads(out.read_text())["sources"][0]["results"]
@@ -0,0 +1,141 @@
+# movies/tests/tests_catalog_movies.py
+from __future__ import annotations
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from movies.catalog import catalog_version
+from movies.models import Favorite, Genre
+from movies.processing import transition
+
+
+def _client(name):
+    user = get_user_model().objects.create_user(username=f"{name}@example.com", email=f"{name}@example.com", password="pw12345!")
+    c = APIClient()
+    c.force_authenticate(user=user)
+    return c, user
+
+
+@pytest.mark.django_db
+def test_second_request_only_reads_favorites(django_assert_num_queries, make_movie):
+    client, _ = _client("cached")
+    make_movie("Cached A")
+    make_movie("Cached B")
+    first = client.get(reverse("movie-list"))
+
+    with django_assert_num_queries(1):
+        second = client.get(reverse("movie-list"))
+
+    assert second.data == first.data
+    assert [m["title"] for m in second.data] == ["Cached B", "Cached A"]
+
+
+@pytest.mark.django_db
+def test_favorites_are_merged_per_user(make_movie):
+    alice, alice_user = _client("alice")
+    bob, _ = _client("bob")
+    a = make_movie("Overlay A")
+    b = make_movie("Overlay B")
+    Favorite.objects.create(user=alice_user, movie=a)
+
+    alice_view = {m["id"]: m["is_favorite"] for m in alice.get(reverse("movie-list")).data}
+    bob_view = {m["id"]: m["is_favorite"] for m in bob.get(reverse("movie-list")).data}
+
+    assert alice_view == {a.pk: True, b.pk: False}
+    assert bob_view == {a.pk: False, b.pk: False}
+
+
+@pytest.mark.django_db
+def test_changes_bump_the_version(django_capture_on_commit_callbacks, make_movie):
+    client, _ = _client("editor")
+    m = make_movie("Before")
+    assert [x["title"] for x in client.get(reverse("movie-list")).data] == ["Before"]
+
+    version = catalog_version()
+    m.refresh_from_db()
+    m.title = "After"
+    with django_capture_on_commit_callbacks(execute=True):
+        m.save()
+    assert catalog_version() > version
+    assert [x["title"] for x in client.get(reverse("movie-list")).data] == ["After"]
+
+    version = catalog_version()
+    with django_capture_on_commit_callbacks(execute=True):
+        transition(m.pk, "queued")
+    assert catalog_version() > version
+    assert client.get(reverse("movie-list")).data == []
+
+    version = catalog_version()
+    with django_capture_on_commit_callbacks(execute=True):
+        Genre.objects.create(name="Bumped")
+    assert catalog_version() > version
+
+
+@pytest.mark.django_db
+def test_version_is_bumped_only_on_commit(django_capture_on_commit_callbacks, make_movie):
+    m = make_movie("Uncommitted")
+    version = catalog_version()
+    with django_capture_on_commit_callbacks() as callbacks:
+        m.title = "Still uncommitted"
+        m.save()
+    # a reader in between must not rebuild the payload from the old row under a new version
+    assert catalog_version() == version
+    for callback in callbacks:
+        callback()
+    assert catalog_version() > version
+
+
+@pytest.mark.django_db
+def test_unknown_params_share_one_entry(django_assert_num_queries, make_movie):
+    client, _ = _client("junk")
+    make_movie("Junk A")
+    first = client.get(reverse("movie-list"), {"utm_source": "mail"})
+
+    with django_assert_num_queries(1):
+        second = client.get(reverse("movie-list"), {"utm_source": "feed", "_": "1234"})
+
+    assert second.data == first.data
+    assert sum(1 for key in cache._cache if ":movies:catalog:" in key) == 1
+
+
+@pytest.mark.django_db
+def test_cached_pages_keep_the_next_link(make_movie):
+    client, _ = _client("pager")
+    for i in range(3):
+        make_movie(f"Paged {i}")
+    first = client.get(reverse("movie-list"), {"page_size": 2})
+    again = client.get(reverse("movie-list"), {"page_size": 2})
+
+    assert again["Link"] == first["Link"]
+    assert len(again.data) == 2
+    assert len(client.get(reverse("movie-list"), {"page_size": 1}).data) == 1
+
+
+@pytest.mark.django_db
+def test_genre_list_is_cached_per_genre(make_movie):
+    client, _ = _client("genres")
+    action = Genre.objects.create(name="Cached Action", slug="cached-action")
+    drama = Genre.objects.create(name="Cached Drama", slug="cached-drama")
+    make_movie("Shootout", genre=action)
+    make_movie("Tears", genre=drama)
+
+    for _ in range(2):
+        assert [m["title"] for m in client.get(reverse("genre-movies", kwargs={"slug": "cached-action"})).data] == ["Shootout"]
+        assert [m["title"] for m in client.get(reverse("genre-movies", kwargs={"slug": "cached-drama"})).data] == ["Tears"]
+
+
+@pytest.mark.django_db
+def test_heroes_overlay_favorites(make_movie):
+    client, user = _client("heroes")
+    heroes = [make_movie(f"Hero {i}", is_hero=True) for i in range(4)]
+    make_movie("Not a hero")
+    Favorite.objects.create(user=user, movie=heroes[-1])
+
+    res = client.get(reverse("movie-heroes"), {"limit": 2})
+
+    assert [m["id"] for m in res.data] == [heroes[3].pk, heroes[2].pk]
+    assert [m["is_favorite"] for m in res.data] == [True, False]
+    assert len(client.get(reverse("movie-heroes"), {"limit": 3}).data) == 3
@@ -0,0 +1,86 @@
+# movies/tests/tests_commands_movies.py
+from __future__ import annotations
+
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from movies.models import Movie, Genre
+from movies.processing import movie_lock
+from movies.management.commands import reprocess_movies as cmd
+
+
+@pytest.fixture
+def catalog(db, queue):
+    action = Genre.objects.create(name="Action")
+    drama = Genre.objects.create(name="Drama")
+    full = Movie.objects.create(title="Full", genre=action, processing_status="ready", video_file="v/full.mp4",
+                                video_1080="a.mp4", video_720="b.mp4", video_480="c.mp4")
+    partial = Movie.objects.create(title="Partial", genre=action, processing_status="ready",
+                                   video_file="v/partial.mp4", video_480="d.mp4")
+    failed = Movie.objects.create(title="Failed", genre=drama, processing_status="failed", video_file="v/failed.mp4")
+    # creating with a source enqueues (status 'queued'); reset to the catalog state we want
+    Movie.objects.filter(pk__in=[full.pk, partial.pk]).update(processing_status="ready")
+    Movie.objects.filter(pk=failed.pk).update(processing_status="failed")
+    queue.jobs.clear()
+    return {"full": full, "partial": partial, "failed": failed}
+
+
+def _run(*args):
+    out = StringIO()
+    call_command("reprocess_movies", *args, stdout=out)
+    return out.getvalue()
+
+
+@pytest.mark.django_db
+def test_filters_combine(catalog):
+    ids = lambda **o: sorted(m.title for m in cmd.select_movies(o))
+    assert ids() == ["Failed", "Full", "Partial"]
+    assert ids(status=["failed"]) == ["Failed"]
+    assert ids(genre="action", missing_variants=True) == ["Partial"]
+    assert ids(created_after="2000-01-01", limit=1) == ["Full"]
+    with pytest.raises(CommandError):
+        cmd.select_movies({"genre": "nope"})
+    with pytest.raises(CommandError):
+        cmd.select_movies({"created_before": "yesterday"})
+
+
+@pytest.mark.django_db
+def test_dry_run_enqueues_nothing(catalog, queue):
+    out = _run("--dry-run", "--status", "ready")
+    assert "Dry run: 2 movie(s)" in out
+    assert queue.jobs == []
+
+
+@pytest.mark.django_db
+def test_enqueues_with_rate_limit_and_skips_processing(catalog, queue, monkeypatch, django_capture_on_commit_callbacks):
+    sleeps = []
+    monkeypatch.setattr(cmd.time, "sleep", lambda s: sleeps.append(s))
+    Movie.objects.filter(pk=catalog["full"].pk).update(processing_status="processing")
+
+    with django_capture_on_commit_callbacks(execute=True), movie_lock(catalog["full"].pk):
+        out = _run("--rate", "4")
+
+    assert sorted(args[0] for _, args, _ in queue.jobs) == sorted([catalog["partial"].pk, catalog["failed"].pk])
+    assert sleeps == [0.25, 0.25]
+    assert "Enqueued 2/3" in out and "Skipped #" in out
+
+
+@pytest.mark.django_db
+def test_sync_runs_pipeline_and_reports_throughput(catalog, queue, monkeypatch):
+    def fake_process(movie_id):
+        Movie.objects.filter(pk=movie_id).update(processing_status="ready", duration_seconds=120)
+
+    monkeypatch.setattr(cmd, "process_movie", fake_process)
+    out = _run("--sync", "--ids", str(catalog["failed"].pk))
+
+    assert queue.jobs == []
+    assert "1 ready" in out and "movies/hour" in out and "CPU-s per output minute" in out
+
+
+def test_throughput_report_math():
+    report = cmd.throughput_report(processed=2, wall_s=1800, cpu_s=240, output_s=1200)
+    assert report == {"movies_per_hour": 4.0, "cpu_s_per_output_min": 12.0}
+    assert cmd.throughput_report(0, 0, 0, 0) == {"movies_per_hour": 0.0, "cpu_s_per_output_min": None}
@@ -0,0 +1,160 @@
+# movies/tests/tests_failures_movies.py
+from __future__ import annotations
+
+import subprocess
+
+import pytest
+from django.contrib.admin.sites import AdminSite
+from django.core.files.base import ContentFile
+from django.db import OperationalError
+
+from movies.admin import DeadLetterAdmin
+from movies.models import DeadLetter, Movie
+from movies.processing import job_timeout_for, movie_lock
+import movies.failures as failures
+import movies.tasks as tasks
+
+
+@pytest.fixture
+def movie(db, tmp_path, settings, queue):
+    settings.MEDIA_ROOT = tmp_path
+    m = Movie.objects.create(title="F", description="f")
+    m.video_file.save("input.mp4", ContentFile(b"fake-bytes"), save=True)
+    return m
+
+
+def _fail_all_variants(monkeypatch, stderr, rc=1):
+    monkeypatch.setattr(tasks, "_probe_duration", lambda src: None)
+    monkeypatch.setattr(tasks, "_safe_extract_audio", lambda src, out: None)
+
+    def fail(src, out_tmp, height, errors, audio=None):
+        errors.append(f"[{height}p] rc={rc} err={stderr}")
+        return False
+
+    monkeypatch.setattr(tasks, "_safe_transcode", fail)
+    monkeypatch.setattr(tasks, "_frame_to_image", lambda *a, **k: None)
+    monkeypatch.setattr(tasks, "_cut_teaser", lambda *a, **k: None)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("[480p] rc=1 err=av_interleaved_write_frame(): No space left on device", failures.TRANSIENT),
+    ("[480p] rc=-9 err=", failures.TRANSIENT),
+    ("[480p] rc=-9 err=stalled: no progress for 60s", failures.TRANSIENT),
+    ("[480p] rc=1 err=input.mp4: Invalid data found when processing input", failures.PERMANENT),
+    ("[480p] rc=1 err=moov atom not found", failures.PERMANENT),
+    ("[480p] rc=127 err=missing codec", failures.PERMANENT),
+    ("[480p] rc=1 err=something odd", failures.PERMANENT),
+    # disk full while reading a broken file: the disk is the actionable part
+    ("Invalid data found when processing input\nNo space left on device", failures.TRANSIENT),
+])
+def test_classify_text(text, expected):
+    assert failures.classify_text(text)[0] == expected
+
+
+def test_classify_exception():
+    assert failures.classify_exception(OperationalError("server closed the connection"))[0] == failures.TRANSIENT
+    assert failures.classify_exception(FileNotFoundError(2, "No such file"))[0] == failures.PERMANENT
+    exc = subprocess.CalledProcessError(1, ["ffmpeg"], stderr="Invalid data found when processing input")
+    assert failures.classify_exception(exc) == (failures.PERMANENT, "corrupt or unsupported input")
+
+
+def test_backoff_delay_is_capped_full_jitter(monkeypatch, settings):
+    settings.PIPELINE_RETRY_BASE_DELAY = 30
+    settings.PIPELINE_RETRY_MAX_DELAY = 1800
+    bounds = []
+    monkeypatch.setattr(failures.random, "uniform", lambda lo, hi: bounds.append((lo, hi)) or hi)
+    assert [failures.backoff_delay(a) for a in (0, 1, 2, 10)] == [30, 60, 120, 1800]
+    assert all(lo == 0 for lo, _ in bounds)
+
+
+@pytest.mark.django_db
+def test_transient_failure_is_retried_with_backoff(movie, queue, monkeypatch):
+    _fail_all_variants(monkeypatch, "No space left on device")
+    monkeypatch.setattr(failures, "backoff_delay", lambda attempt: 42.0)
+
+    tasks.process_movie(movie.id)
+
+    movie.refresh_from_db()
+    assert movie.processing_status == "queued"
+    (delta, func, args, kwargs), = queue.delayed
+    assert delta.total_seconds() == 42.0
+    assert func == "movies.tasks.process_movie" and args == (movie.id, 1)
+    assert kwargs == {"job_id": f"movie-{movie.id}-transcode", "job_timeout": job_timeout_for(movie.id)}
+    assert not DeadLetter.objects.exists()
+
+
+@pytest.mark.django_db
+def test_permanent_failure_goes_to_dead_letters(movie, queue, monkeypatch):
+    _fail_all_variants(monkeypatch, "input.mp4: Invalid data found when processing input")
+
+    tasks.process_movie(movie.id)
+
+    movie.refresh_from_db()
+    assert movie.processing_status == "failed"
+    assert queue.delayed == []
+    letter = DeadLetter.objects.get(movie=movie)
+    assert letter.failure_class == "permanent" and letter.attempts == 1
+    assert "Invalid data" in letter.diagnostics["error"]
+    assert letter.diagnostics["source"] == movie.video_file.name and letter.diagnostics["run_id"]
+
+
+@pytest.mark.django_db
+def test_exhausted_retries_go_to_dead_letters(movie, queue, monkeypatch, settings):
+    settings.PIPELINE_RETRY_MAX = 3
+    _fail_all_variants(monkeypatch, "", rc=-9)
+
+    tasks.process_movie(movie.id, attempt=3)
+
+    assert queue.delayed == []
+    letter = DeadLetter.objects.get(movie=movie)
+    assert letter.failure_class == "transient" and letter.attempts == 4
+    assert "gave up after 4 attempts" in letter.reason
+
+
+@pytest.mark.django_db
+def test_crash_inside_pipeline_marks_failed_and_retries(movie, queue, monkeypatch):
+    def crash(movie_id):
+        raise OperationalError("server closed the connection unexpectedly")
+
+    monkeypatch.setattr(tasks, "_process_movie_locked", crash)
+    monkeypatch.setattr(failures, "backoff_delay", lambda attempt: 1.0)
+
+    tasks.process_movie(movie.id)
+
+    movie.refresh_from_db()
+    assert movie.processing_status == "queued"
+    assert "OperationalError" in movie.processing_error
+    assert len(queue.delayed) == 1
+
+
+@pytest.mark.django_db
+def test_unrecognised_crash_is_not_retried(movie, queue, monkeypatch):
+    def crash(movie_id):
+        raise ValueError("bug in the pipeline")
+
+    monkeypatch.setattr(tasks, "_process_movie_locked", crash)
+
+    tasks.process_movie(movie.id)
+
+    assert queue.delayed == []
+    letter = DeadLetter.objects.get(movie=movie)
+    assert letter.failure_class == "permanent" and letter.reason == "unclassified"
+
+
+@pytest.mark.django_db
+def test_retry_resolves_only_requeued_dead_letters(movie, queue, monkeypatch, django_capture_on_commit_callbacks):
+    letter = DeadLetter.objects.create(movie=movie, failure_class="permanent", reason="x", attempts=1)
+    admin = DeadLetterAdmin(DeadLetter, AdminSite())
+    sent = []
+    monkeypatch.setattr(admin, "message_user", lambda request, message, level=None: sent.append(message))
+
+    with movie_lock(movie.pk):
+        admin.retry_dead_letters(None, DeadLetter.objects.all())
+    letter.refresh_from_db()
+    assert letter.resolved_at is None
+    assert sent[0].startswith("0 movie(s)") and "F" in sent[1]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        admin.retry_dead_letters(None, DeadLetter.objects.all())
+    letter.refresh_from_db()
+    assert letter.resolved_at is not None
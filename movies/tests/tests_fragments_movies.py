@@ -0,0 +1,112 @@
+# movies/tests/tests_fragments_movies.py
+from __future__ import annotations
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.test import APIClient, APIRequestFactory
+
+from movies.catalog import bump_catalog_version
+from movies.fragments import FRAGMENT_FIELDS, movie_dicts
+from movies.models import Favorite, Movie
+from movies.processing import transition
+
+
+@pytest.fixture
+def request_():
+    return APIRequestFactory().get("/api/movies/")
+
+
+def _partial(*movies):
+    return list(Movie.objects.filter(pk__in=[m.pk for m in movies]).only(*FRAGMENT_FIELDS).order_by("id"))
+
+
+@pytest.mark.django_db
+def test_misses_are_loaded_in_one_query_and_hits_in_none(request_, django_assert_num_queries, make_movie):
+    a, b = make_movie("Frag A"), make_movie("Frag B")
+    listed = _partial(a, b)
+
+    with django_assert_num_queries(1):
+        first = movie_dicts(listed, request_)
+    with django_assert_num_queries(0):
+        second = movie_dicts(listed, request_)
+
+    assert [d["title"] for d in first] == ["Frag A", "Frag B"]
+    assert second == first
+    assert first[0]["logo"] is None and first[0]["is_favorite"] is False
+
+
+@pytest.mark.django_db
+def test_save_and_update_paths_move_updated_at(request_, make_movie):
+    m = make_movie("Stamp")
+    movie_dicts(_partial(m), request_)
+    stamps = [Movie.objects.get(pk=m.pk).updated_at]
+
+    m.refresh_from_db()
+    m.title = "Stamp renamed"
+    m.save(update_fields=["title"])
+    stamps.append(Movie.objects.get(pk=m.pk).updated_at)
+    assert movie_dicts(_partial(m), request_)[0]["title"] == "Stamp renamed"
+
+    transition(m.pk, "queued")
+    stamps.append(Movie.objects.get(pk=m.pk).updated_at)
+    assert movie_dicts(_partial(m), request_)[0]["processing_status"] == "queued"
+
+    assert stamps == sorted(stamps) and len(set(stamps)) == 3
+
+
+@pytest.mark.django_db
+def test_deleted_movie_is_skipped(request_, make_movie):
+    keep, gone = make_movie("Keep"), make_movie("Gone")
+    listed = _partial(keep, gone)
+    Movie.objects.filter(pk=gone.pk).delete()
+
+    assert [d["id"] for d in movie_dicts(listed, request_)] == [keep.pk]
+
+
+@pytest.mark.django_db
+def test_catalog_rebuild_reuses_fragments(django_assert_num_queries, make_movie):
+    user = get_user_model().objects.create_user(username="frag@example.com", email="frag@example.com", password="pw12345!")
+    client = APIClient()
+    client.force_authenticate(user=user)
+    make_movie("Reuse A")
+    make_movie("Reuse B")
+    bump_catalog_version()
+    client.get(reverse("movie-list"))
+    bump_catalog_version()
+
+    # page query + favorites; both fragments come from the cache
+    with django_assert_num_queries(2):
+        res = client.get(reverse("movie-list"))
+    assert [m["title"] for m in res.data] == ["Reuse B", "Reuse A"]
+
+
+@pytest.mark.django_db
+def test_detail_overlays_favorite(make_movie):
+    user = get_user_model().objects.create_user(username="detail@example.com", email="detail@example.com", password="pw12345!")
+    client = APIClient()
+    client.force_authenticate(user=user)
+    m = make_movie("Detailed")
+
+    assert client.get(reverse("movie-detail", args=[m.pk])).data["is_favorite"] is False
+    Favorite.objects.create(user=user, movie=m)
+    res = client.get(reverse("movie-detail", args=[m.pk]))
+    assert res.data["is_favorite"] is True
+    assert res.data["title"] == "Detailed"
+    assert client.get(reverse("movie-detail", args=[make_movie("Hidden", status="queued").pk])).status_code == 404
+
+
+@pytest.mark.django_db
+def test_fragments_do_not_leak_between_hosts_with_site_base_url(settings, make_movie):
+    # endpoint URLs use SITE_BASE_URL, but file URLs stay absolute on the request host
+    settings.SITE_BASE_URL = "https://api.example.com"
+    settings.ALLOWED_HOSTS = ["*"]
+    m = make_movie("Hosted")
+    Movie.objects.filter(pk=m.pk).update(video_480="movies/hosted.480.mp4")
+    factory = APIRequestFactory()
+
+    first = movie_dicts(_partial(m), factory.get("/api/movies/", HTTP_HOST="a.example.com"))
+    second = movie_dicts(_partial(m), factory.get("/api/movies/", HTTP_HOST="b.example.com"))
+
+    assert first[0]["video_480"].startswith("http://a.example.com/")
+    assert second[0]["video_480"].startswith("http://b.example.com/")
@@ -60,6 +60,10 @@ def test_parse_limit_above_max_is_clamped():
     req = _Req(limit="999")
     assert parse_limit(req, default=3, min_value=1, max_value=9) == 9
 
+def test_parse_limit_reads_named_param():
+    req = _Req(limit="2", per_genre="50")
+    assert parse_limit(req, default=12, min_value=1, max_value=30, name="per_genre") == 30
+
 # ---------------------------------------------------------------------------
 # get_random_flag
 # ---------------------------------------------------------------------------
@@ -210,6 +214,15 @@ def test_getSource_fallback_order_720_then_480_then_1080(tmp_path):
     src = getSource(m, q="")
     assert src.name.endswith("low.mp4")
 
+
+@pytest.mark.django_db
+def test_getSource_missing_quality_falls_back_to_next_lower(tmp_path):
+    m = Movie.objects.create(title="S3", description="s3")
+    # still encoding: only 480 exists so far
+    m.video_480.save("low.mp4", ContentFile(b"l"), save=True)
+    assert getSource(m, "1080").name == m.video_480.name
+    assert getSource(m, "720").name == m.video_480.name
+
 # ---------------------------------------------------------------------------
 # check_or_404
 # ---------------------------------------------------------------------------
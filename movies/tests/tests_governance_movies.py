@@ -0,0 +1,96 @@
+# movies/tests/tests_governance_movies.py
+from __future__ import annotations
+
+import pytest
+
+import movies.governance as governance
+
+
+@pytest.fixture
+def no_limits(settings):
+    settings.PIPELINE_NICE = 0
+    settings.PIPELINE_IONICE_CLASS = 0
+    settings.PIPELINE_FFMPEG_THREADS = 0
+    settings.PIPELINE_CGROUP = ""
+    settings.PIPELINE_MAX_LOAD = 0
+    return settings
+
+
+@pytest.fixture
+def all_binaries(monkeypatch):
+    monkeypatch.setattr(governance.shutil, "which", lambda name: f"/usr/bin/{name}")
+
+
+def test_governed_command_unchanged_without_limits(no_limits):
+    cmd = ["ffmpeg", "-i", "in.mp4", "out.mp4"]
+    assert governance.governed_command(cmd) == cmd
+
+
+def test_governed_command_nice_ionice_and_threads(no_limits, all_binaries):
+    no_limits.PIPELINE_NICE = 10
+    no_limits.PIPELINE_IONICE_CLASS = 2
+    no_limits.PIPELINE_IONICE_LEVEL = 7
+    no_limits.PIPELINE_FFMPEG_THREADS = 2
+
+    cmd = governance.governed_command(["ffmpeg", "-i", "in.mp4", "out.mp4"])
+
+    assert cmd == [
+        "nice", "-n", "10", "ionice", "-c", "2", "-n", "7",
+        "ffmpeg", "-filter_threads", "2", "-i", "in.mp4", "-threads", "2", "out.mp4",
+    ]
+    # thread caps only apply to ffmpeg
+    assert governance.governed_command(["ffprobe", "x"])[-2:] == ["ffprobe", "x"]
+
+
+def test_governed_command_skips_missing_binaries(no_limits, monkeypatch):
+    no_limits.PIPELINE_NICE = 5
+    no_limits.PIPELINE_IONICE_CLASS = 3
+    monkeypatch.setattr(governance.shutil, "which", lambda name: None)
+    assert governance.governed_command(["ffmpeg", "o.mp4"]) == ["ffmpeg", "o.mp4"]
+
+
+def test_cgroup_weights_and_attach(no_limits, tmp_path):
+    cg = tmp_path / "transcode"
+    cg.mkdir()
+    (cg / "cpu.weight").write_text("100\n")
+    (cg / "io.weight").write_text("default 100\n")
+    no_limits.PIPELINE_CGROUP = str(cg)
+    no_limits.PIPELINE_CPU_WEIGHT = 20
+    no_limits.PIPELINE_IO_WEIGHT = 30
+
+    assert governance.attach_to_cgroup(4242) is True
+    assert (cg / "cpu.weight").read_text() == "20\n"
+    assert (cg / "io.weight").read_text() == "default 30\n"
+    assert (cg / "cgroup.procs").read_text() == "4242\n"
+
+
+def test_attach_to_cgroup_disabled_or_unwritable(no_limits, tmp_path):
+    assert governance.attach_to_cgroup(1) is False
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    no_limits.PIPELINE_CGROUP = str(blocker / "sub")  # parent is a file -> mkdir fails
+    assert governance.attach_to_cgroup(1) is False
+
+
+def test_wait_for_capacity_waits_until_load_drops(no_limits, monkeypatch):
+    no_limits.PIPELINE_MAX_LOAD = 0.8
+    no_limits.PIPELINE_ADMISSION_POLL = 5
+    no_limits.PIPELINE_ADMISSION_MAX_WAIT = 60
+    loads = iter([1.5, 1.2, 0.5])
+    sleeps = []
+    monkeypatch.setattr(governance, "host_load", lambda: next(loads))
+    monkeypatch.setattr(governance.time, "sleep", lambda s: sleeps.append(s))
+
+    assert governance.wait_for_capacity() == 10
+    assert sleeps == [5, 5]
+
+
+def test_wait_for_capacity_is_bounded(no_limits, monkeypatch):
+    no_limits.PIPELINE_MAX_LOAD = 0.8
+    no_limits.PIPELINE_ADMISSION_POLL = 5
+    no_limits.PIPELINE_ADMISSION_MAX_WAIT = 12
+    monkeypatch.setattr(governance, "host_load", lambda: 9.0)
+    monkeypatch.setattr(governance.time, "sleep", lambda s: None)
+    assert governance.wait_for_capacity() == 15
+    no_limits.PIPELINE_MAX_LOAD = 0
+    assert governance.wait_for_capacity() == 0
@@ -0,0 +1,74 @@
+# movies/tests/tests_heroes_movies.py
+from __future__ import annotations
+
+import pytest
+from django.urls import reverse
+
+from movies.models import Movie
+from movies.processing import transition
+import movies.heroes as heroes
+
+
+@pytest.mark.django_db
+def test_random_pick_samples_the_pool_and_fetches_only_those(api_client, redis, django_assert_max_num_queries, make_movie):
+    pool = [make_movie(f"Pool {i}", is_hero=True) for i in range(12)]
+    make_movie("Not hero")
+    heroes.rebuild()
+
+    # sampled rows + fragment misses + favorites, independent of the pool size
+    with django_assert_max_num_queries(3):
+        res = api_client.get(reverse("movie-heroes"), {"random": "1", "limit": 3})
+
+    ids = [m["id"] for m in res.data]
+    assert len(ids) == 3 == len(set(ids))
+    assert set(ids) <= {m.pk for m in pool}
+    assert redis.srandmember_calls == 1
+
+
+@pytest.mark.django_db
+def test_pool_is_built_lazily_and_follows_signals(redis, django_capture_on_commit_callbacks, make_movie):
+    first = make_movie("Lazy", is_hero=True)
+    assert heroes.sample(5) == [first.pk]
+
+    m = make_movie("Later", status="processing", is_hero=True)
+    with django_capture_on_commit_callbacks(execute=True):
+        transition(m.pk, "ready")
+    assert sorted(heroes.sample(5)) == sorted([first.pk, m.pk])
+
+    m.refresh_from_db()
+    with django_capture_on_commit_callbacks(execute=True):
+        m.is_hero = False
+        m.save()
+    assert heroes.sample(5) == [first.pk]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        first.delete()
+    assert heroes.sample(5) == []
+
+
+@pytest.mark.django_db
+def test_stale_pool_entries_are_dropped(api_client, redis, make_movie):
+    hero = make_movie("Still hero", is_hero=True)
+    gone = make_movie("Demoted", is_hero=True)
+    heroes.rebuild()
+    Movie.objects.filter(pk=gone.pk).update(is_hero=False)  # no signal: the pool is stale
+
+    res = api_client.get(reverse("movie-heroes"), {"random": "1", "limit": 5})
+
+    assert [m["id"] for m in res.data] == [hero.pk]
+    assert redis.sets[heroes._key()] == {str(hero.pk).encode()}  # the stale id left the pool
+
+
+@pytest.mark.django_db
+def test_without_redis_falls_back_to_database(api_client, make_movie):
+    pool = {make_movie(f"Fallback {i}", is_hero=True).pk for i in range(4)}
+    res = api_client.get(reverse("movie-heroes"), {"random": "1", "limit": 2})
+    assert len(res.data) == 2 and {m["id"] for m in res.data} <= pool
+
+
+@pytest.mark.django_db
+def test_non_random_returns_newest_limited(api_client, redis, make_movie):
+    made = [make_movie(f"Newest {i}", is_hero=True) for i in range(4)]
+    res = api_client.get(reverse("movie-heroes"), {"limit": 2})
+    assert [m["id"] for m in res.data] == [made[3].pk, made[2].pk]
+    assert redis.srandmember_calls == 0
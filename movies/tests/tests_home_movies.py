@@ -0,0 +1,84 @@
+# movies/tests/tests_home_movies.py
+from __future__ import annotations
+
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from movies.catalog import bump_catalog_version, top_per_genre
+from movies.fragments import FRAGMENT_FIELDS
+from movies.models import Favorite, Genre, Movie
+
+
+def _catalog(genres=3, per_genre=5, prefix="Home"):
+    now = timezone.now()
+    made = {}
+    for g in range(genres):
+        genre = Genre.objects.create(name=f"{prefix} Genre {g}")
+        for i in range(per_genre):
+            m = Movie.objects.create(title=f"{prefix} G{g} M{i}", description="d", genre=genre, is_hero=(i == 0),
+                                     video_file=f"uploads/{prefix}-{g}-{i}.mp4")
+            Movie.objects.filter(pk=m.pk).update(processing_status="ready", created_at=now - timedelta(minutes=i))
+            made.setdefault(genre.pk, []).append(m)
+    bump_catalog_version()
+    return made
+
+
+@pytest.mark.django_db
+def test_top_per_genre_is_one_window_query():
+    made = _catalog(genres=3, per_genre=5)
+    Movie.objects.filter(pk=made[next(iter(made))][1].pk).update(processing_status="queued")
+
+    with CaptureQueriesContext(connection) as ctx:
+        rows = top_per_genre(2, FRAGMENT_FIELDS)
+
+    assert len(ctx.captured_queries) == 1
+    assert "ROW_NUMBER" in ctx.captured_queries[0]["sql"].upper()
+    first = next(iter(made))
+    assert [m.pk for m in rows[first]] == [made[first][0].pk, made[first][2].pk]  # queued one skipped
+    assert all(len(row) == 2 for row in rows.values())
+
+
+@pytest.mark.django_db
+def test_home_has_every_section(api_client, user):
+    made = _catalog(genres=2, per_genre=4)
+    liked = next(iter(made.values()))[3]
+    Favorite.objects.create(user=user, movie=liked)
+
+    res = api_client.get(reverse("movie-home"), {"per_genre": 3, "heroes": 2})
+
+    assert res.status_code == 200
+    assert [g["name"] for g in res.data["genres"]] == ["Home Genre 0", "Home Genre 1"]
+    assert all(len(g["movies"]) == 3 for g in res.data["genres"])
+    assert set(res.data["genres"][0]) >= {"id", "name", "slug", "movies"}
+    assert len(res.data["heroes"]) == 2 and all(h["is_hero"] for h in res.data["heroes"])
+    assert [m["id"] for m in res.data["favorites"]] == [liked.pk]
+    assert res.data["favorites"][0]["is_favorite"] is True
+
+
+@pytest.mark.django_db
+def test_query_count_is_bounded(api_client, user, django_assert_max_num_queries):
+    for m in list(_catalog(genres=2, per_genre=3).values())[0]:
+        Favorite.objects.create(user=user, movie=m)
+    # genres, window rows, heroes, fragment misses, favorite ids, favorites row
+    with django_assert_max_num_queries(6):
+        api_client.get(reverse("movie-home"))
+
+    _catalog(genres=6, per_genre=6, prefix="More")
+    with django_assert_max_num_queries(6):
+        cold = api_client.get(reverse("movie-home"))
+    # warm: only the per-user favorites part is read
+    with django_assert_max_num_queries(2):
+        warm = api_client.get(reverse("movie-home"))
+    assert warm.data == cold.data
+
+
+@pytest.mark.django_db
+def test_per_genre_is_clamped(api_client):
+    _catalog(genres=1, per_genre=3)
+    assert len(api_client.get(reverse("movie-home"), {"per_genre": 0}).data["genres"][0]["movies"]) == 1
+    assert len(api_client.get(reverse("movie-home"), {"per_genre": "x"}).data["genres"][0]["movies"]) == 3
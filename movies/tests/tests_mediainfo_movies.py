@@ -0,0 +1,161 @@
+# movies/tests/tests_mediainfo_movies.py
+from __future__ import annotations
+
+import io
+from pathlib import Path
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from movies.admin import MovieAdminForm
+from movies.funktions import choose_quality
+from movies.models import MediaInfo, Movie, UploadSession
+import movies.mediainfo as mediainfo
+import movies.tasks as tasks
+import movies.uploads as uploads
+
+PROBE = {
+    "streams": [
+        {"codec_type": "video", "codec_name": "mjpeg", "width": 300, "height": 300,
+         "disposition": {"attached_pic": 1}},
+        {"codec_type": "video", "codec_name": "h264", "width": 1920, "height": 1080,
+         "avg_frame_rate": "30000/1001", "bit_rate": "4800000"},
+        {"codec_type": "audio", "codec_name": "aac"},
+    ],
+    "format": {"duration": "5400.250000", "size": "3400000000", "bit_rate": "5000000"},
+}
+
+
+def test_summarize_skips_cover_art_and_parses_rates():
+    fields = mediainfo.summarize(PROBE)
+    assert (fields["width"], fields["height"], fields["video_codec"]) == (1920, 1080, "h264")
+    assert fields["fps"] == 29.97 and fields["audio_codec"] == "aac"
+    assert fields["bitrate"] == 5_000_000 and fields["video_bitrate"] == 4_800_000
+    assert fields["duration"] == 5400.25 and fields["size_bytes"] == 3_400_000_000
+
+
+def test_keyframe_interval_from_packet_flags(monkeypatch):
+    packets = [{"pts_time": str(t / 2), "flags": "K__" if t % 4 == 0 else "___"} for t in range(20)]
+    monkeypatch.setattr(mediainfo, "_ffprobe", lambda args, path: {"packets": packets})
+    assert mediainfo.keyframe_interval(Path("v.mp4")) == 2.0
+
+
+@pytest.mark.parametrize("data, reason", [
+    ({"streams": [{"codec_type": "audio", "codec_name": "mp3"}], "format": {"duration": "10"}}, "no video stream"),
+    ({"streams": [{"codec_type": "video", "codec_name": "h264", "width": 640, "height": 360}], "format": {}},
+     "unknown duration"),
+])
+def test_check_source_rejects_unplayable(monkeypatch, data, reason):
+    monkeypatch.setattr(mediainfo, "_ffprobe", lambda args, path: data if "-show_format" in args else {})
+    with pytest.raises(mediainfo.UnplayableSource) as exc:
+        mediainfo.check_source(Path("in.mp4"))
+    assert exc.value.reason == reason
+
+
+def test_check_source_reports_ffprobe_error_and_tolerates_missing_binary(monkeypatch):
+    def broken(args, path):
+        raise mediainfo.ProbeFailed("in.mp4: Invalid data found when processing input")
+
+    monkeypatch.setattr(mediainfo, "_ffprobe", broken)
+    with pytest.raises(mediainfo.UnplayableSource, match="Invalid data"):
+        mediainfo.check_source(Path("in.mp4"))
+
+    def missing(args, path):
+        raise FileNotFoundError("ffprobe")
+
+    monkeypatch.setattr(mediainfo, "_ffprobe", missing)
+    assert mediainfo.check_source(Path("in.mp4")) is None
+
+
+def test_choose_quality_uses_measured_bitrates():
+    rates = {"1080": 6_000_000, "720": 3_000_000, "480": 1_200_000}
+    assert choose_quality(True, True, True, screen_h=1080, downlink_mbps=5, bitrates=rates)[0] == "720"
+    assert choose_quality(True, True, True, screen_h=1080, downlink_mbps=10, bitrates=rates)[0] == "1080"
+    # a lean 1080p encode fits where the fixed 7 Mbit/s threshold would have said no
+    lean = {"1080": 2_500_000, "720": 1_500_000}
+    assert choose_quality(True, True, True, screen_h=1080, downlink_mbps=4, bitrates=lean)[0] == "1080"
+    # only 720 was probed: 1080 falls back to the fixed threshold instead of being skipped
+    only720 = {"720": 3_000_000}
+    assert choose_quality(True, True, True, screen_h=1080, downlink_mbps=10, bitrates=only720)[0] == "1080"
+    assert choose_quality(True, True, True, screen_h=1080, downlink_mbps=5, bitrates=only720)[0] == "720"
+
+
+@pytest.mark.django_db
+def test_pipeline_reads_duration_from_stored_source_info(tmp_path, settings, queue, monkeypatch):
+    settings.MEDIA_ROOT = tmp_path
+    m = Movie.objects.create(title="Info", description="i")
+    m.video_file.save("input.mp4", ContentFile(b"fake-bytes"), save=True)
+    mediainfo.store(m, "source", m.video_file.name, mediainfo.summarize(PROBE))
+
+    def no_probe(src):
+        raise AssertionError("source was probed again")
+
+    monkeypatch.setattr(tasks, "_probe_duration", no_probe)
+    monkeypatch.setattr(tasks, "_safe_extract_audio", lambda src, out: None)
+    monkeypatch.setattr(tasks, "_safe_transcode", lambda src, out, h, errors, audio=None: False)
+    monkeypatch.setattr(tasks, "_frame_to_image", lambda *a, **k: None)
+    monkeypatch.setattr(tasks, "_cut_teaser", lambda *a, **k: None)
+
+    tasks.process_movie(m.id)
+    m.refresh_from_db()
+    assert m.duration_seconds == 5400
+
+
+@pytest.mark.django_db
+def test_resolve_speed_reports_rendition_bitrate(tmp_path, settings, queue):
+    settings.MEDIA_ROOT = tmp_path
+    m = Movie.objects.create(title="Rates", description="r")
+    m.video_file.save("rates.src.mp4", ContentFile(b"s"), save=False)
+    m.video_720.save("rates.720.mp4", ContentFile(b"v"), save=False)
+    m.save()
+    Movie.objects.filter(pk=m.pk).update(processing_status="ready")
+    MediaInfo.objects.create(movie=m, kind="720", file_name=m.video_720.name, bitrate=2_000_000)
+
+    user = get_user_model().objects.create_user(username="r@example.com", email="r@example.com", password="pw")
+    client = APIClient()
+    client.force_authenticate(user)
+    resp = client.get(reverse("resolve-speed", args=[m.pk]), {"downlink": 4, "screen_h": 720})
+    assert resp.data["quality"] == "720" and resp.data["bitrate"] == 2_000_000
+
+
+@pytest.mark.django_db
+def test_unplayable_upload_is_rejected_before_queueing(tmp_path, settings, queue, monkeypatch,
+                                                       django_capture_on_commit_callbacks):
+    settings.MEDIA_ROOT = tmp_path
+    settings.UPLOAD_STAGING_DIR = str(tmp_path / "staging")
+    m = Movie.objects.create(title="Bad upload", description="b")
+    session = UploadSession.objects.create(movie=m, filename="bad.mp4", length=3)
+
+    def unplayable(path):
+        raise mediainfo.UnplayableSource("no video stream")
+
+    monkeypatch.setattr(uploads, "check_source", unplayable)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        uploads.append_chunk(session, io.BytesIO(b"abc"), 0, 3)
+    # the probe runs in the finish job, which records why the file was rejected
+    tasks.finish_upload(session.pk)
+    session.refresh_from_db()
+    assert session.error == "Unplayable source: no video stream" and not session.is_complete
+    assert not uploads.staging_path(session).exists()
+    m.refresh_from_db()
+    assert not m.video_file and queue.jobs == []
+
+
+@pytest.mark.django_db
+def test_admin_form_rejects_unplayable_video(monkeypatch):
+    def unplayable(path):
+        raise mediainfo.UnplayableSource("unknown duration")
+
+    monkeypatch.setattr("movies.admin.check_source", unplayable)
+    upload = TemporaryUploadedFile("clip.mp4", "video/mp4", 3, None)
+    upload.write(b"abc")
+    upload.seek(0)
+    form = MovieAdminForm(data={"title": "Admin", "description": "a", "processing_status": "pending"},
+                          files={"video_file": upload})
+    assert not form.is_valid()
+    assert "Unplayable video: unknown duration" in form.errors["video_file"][0]
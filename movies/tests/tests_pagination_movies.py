@@ -0,0 +1,104 @@
+# movies/tests/tests_pagination_movies.py
+from __future__ import annotations
+
+from datetime import timedelta
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+
+from movies.models import Favorite, Genre, Movie
+from movies.pagination import KeysetPagination
+
+
+def _movies(n, genre=None, same_time=False):
+    base = timezone.now()
+    movies = []
+    for i in range(n):
+        m = Movie.objects.create(title=f"Page {i}", description="d", genre=genre, video_file=f"uploads/page-{i}.mp4")
+        # identical timestamps exercise the id tie-breaker
+        created = base if same_time else base - timedelta(minutes=i)
+        Movie.objects.filter(pk=m.pk).update(created_at=created, processing_status="ready")
+        movies.append(m)
+    return movies
+
+
+def _walk(api_client, url, params=None):
+    pages, res = [], api_client.get(url, params or {})
+    while True:
+        assert res.status_code == 200
+        pages.append([m["id"] for m in res.data])
+        link = res.get("Link")
+        if not link:
+            return pages, res
+        assert link.endswith('>; rel="next"')
+        res = api_client.get(link[1:link.index(">")])
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("same_time", [False, True])
+def test_movie_list_pages_are_disjoint_and_complete(api_client, same_time):
+    movies = _movies(7, same_time=same_time)
+
+    pages, last = _walk(api_client, reverse("movie-list"), {"page_size": 3})
+
+    assert [len(p) for p in pages] == [3, 3, 1]
+    flat = [pk for p in pages for pk in p]
+    assert len(set(flat)) == 7
+    assert set(flat) == {m.pk for m in movies}
+    assert "X-Next-Cursor" not in last
+
+
+@pytest.mark.django_db
+def test_movie_list_is_newest_first(api_client):
+    movies = _movies(4)
+    res = api_client.get(reverse("movie-list"), {"page_size": 2})
+    assert [m["id"] for m in res.data] == [movies[0].pk, movies[1].pk]
+    assert res["X-Next-Cursor"]
+
+
+@pytest.mark.django_db
+def test_genre_and_search_are_paginated(api_client):
+    genre = Genre.objects.create(name="Paged", slug="paged")
+    _movies(5, genre=genre)
+
+    pages, _ = _walk(api_client, reverse("genre-movies", kwargs={"slug": "paged"}), {"page_size": 2})
+    assert [len(p) for p in pages] == [2, 2, 1]
+
+    pages, _ = _walk(api_client, reverse("movie-search"), {"q": "Page", "page_size": 4})
+    assert [len(p) for p in pages] == [4, 1]
+
+
+@pytest.mark.django_db
+def test_invalid_cursor_is_404(api_client):
+    _movies(2)
+    res = api_client.get(reverse("movie-list"), {"cursor": "not-a-cursor"})
+    assert res.status_code == 404
+
+
+@pytest.mark.django_db
+def test_page_size_is_clamped(api_client, settings):
+    settings.MOVIE_MAX_PAGE_SIZE = 2
+    _movies(3)
+    assert len(api_client.get(reverse("movie-list"), {"page_size": 500}).data) == 2
+    assert len(api_client.get(reverse("movie-list"), {"page_size": 0}).data) == 1
+    assert len(api_client.get(reverse("movie-list"), {"page_size": "x"}).data) == 2
+
+
+@pytest.mark.django_db
+def test_favorites_are_paged_by_favorite_time(api_client, user):
+    movies = _movies(3)
+    now = timezone.now()
+    # favorited oldest movie last: it comes first
+    for i, m in enumerate(movies):
+        fav = Favorite.objects.create(user=user, movie=m)
+        Favorite.objects.filter(pk=fav.pk).update(created_at=now + timedelta(minutes=i))
+
+    pages, _ = _walk(api_client, reverse("favorites"), {"page_size": 2})
+
+    assert pages == [[movies[2].pk, movies[1].pk], [movies[0].pk]]
+
+
+def test_cursor_round_trip():
+    moment = timezone.now()
+    assert KeysetPagination.decode_cursor(KeysetPagination.encode_cursor(moment, 42)) == (moment, 42)
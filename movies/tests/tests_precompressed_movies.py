@@ -0,0 +1,106 @@
+# movies/tests/tests_precompressed_movies.py
+from __future__ import annotations
+
+import gzip
+import json
+
+import pytest
+from django.urls import reverse
+
+import movies.precompressed as precompressed
+from movies.catalog import bump_catalog_version
+from movies.models import Favorite, Movie
+from movies.precompressed import negotiate
+
+
+@pytest.fixture
+def catalog(db):
+    made = []
+    for i in range(8):
+        m = Movie.objects.create(title=f"Compressed {i}", description="d", video_file=f"uploads/gz-{i}.mp4")
+        Movie.objects.filter(pk=m.pk).update(processing_status="ready")
+        made.append(m)
+    bump_catalog_version()
+    return made
+
+
+def _count(monkeypatch, compressors):
+    calls = []
+    real = compressors["gzip"]
+    monkeypatch.setitem(compressors, "gzip", lambda body: calls.append(body) or real(body))
+    return calls
+
+
+@pytest.fixture
+def counted(monkeypatch):
+    return _count(monkeypatch, precompressed.COMPRESSORS)
+
+
+@pytest.fixture
+def counted_fast(monkeypatch):
+    return _count(monkeypatch, precompressed.FAST_COMPRESSORS)
+
+
+def test_negotiate_prefers_client_weight_then_server_order(monkeypatch):
+    monkeypatch.setattr(precompressed, "COMPRESSORS", {"br": None, "zstd": None, "gzip": None})
+    assert negotiate("gzip, deflate, br, zstd") == "br"
+    assert negotiate("br;q=0.5, gzip") == "gzip"
+    assert negotiate("zstd;q=0.9, *;q=0.1") == "zstd"
+    assert negotiate("br;q=0, gzip;q=0") is None
+    assert negotiate("identity") is None and negotiate("") is None
+
+    monkeypatch.setattr(precompressed, "COMPRESSORS", {"gzip": None})
+    assert negotiate("br, zstd") is None
+    assert negotiate("br, *") == "gzip"
+
+
+@pytest.mark.django_db
+def test_list_is_served_precompressed_once(api_client, catalog, counted):
+    plain = api_client.get(reverse("movie-list"))
+
+    first = api_client.get(reverse("movie-list"), HTTP_ACCEPT_ENCODING="gzip, deflate")
+    second = api_client.get(reverse("movie-list"), HTTP_ACCEPT_ENCODING="gzip")
+
+    assert first["Content-Encoding"] == "gzip" and "Accept-Encoding" in first["Vary"]
+    assert first["Content-Type"] == "application/json"
+    assert json.loads(gzip.decompress(first.content)) == json.loads(plain.content)
+    assert second.content == first.content
+    assert len(counted) == 1
+
+
+@pytest.mark.django_db
+def test_pagination_headers_survive(api_client, catalog):
+    res = api_client.get(reverse("movie-list"), {"page_size": 3}, HTTP_ACCEPT_ENCODING="gzip")
+    assert res["Content-Encoding"] == "gzip"
+    assert "X-Next-Cursor" in res and 'rel="next"' in res["Link"]
+
+
+@pytest.mark.django_db
+def test_favorites_change_the_body(api_client, user, catalog, counted, counted_fast, settings):
+    settings.PRECOMPRESS_MIN_SIZE = 0
+    before = gzip.decompress(api_client.get(reverse("movie-home"), HTTP_ACCEPT_ENCODING="gzip").content)
+    Favorite.objects.create(user=user, movie=catalog[0])
+    after = gzip.decompress(api_client.get(reverse("movie-home"), HTTP_ACCEPT_ENCODING="gzip").content)
+
+    assert json.loads(before)["favorites"] == []
+    assert [m["id"] for m in json.loads(after)["favorites"]] == [catalog[0].pk]
+    assert len(counted) == 1 and len(counted_fast) == 1
+
+
+@pytest.mark.django_db
+def test_per_user_bodies_are_compressed_fast_and_not_cached(api_client, user, catalog, counted, counted_fast):
+    Favorite.objects.create(user=user, movie=catalog[0])
+    first = api_client.get(reverse("movie-list"), HTTP_ACCEPT_ENCODING="gzip")
+    second = api_client.get(reverse("movie-list"), HTTP_ACCEPT_ENCODING="gzip")
+
+    assert first["Content-Encoding"] == "gzip"
+    assert {m["id"]: m["is_favorite"] for m in json.loads(gzip.decompress(first.content))}[catalog[0].pk] is True
+    assert second.content == first.content
+    assert counted == [] and len(counted_fast) == 2
+
+
+@pytest.mark.django_db
+def test_plain_without_accept_encoding_or_for_small_bodies(api_client, catalog, settings):
+    assert "Content-Encoding" not in api_client.get(reverse("movie-list"))
+    settings.PRECOMPRESS_MIN_SIZE = 10 ** 6
+    assert "Content-Encoding" not in api_client.get(reverse("movie-list"), HTTP_ACCEPT_ENCODING="gzip")
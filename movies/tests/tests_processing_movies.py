@@ -0,0 +1,233 @@
+# movies/tests/tests_processing_movies.py
+from __future__ import annotations
+
+import time
+
+import pytest
+from django.core.files.base import ContentFile
+
+from movies.models import MediaInfo, Movie
+import movies.processing as processing
+import movies.tasks as tasks
+
+
+@pytest.fixture
+def media_tmp(tmp_path, settings):
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+@pytest.fixture
+def movie(db, media_tmp, queue, django_capture_on_commit_callbacks):
+    m = Movie.objects.create(title="Src", description="s")
+    with django_capture_on_commit_callbacks(execute=True):
+        m.video_file.save("input.mp4", ContentFile(b"fake-bytes"), save=True)
+    return m
+
+
+# -----------------------------
+# transition
+# -----------------------------
+@pytest.mark.django_db
+def test_transition_is_compare_and_set(movie):
+    Movie.objects.filter(pk=movie.pk).update(processing_status="pending")
+    assert processing.transition(movie.pk, "queued") is True
+    # second caller loses: queued -> queued is not an allowed transition
+    assert processing.transition(movie.pk, "queued") is False
+    assert processing.transition(movie.pk, "processing") is True
+    assert processing.transition(movie.pk, "ready") is True
+    movie.refresh_from_db()
+    assert movie.processing_status == "ready"
+
+
+# -----------------------------
+# signals / enqueue_processing
+# -----------------------------
+@pytest.mark.django_db
+def test_new_source_enqueues_exactly_once(movie, queue):
+    assert len(queue.jobs) == 1
+    func, args, kwargs = queue.jobs[0]
+    assert func == "movies.tasks.process_movie" and args == (movie.pk,)
+    assert kwargs["job_id"] == f"movie-{movie.pk}-transcode"
+    movie.refresh_from_db()
+    assert movie.processing_status == "queued"
+
+
+@pytest.mark.django_db
+def test_metadata_edit_and_pipeline_saves_do_not_enqueue(movie, queue):
+    queue.jobs.clear()
+    Movie.objects.filter(pk=movie.pk).update(processing_status="ready")
+    movie.refresh_from_db()
+
+    movie.description = "edited in admin"
+    movie.save()
+    movie.save(update_fields=["video_720", "processing_status"])
+    assert queue.jobs == []
+
+
+@pytest.mark.django_db
+def test_replaced_source_enqueues_again(movie, queue, django_capture_on_commit_callbacks):
+    queue.jobs.clear()
+    Movie.objects.filter(pk=movie.pk).update(processing_status="ready")
+    movie.refresh_from_db()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        movie.video_file.save("other.mp4", ContentFile(b"new-bytes"), save=True)
+    assert len(queue.jobs) == 1
+
+
+@pytest.mark.django_db
+def test_job_is_enqueued_only_on_commit(movie, queue, django_capture_on_commit_callbacks):
+    queue.jobs.clear()
+    Movie.objects.filter(pk=movie.pk).update(processing_status="ready")
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        assert processing.enqueue_processing(movie, force=True) is True
+        assert queue.jobs == []
+    for callback in callbacks:
+        callback()
+    assert queue.jobs[0][1] == (movie.pk,)
+
+
+@pytest.mark.django_db
+def test_force_is_refused_only_while_the_lock_is_held(movie, queue, django_capture_on_commit_callbacks):
+    queue.jobs.clear()
+    Movie.objects.filter(pk=movie.pk).update(processing_status="processing")
+    with processing.movie_lock(movie.pk):
+        assert processing.enqueue_processing(movie, force=True) is False
+
+    with django_capture_on_commit_callbacks(execute=True):
+        # 'processing' without a lock holder: the worker died, reprocessing takes it over
+        assert processing.enqueue_processing(movie, force=True) is True
+        Movie.objects.filter(pk=movie.pk).update(processing_status="queued")
+        assert processing.enqueue_processing(movie) is False
+        assert processing.enqueue_processing(movie, force=True) is True
+    assert len(queue.jobs) == 2
+
+
+@pytest.mark.django_db
+def test_job_timeout_scales_with_media_duration(movie, queue, settings):
+    assert queue.jobs[0][2]["job_timeout"] == processing.job_timeout_for(movie.pk)
+    settings.PIPELINE_STEP_TIMEOUT_BASE, settings.PIPELINE_STEP_TIMEOUT_FACTOR = 100, 2.0
+    settings.PIPELINE_STEP_TIMEOUT_MAX = 4 * 3600
+    # unknown duration: every full-length step may use the whole step ceiling
+    assert processing.job_timeout_for(movie.pk) == 4 * 4 * 3600 + 3 * 100
+
+    MediaInfo.objects.create(movie=movie, kind="source", file_name=movie.video_file.name, duration=3600.0)
+    assert processing.job_timeout_for(movie.pk) == 4 * (100 + 2 * 3600) + 3 * 100
+    Movie.objects.filter(pk=movie.pk).update(duration_seconds=600)
+    assert processing.job_timeout_for(movie.pk) == 4 * (100 + 2 * 600) + 3 * 100
+    assert processing.job_timeout_for(movie.pk, full_length_steps=1) == (100 + 2 * 600) + 3 * 100
+
+
+# -----------------------------
+# movie_lock / process_movie
+# -----------------------------
+def test_movie_lock_is_extended_while_held():
+    with processing.movie_lock(98, timeout=0.3) as acquired:
+        assert acquired is True
+        time.sleep(0.8)
+        assert processing.lock_held(98)
+    assert not processing.lock_held(98)
+
+
+def test_movie_lock_is_exclusive_and_released():
+    with processing.movie_lock(99) as first:
+        assert first is True
+        with processing.movie_lock(99) as second:
+            assert second is False
+    with processing.movie_lock(99) as again:
+        assert again is True
+
+
+@pytest.mark.django_db
+def test_process_movie_skips_when_locked(movie, monkeypatch):
+    called = {"n": 0}
+    monkeypatch.setattr(tasks, "_process_movie_locked", lambda movie_id: called.__setitem__("n", 1))
+    with processing.movie_lock(movie.pk):
+        tasks.process_movie(movie.pk)
+    assert called["n"] == 0
+
+
+@pytest.mark.django_db
+def test_process_movie_requeues_when_source_replaced_mid_run(movie, queue, monkeypatch, django_capture_on_commit_callbacks):
+    queue.jobs.clear()
+
+    def fake_locked(movie_id):
+        # admin swaps the source while we encode; the signal cannot enqueue (status 'processing')
+        Movie.objects.filter(pk=movie_id).update(processing_status="processing")
+        m = Movie.objects.get(pk=movie_id)
+        m.video_file.save("replacement.mp4", ContentFile(b"v2"), save=True)
+        Movie.objects.filter(pk=movie_id).update(processing_status="ready")
+        return "movies/videos/input.mp4"
+
+    monkeypatch.setattr(tasks, "_process_movie_locked", fake_locked)
+    with django_capture_on_commit_callbacks(execute=True):
+        tasks.process_movie(movie.pk)
+    assert len(queue.jobs) == 1
+
+
+@pytest.mark.django_db
+def test_reprocess_after_publish_is_not_overwritten(movie, queue, monkeypatch, django_capture_on_commit_callbacks):
+    queue.jobs.clear()
+
+    def fake_transcode(src, out_tmp, height, errors, audio=None):
+        if height == 1080:
+            # already published: a reprocess request flips it to 'queued'; its job bounces off our lock
+            assert processing.enqueue_processing(Movie.objects.get(pk=movie.pk)) is True
+        out_tmp.parent.mkdir(parents=True, exist_ok=True)
+        out_tmp.write_bytes(b"v")
+        return True
+
+    monkeypatch.setattr(tasks, "_probe_duration", lambda src: 60)
+    monkeypatch.setattr(tasks, "_safe_extract_audio", lambda src, out: None)
+    monkeypatch.setattr(tasks, "_safe_transcode", fake_transcode)
+    monkeypatch.setattr(tasks, "_frame_to_image", lambda *a, **k: None)
+    monkeypatch.setattr(tasks, "_build_teaser", lambda *a, **k: None)
+    with django_capture_on_commit_callbacks(execute=True):
+        tasks.process_movie(movie.pk)
+
+    movie.refresh_from_db()
+    assert movie.processing_status == "queued"
+    assert len(queue.jobs) == 2  # the bounced job, and the one enqueued after the run
+
+
+@pytest.mark.django_db
+def test_crash_after_publish_sends_status_changed(movie, monkeypatch, django_capture_on_commit_callbacks):
+    from movies.catalog import catalog_version
+
+    sent = []
+    receiver = lambda sender, movie_id, status, **kwargs: sent.append(status)
+    processing.status_changed.connect(receiver, sender=Movie)
+    monkeypatch.setattr(tasks.failures, "handle_failure", lambda *a, **k: None)
+
+    def fake_locked(movie_id):
+        Movie.objects.filter(pk=movie_id).update(processing_status="ready")
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(tasks, "_process_movie_locked", fake_locked)
+    before = catalog_version()
+    try:
+        with django_capture_on_commit_callbacks(execute=True):
+            tasks.process_movie(movie.pk)
+    finally:
+        processing.status_changed.disconnect(receiver, sender=Movie)
+
+    movie.refresh_from_db()
+    assert movie.processing_status == "failed"
+    assert sent == ["failed"]
+    # the catalog listeners see the crash, so the published movie leaves the cached pages
+    assert catalog_version() > before
+
+
+@pytest.mark.django_db
+def test_requeue_bounced_leaves_a_waiting_job_alone(movie, queue, monkeypatch, django_capture_on_commit_callbacks):
+    queue.jobs.clear()
+    waiting = type("Job", (), {"get_status": lambda self: "queued"})()
+    monkeypatch.setattr(queue, "fetch_job", lambda job_id: waiting)
+    assert processing.requeue_bounced(movie.pk) is False
+
+    monkeypatch.setattr(queue, "fetch_job", lambda job_id: None)
+    with django_capture_on_commit_callbacks(execute=True):
+        assert processing.requeue_bounced(movie.pk) is True
+    assert len(queue.jobs) == 1
@@ -0,0 +1,160 @@
+# movies/tests/tests_renditions_movies.py
+from __future__ import annotations
+
+from datetime import timedelta
+from pathlib import Path
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from movies.management.commands.evict_renditions import parse_size
+from movies.models import Movie, RenditionAccess
+from movies.processing import job_timeout_for
+import movies.renditions as renditions
+import movies.tasks as tasks
+
+
+@pytest.fixture
+def media_tmp(tmp_path, settings):
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+def _ready_movie(title, sizes, accessed_days_ago=None):
+    m = Movie.objects.create(title=title, description="d")
+    m.video_file.save(f"{title}.src.mp4", ContentFile(b"src"), save=False)
+    for quality, size in sizes.items():
+        getattr(m, f"video_{quality}").save(f"{title}.{quality}.mp4", ContentFile(b"v" * size), save=False)
+    m.save()
+    Movie.objects.filter(pk=m.pk).update(processing_status="ready")
+    m.refresh_from_db()
+    if accessed_days_ago is not None:
+        for quality in sizes:
+            RenditionAccess.objects.create(
+                movie=m, quality=quality, last_accessed_at=timezone.now() - timedelta(days=accessed_days_ago))
+    return m
+
+
+@pytest.mark.django_db
+def test_touch_is_throttled(media_tmp, queues):
+    m = _ready_movie("t", {"480": 1})
+    renditions.touch(m.pk, "720")
+    first = RenditionAccess.objects.get(movie=m, quality="720").last_accessed_at
+    renditions.touch(m.pk, "720")
+    renditions.touch(m.pk, "bogus")
+    assert RenditionAccess.objects.filter(movie=m).count() == 1
+    assert RenditionAccess.objects.get(movie=m, quality="720").last_accessed_at == first
+
+
+@pytest.mark.django_db
+def test_evict_cold_removes_least_recently_requested_first(media_tmp, queues, settings):
+    settings.RENDITION_MIN_IDLE_DAYS = 7
+    cold = _ready_movie("cold", {"1080": 100, "720": 50, "480": 20}, accessed_days_ago=60)
+    warm = _ready_movie("warm", {"1080": 100, "720": 50, "480": 20}, accessed_days_ago=30)
+    hot = _ready_movie("hot", {"1080": 100, "720": 50, "480": 20}, accessed_days_ago=1)
+    # total 510; budget forces 1080+720 of `cold` and 1080 of `warm` out
+    evicted = renditions.evict_cold(budget_bytes=300)
+
+    assert [(r["movie_id"], r["quality"]) for r in evicted][:2] in (
+        [(cold.pk, "1080"), (cold.pk, "720")], [(cold.pk, "720"), (cold.pk, "1080")])
+    assert (warm.pk, "1080") in [(r["movie_id"], r["quality"]) for r in evicted]
+    cold.refresh_from_db()
+    hot.refresh_from_db()
+    assert not cold.video_1080 and not cold.video_720 and cold.video_480  # 480p floor stays
+    assert hot.video_1080 and hot.video_720  # recently requested: never evicted
+    assert renditions.is_evicted(cold, "1080") and not renditions.is_evicted(hot, "1080")
+
+
+@pytest.mark.django_db
+def test_evict_cold_dry_run_and_disabled_budget(media_tmp, queues, settings):
+    m = _ready_movie("dry", {"1080": 100, "480": 20}, accessed_days_ago=60)
+    assert len(renditions.evict_cold(budget_bytes=50, dry_run=True)) == 1
+    settings.RENDITION_STORAGE_BUDGET = 0
+    assert renditions.evict_cold() == []
+    m.refresh_from_db()
+    assert m.video_1080
+
+
+@pytest.mark.django_db
+def test_stream_of_evicted_rendition_serves_fallback_and_regenerates(media_tmp, queues, queue):
+    m = _ready_movie("stream", {"1080": 100, "480": 20}, accessed_days_ago=60)
+    renditions.evict_cold(budget_bytes=50)
+    m.refresh_from_db()
+
+    user = get_user_model().objects.create_user(username="v@example.com", email="v@example.com", password="pw")
+    client = APIClient()
+    client.force_authenticate(user)
+    url = reverse("video-stream", args=[m.pk]) + "?q=1080"
+    resp = client.get(url)
+    assert resp.status_code == 200
+    assert b"".join(resp.streaming_content) == b"v" * 20  # 480p served meanwhile
+    client.get(url)  # second viewer: no duplicate job
+
+    assert queues["high"].jobs == [
+        ("movies.tasks.regenerate_rendition", (m.pk, 1080),
+         {"job_id": f"movie-{m.pk}-rendition-1080", "job_timeout": job_timeout_for(m.pk, full_length_steps=1)})]
+    assert all(job[0] != "movies.tasks.regenerate_rendition" for job in queue.jobs)
+
+
+@pytest.mark.django_db
+def test_regenerate_rendition_restores_field(media_tmp, queues, monkeypatch):
+    m = _ready_movie("regen", {"1080": 100, "480": 20}, accessed_days_ago=60)
+    renditions.evict_cold(budget_bytes=50)
+    renditions.request_regeneration(m, "1080")
+
+    def fake_safe_transcode(src, out_tmp, height, errors, audio=None):
+        Path(out_tmp).parent.mkdir(parents=True, exist_ok=True)
+        Path(out_tmp).write_bytes(b"n" * 10)
+        return True
+
+    monkeypatch.setattr(tasks, "_safe_transcode", fake_safe_transcode)
+    tasks.regenerate_rendition(m.pk, 1080)
+
+    m.refresh_from_db()
+    assert m.video_1080 and not renditions.is_evicted(m, "1080")
+    # pending marker cleared: a later eviction can be regenerated again
+    assert renditions.request_regeneration(m, "1080") is True
+
+
+@pytest.mark.django_db
+def test_process_job_arriving_during_regeneration_runs_afterwards(media_tmp, queue, monkeypatch,
+                                                                  django_capture_on_commit_callbacks):
+    m = _ready_movie("bounce", {"1080": 100, "480": 20}, accessed_days_ago=60)
+    renditions.evict_cold(budget_bytes=50)
+    queue.jobs.clear()
+
+    def fake_safe_transcode(src, out_tmp, height, errors, audio=None):
+        # a new source arrives; its transcode job bounces off the regeneration's lock
+        fresh = Movie.objects.get(pk=m.pk)
+        fresh.video_file.save("bounce.v2.mp4", ContentFile(b"v2"), save=True)
+        tasks.process_movie(m.pk)
+        Path(out_tmp).parent.mkdir(parents=True, exist_ok=True)
+        Path(out_tmp).write_bytes(b"n" * 10)
+        return True
+
+    monkeypatch.setattr(tasks, "_safe_transcode", fake_safe_transcode)
+    with django_capture_on_commit_callbacks(execute=True):
+        tasks.regenerate_rendition(m.pk, 1080)
+
+    m.refresh_from_db()
+    assert m.processing_status == "queued"
+    process_jobs = [job for job in queue.jobs if job[0] == "movies.tasks.process_movie"]
+    assert len(process_jobs) == 2  # the bounced one, and the one enqueued once the lock was released
+
+
+def test_parse_size():
+    assert parse_size("500G") == 500 * 1024 ** 3
+    assert parse_size("750m") == 750 * 1024 ** 2
+    assert parse_size("1024") == 1024
+
+
+@pytest.mark.django_db
+def test_evict_renditions_command_dry_run(media_tmp, queues, capsys):
+    _ready_movie("cmd", {"720": 100, "480": 20}, accessed_days_ago=60)
+    call_command("evict_renditions", "--budget", "50", "--dry-run")
+    assert "Would evict 1 rendition(s)" in capsys.readouterr().out
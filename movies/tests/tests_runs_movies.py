@@ -0,0 +1,127 @@
+# movies/tests/tests_runs_movies.py
+from __future__ import annotations
+
+import subprocess
+from datetime import timedelta
+from pathlib import Path
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from movies.models import Movie, ProcessingRun, ProcessingStep
+import movies.runs as runs
+import movies.tasks as tasks
+
+
+@pytest.fixture
+def movie(db, tmp_path, settings):
+    settings.MEDIA_ROOT = tmp_path
+    m = Movie.objects.create(title="Run", description="r")
+    m.video_file.save("input.mp4", ContentFile(b"fake-bytes"), save=True)
+    return m
+
+
+def _touch(p: Path, data: bytes = b"x"):
+    p.parent.mkdir(parents=True, exist_ok=True)
+    p.write_bytes(data)
+
+
+@pytest.mark.django_db
+def test_process_movie_records_run_and_steps(movie, monkeypatch):
+    monkeypatch.setattr(tasks, "_probe_duration", lambda src: 30)
+    monkeypatch.setattr(tasks, "_safe_extract_audio", lambda src, out: None)
+
+    def fake_safe_transcode(src, out_tmp, height, errors, audio=None):
+        if height == 1080:
+            errors.append("[1080p] rc=1 err=boom")
+            return False
+        _touch(Path(out_tmp), b"v" * height)
+        return True
+
+    monkeypatch.setattr(tasks, "_safe_transcode", fake_safe_transcode)
+    monkeypatch.setattr(tasks, "_frame_to_image", lambda *a, **k: _touch(Path(a[1])))
+    monkeypatch.setattr(tasks, "_cut_teaser", lambda *a, **k: _touch(Path(a[1])))
+
+    tasks.process_movie(movie.id)
+
+    run = ProcessingRun.objects.get(movie=movie)
+    assert run.status == "ready" and run.finished_at and run.worker_host
+    assert run.source_name == movie.video_file.name
+    steps = {s.name: s for s in run.steps.all()}
+    assert list(steps) == ["extract_audio", "transcode_480", "thumbnail", "transcode_720", "transcode_1080",
+                           "hero", "teaser"]
+    assert steps["transcode_720"].output_bytes == 720
+    assert steps["transcode_1080"].output_bytes is None
+    assert all(s.wall_seconds >= 0 for s in steps.values())
+
+
+@pytest.mark.django_db
+def test_run_attributes_subprocess_usage_to_active_step(movie, monkeypatch):
+    monkeypatch.setattr(tasks.governance, "governed_command", lambda cmd: cmd)
+
+    with runs.processing_run(movie.id):
+        runs.start(movie.video_file.name)
+        with runs.step("probe"):
+            tasks._run(["sh", "-c", "exit 0"])
+        with pytest.raises(subprocess.CalledProcessError):
+            with runs.step("broken"):
+                tasks._run(["sh", "-c", "exit 4"])
+
+    ok, broken = ProcessingStep.objects.order_by("id")
+    assert ok.exit_code == 0 and ok.encoder_settings == [["sh", "-c", "exit 0"]]
+    assert ok.peak_rss_kb and ok.cpu_seconds >= 0
+    assert broken.exit_code == 4 and "CalledProcessError" in broken.error
+
+
+@pytest.mark.django_db
+def test_escaping_exception_fails_the_run(movie):
+    with pytest.raises(RuntimeError):
+        with runs.processing_run(movie.id):
+            runs.start("x.mp4")
+            raise RuntimeError("worker crashed")
+    run = ProcessingRun.objects.get(movie=movie)
+    assert run.status == "failed" and "worker crashed" in run.error
+
+
+def test_steps_are_noops_without_a_run():
+    with runs.step("anything", outputs=[Path("/nonexistent")]):
+        runs.note_subprocess(["ffmpeg"], 0)
+    assert runs.start("x.mp4") is None
+
+
+@pytest.mark.django_db
+def test_summary_endpoint_orders_steps_by_total_wall_time(movie):
+    now = timezone.now()
+    run = ProcessingRun.objects.create(movie=movie, status="ready", started_at=now, finished_at=now,
+                                       wall_seconds=12, cpu_seconds=30)
+    for name, wall, code in (("transcode_1080", 9.0, 0), ("thumbnail", 1.0, 0), ("teaser", 2.0, 1)):
+        ProcessingStep.objects.create(run=run, name=name, started_at=now, wall_seconds=wall, exit_code=code)
+    # an old run outside the window
+    old = ProcessingRun.objects.create(movie=movie, status="ready", started_at=now - timedelta(days=90),
+                                       finished_at=now - timedelta(days=90), wall_seconds=100)
+    ProcessingStep.objects.create(run=old, name="thumbnail", started_at=old.started_at, wall_seconds=100)
+
+    staff = get_user_model().objects.create_user(username="s@example.com", email="s@example.com",
+                                                 password="pw", is_staff=True)
+    client = APIClient()
+    client.force_authenticate(staff)
+    resp = client.get(reverse("processing-summary"), {"days": 30})
+
+    assert resp.status_code == 200
+    assert resp.data["runs"]["count"] == 1
+    names = [s["name"] for s in resp.data["steps"]]
+    assert names == ["transcode_1080", "teaser", "thumbnail"]
+    assert resp.data["steps"][0]["share"] == 0.75
+    assert resp.data["steps"][1]["failures"] == 1
+
+
+@pytest.mark.django_db
+def test_summary_endpoint_is_staff_only(db):
+    user = get_user_model().objects.create_user(username="u@example.com", email="u@example.com", password="pw")
+    client = APIClient()
+    client.force_authenticate(user)
+    assert client.get(reverse("processing-summary")).status_code == 403
@@ -0,0 +1,106 @@
+# movies/tests/tests_search_movies.py
+from __future__ import annotations
+
+import pytest
+from django.db import connection
+from django.db.models import FloatField, Value
+from django.db.models.functions import Cast
+from django.urls import reverse
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from movies.models import Movie
+from movies.pagination import KeysetPagination
+import movies.search as search
+
+
+@pytest.mark.django_db
+def test_fallback_matches_title_and_description(api_client, make_movie):
+    a = make_movie("Nightfall", description="a quiet town")
+    b = make_movie("Daybreak", description="the night shift")
+    make_movie("Noon", description="nothing here")
+    make_movie("Night Pending", status="queued")
+
+    res = api_client.get(reverse("movie-search"), {"q": "night"})
+
+    assert res.status_code == 200
+    assert {m["id"] for m in res.data} == {a.pk, b.pk}
+
+
+@pytest.mark.django_db
+def test_empty_query_lists_ready_movies_newest_first(api_client, make_movie):
+    a = make_movie("First")
+    b = make_movie("Second")
+    res = api_client.get(reverse("movie-search"))
+    assert [m["id"] for m in res.data] == [b.pk, a.pk]
+
+
+@pytest.mark.django_db
+def test_postgres_query_uses_vector_and_trigram(monkeypatch):
+    monkeypatch.setattr(search, "is_postgres", lambda using="default": True)
+
+    qs, sort_field = search.search_movies(Movie.objects.all(), "stranger thngs")
+    sql = str(qs.query)
+
+    assert sort_field == "rank"
+    assert isinstance(qs.query.annotations["rank"].output_field, FloatField)  # double, not float4
+    assert "websearch_to_tsquery" in sql
+    assert "SIMILARITY" in sql.upper()
+    assert "search_vector" in sql
+
+
+@pytest.mark.django_db
+def test_migrate_hooks_are_noops_off_postgres(monkeypatch):
+    executed = []
+    monkeypatch.setattr(search, "is_postgres", lambda using="default": False)
+    with connection.execute_wrapper(lambda execute, sql, *a: executed.append(sql) or execute(sql, *a)):
+        search.create_extensions(sender=None)
+        search.install_search(sender=None)
+    assert executed == []
+
+
+def test_search_config_is_validated(settings):
+    settings.SEARCH_CONFIG = "german"
+    assert search.search_config() == "german"
+    settings.SEARCH_CONFIG = "german'); DROP TABLE x; --"
+    with pytest.raises(ValueError):
+        search.search_config()
+
+
+def test_cursor_carries_numeric_rank():
+    cursor = KeysetPagination.encode_cursor(0.4375, 7)
+    assert KeysetPagination.decode_cursor(cursor) == (0.4375, 7)
+
+
+def _pages(qs, sort_field, page_size=2):
+    """Walk `qs` page by page with KeysetPagination; returns the ids of every page."""
+    pages, cursor = [], None
+    while True:
+        params = {"page_size": page_size, **({"cursor": cursor} if cursor else {})}
+        paginator = KeysetPagination(sort_field=sort_field)
+        pages.append([m.pk for m in paginator.paginate_queryset(qs, Request(APIRequestFactory().get("/", params)))])
+        cursor = paginator.next_cursor
+        if not cursor:
+            return pages
+
+
+@pytest.mark.django_db
+def test_pages_across_tied_ranks(make_movie):
+    made = [make_movie(f"Tie {i}").pk for i in range(5)]
+    qs = Movie.objects.annotate(rank=Cast(Value(0.0607927), FloatField()))
+
+    pages = _pages(qs, "rank")
+
+    assert [pk for page in pages for pk in page] == sorted(made, reverse=True)
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(not search.is_postgres(), reason="needs PostgreSQL full-text search")
+def test_search_pages_across_tied_ranks_on_postgres(make_movie):
+    made = [make_movie("Tied night", description="same words", video_file=f"uploads/tied-{i}.mp4").pk for i in range(5)]
+    qs, sort_field = search.search_movies(Movie.objects.all(), "night")
+
+    pages = _pages(qs, sort_field)
+
+    assert sorted(pk for page in pages for pk in page) == sorted(made)
+    assert all(len(page) == 2 for page in pages[:-1])
@@ -0,0 +1,141 @@
+# movies/tests/tests_serializers_movies.py
+from __future__ import annotations
+
+import json
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from movies.catalog import bump_catalog_version
+from movies.models import Favorite, Genre, Movie
+from movies.serializers import (
+    MOVIE_FIELDS, MOVIE_LIST_FIELDS, MovieSerializer, MovieValuesSerializer, project, sparse_fields,
+)
+
+# URLconf without the file endpoints (see test_endpoints_are_reversed_only_for_rows_with_files)
+urlpatterns = []
+
+
+@pytest.fixture
+def movies(db, tmp_path, settings):
+    settings.MEDIA_ROOT = tmp_path
+    genre = Genre.objects.create(name="Equivalence")
+    bare = Movie.objects.create(title="Bare", description="", video_file="uploads/bare.mp4")
+    full = Movie.objects.create(title="Fülle & Co", description="with files", genre=genre, is_hero=True,
+                                duration_seconds=5400, video_file="uploads/full.mp4")
+    for field in ("logo", "hero_image", "thumbnail_image", "teaser_video", "video_1080", "video_720", "video_480"):
+        getattr(full, field).save(f"Fülle {field}.bin", ContentFile(b"x"), save=False)
+    full.save()
+    return [bare, full]
+
+
+def _request(user=None, host="testserver"):
+    request = Request(APIRequestFactory().get("/api/movies/", HTTP_HOST=host))
+    if user is not None:
+        request.user = user
+    return request
+
+
+def _both(movies, request, favorite_ids):
+    expected = MovieSerializer(movies, many=True, context={"request": request, "favorite_ids": favorite_ids}).data
+    rows = Movie.objects.filter(pk__in=[m.pk for m in movies]).order_by("id").values(*MovieValuesSerializer.COLUMNS)
+    actual = MovieValuesSerializer(request, favorite_ids=favorite_ids).serialize(rows)
+    return json.dumps(expected), json.dumps(actual)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("host", ["testserver", "api.example.com:8443"])
+def test_same_json_as_model_serializer(movies, host, settings):
+    settings.ALLOWED_HOSTS = ["*"]
+    user = get_user_model().objects.create_user(username="eq@example.com", email="eq@example.com", password="pw12345!")
+    expected, actual = _both(movies, _request(user, host), {movies[1].pk})
+    assert actual == expected
+
+
+@pytest.mark.django_db
+def test_same_json_with_site_base_url(movies, settings):
+    settings.SITE_BASE_URL = "https://cdn.example.com/"
+    user = get_user_model().objects.create_user(username="base@example.com", email="base@example.com", password="pw12345!")
+    expected, actual = _both(movies, _request(user), set())
+    assert actual == expected
+    assert "https://cdn.example.com/" in actual
+
+
+@pytest.mark.django_db
+def test_same_json_without_request_and_anonymous(movies):
+    expected, actual = _both(movies, None, None)
+    assert actual == expected
+    expected, actual = _both(movies, _request(), set())
+    assert actual == expected
+
+
+@pytest.mark.django_db
+def test_endpoints_are_reversed_only_for_rows_with_files(movies, settings):
+    # an URLconf without the file endpoints works as long as no row has those files
+    settings.ROOT_URLCONF = "movies.tests.tests_serializers_movies"
+    rows = Movie.objects.filter(pk=movies[0].pk).values(*MovieValuesSerializer.COLUMNS)
+    data = MovieValuesSerializer(_request()).serialize(rows)
+    assert [d["logo"] for d in data] == [None]
+
+
+@pytest.mark.django_db
+def test_favorite_fallback_without_ids(movies):
+    user = get_user_model().objects.create_user(username="fb@example.com", email="fb@example.com", password="pw12345!")
+    Favorite.objects.create(user=user, movie=movies[0])
+    expected, actual = _both(movies, _request(user), None)
+    assert actual == expected
+    assert json.loads(actual)[0]["is_favorite"] is True
+
+
+def _params(**params):
+    return Request(APIRequestFactory().get("/api/movies/", params))
+
+
+def test_sparse_fields_parsing():
+    assert sparse_fields(_params()) == MOVIE_FIELDS
+    assert sparse_fields(_params(), MOVIE_LIST_FIELDS) == MOVIE_LIST_FIELDS
+    assert sparse_fields(_params(fields="title, genre")) == ("id", "title", "genre")
+    assert "logo" not in sparse_fields(_params(omit="logo"), MOVIE_LIST_FIELDS)
+    assert sparse_fields(_params(fields="id,title", omit="title")) == ("id",)
+    with pytest.raises(ValidationError):
+        sparse_fields(_params(fields="title,secret"))
+
+
+@pytest.mark.django_db
+def test_values_serializer_reads_only_needed_columns(movies):
+    serializer = MovieValuesSerializer(_request(), favorite_ids=set(), fields=MOVIE_LIST_FIELDS)
+    assert "description" not in serializer.columns and "video_1080" not in serializer.columns
+    rows = Movie.objects.filter(pk__in=[m.pk for m in movies]).order_by("id").values(*serializer.columns)
+    full = MovieValuesSerializer(_request(), favorite_ids=set()).serialize(
+        Movie.objects.filter(pk__in=[m.pk for m in movies]).order_by("id").values(*MovieValuesSerializer.COLUMNS))
+    assert serializer.serialize(rows) == project(full, MOVIE_LIST_FIELDS)
+
+
+@pytest.mark.django_db
+def test_list_is_slim_by_default_and_honours_fields(api_client, movies):
+    cache.clear()
+    Movie.objects.update(processing_status="ready")
+    bump_catalog_version()
+
+    with CaptureQueriesContext(connection) as ctx:
+        slim = api_client.get(reverse("movie-list"))
+    assert all(tuple(item) == MOVIE_LIST_FIELDS for item in slim.data)
+    assert not any('"description"' in q["sql"] or '"video_1080"' in q["sql"] for q in ctx.captured_queries)
+
+    assert [tuple(i) for i in api_client.get(reverse("movie-list"), {"fields": "title"}).data] == [("id", "title")] * 2
+    assert "logo" not in api_client.get(reverse("movie-list"), {"omit": "logo"}).data[0]
+    full = api_client.get(reverse("movie-list"), {"fields": ",".join(MOVIE_FIELDS)}).data
+    assert {i["description"] for i in full} == {"", "with files"}
+    assert api_client.get(reverse("movie-list"), {"fields": "nope"}).status_code == 400
+
+    detail = api_client.get(reverse("movie-detail", args=[movies[1].pk]))
+    assert tuple(detail.data) == MOVIE_FIELDS
+    assert tuple(api_client.get(reverse("movie-detail", args=[movies[1].pk]), {"fields": "title"}).data) == ("id", "title")
@@ -0,0 +1,100 @@
+# movies/tests/tests_suggest_movies.py
+from __future__ import annotations
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from movies.models import Movie
+from movies.processing import transition
+import movies.suggest as suggest
+
+
+def test_prefixes_cover_every_word_sequence():
+    assert suggest.normalize("Amélie – Die fabelhafte Welt!") == "amelie die fabelhafte welt"
+    grams = suggest.prefixes("Stranger Things")
+    assert {"s", "stranger t", "stranger things", "t", "things"} <= grams
+    assert "tranger" not in grams
+    assert max(map(len, suggest.prefixes("A" * 64))) == suggest.MAX_PREFIX_LENGTH
+
+
+@pytest.mark.django_db
+def test_index_and_lookup_newest_first(redis, make_movie):
+    older = make_movie("Stranger Things")
+    newer = make_movie("Strange World")
+    Movie.objects.filter(pk=older.pk).update(created_at=newer.created_at.replace(year=2000))
+    older.refresh_from_db()
+    suggest.index_movie(older)
+    suggest.index_movie(newer)
+
+    assert [r["id"] for r in suggest.suggest("Stran")] == [newer.pk, older.pk]
+    assert suggest.suggest("stranger  TH") == [{"id": older.pk, "title": "Stranger Things"}]
+    assert suggest.suggest("world") == [{"id": newer.pk, "title": "Strange World"}]
+    assert suggest.suggest("Stran", limit=1)[0]["id"] == newer.pk
+    assert suggest.suggest("   ") == []
+
+
+@pytest.mark.django_db
+def test_signals_follow_rename_status_and_delete(redis, django_capture_on_commit_callbacks, make_movie):
+    m = make_movie("Old Name", status="processing")
+    with django_capture_on_commit_callbacks(execute=True):
+        transition(m.pk, "ready")
+    assert [r["id"] for r in suggest.suggest("old")] == [m.pk]
+
+    m.refresh_from_db()
+    with django_capture_on_commit_callbacks(execute=True):
+        m.title = "New Name"
+        m.save()
+    assert suggest.suggest("old") == []
+    assert [r["title"] for r in suggest.suggest("new n")] == ["New Name"]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        transition(m.pk, "queued")
+    assert suggest.suggest("new") == []
+
+    with django_capture_on_commit_callbacks(execute=True):
+        transition(m.pk, "processing")
+        transition(m.pk, "ready")
+    assert suggest.suggest("new")
+    with django_capture_on_commit_callbacks(execute=True):
+        m.delete()
+    assert suggest.suggest("new") == []
+    assert redis.hkeys(suggest._key("titles")) == []
+
+
+@pytest.mark.django_db
+def test_rebuild_drops_stale_entries(redis, make_movie):
+    ready = make_movie("Kept")
+    gone = make_movie("Gone", status="failed")
+    redis.hset(suggest._key("titles"), gone.pk, '{"id": %d, "title": "Gone"}' % gone.pk)
+    redis.zadd(suggest._key("p", "gone"), {gone.pk: 1})
+
+    assert suggest.rebuild() == 1
+    assert suggest.suggest("gone") == []
+    assert [r["id"] for r in suggest.suggest("kep")] == [ready.pk]
+
+
+@pytest.mark.django_db
+def test_fallback_without_redis_uses_title_prefix(make_movie):
+    m = make_movie("Fallback Film")
+    make_movie("Other Fallback")
+    assert suggest.index_movie(m) is False
+    assert suggest.suggest("fallb") == [{"id": m.pk, "title": "Fallback Film"}]
+
+
+@pytest.mark.django_db
+def test_endpoint_needs_no_database(redis, django_assert_num_queries, make_movie):
+    user = get_user_model().objects.create_user(username="typer@example.com", email="typer@example.com", password="pw12345!")
+    m = make_movie("Endpoint Movie")
+    suggest.index_movie(m)
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+
+    with django_assert_num_queries(0):
+        res = client.get(reverse("movie-suggest"), {"q": "endp"})
+
+    assert res.status_code == 200
+    assert res.data == [{"id": m.pk, "title": "Endpoint Movie"}]
+    assert APIClient().get(reverse("movie-suggest"), {"q": "endp"}).status_code == 401
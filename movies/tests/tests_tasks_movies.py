@@ -9,6 +9,7 @@ from django.core.files.base import ContentFile
 from django.contrib.auth import get_user_model
 
 from movies.models import Movie
+import movies.file_utils as file_utils
 import movies.tasks as tasks
 
 
@@ -68,7 +69,7 @@ def test_process_movie_ready_when_any_variant_ok(media_tmp, movie_with_source, m
     monkeypatch.setattr(tasks, "_probe_duration", lambda src: 61)
 
     # Fake transcoder: create files for 720p & 480p, fail 1080p
-    def fake_safe_transcode(src, out_tmp, height, errors):
+    def fake_safe_transcode(src, out_tmp, height, errors, audio=None):
         if height in (720, 480):
             _touch(Path(out_tmp))
             return True
@@ -77,11 +78,11 @@ def test_process_movie_ready_when_any_variant_ok(media_tmp, movie_with_source, m
 
     monkeypatch.setattr(tasks, "_safe_transcode", fake_safe_transcode)
 
-    # Fake asset builders: write temp outputs (so _save_tmp_to_field runs)
+    # Fake asset builders: write temp outputs (so save_tmp_to_field runs)
     monkeypatch.setattr(tasks, "_frame_to_image", lambda *a, **k: _touch(Path(a[1])))
     monkeypatch.setattr(tasks, "_cut_teaser",    lambda *a, **k: _touch(Path(a[1])))
 
-    # No-op _save_tmp_to_field side effects are real (it saves into storage),
+    # No-op save_tmp_to_field side effects are real (it saves into storage),
     # so we don't patch it.
 
     tasks.process_movie(m.id)
@@ -100,6 +101,37 @@ def test_process_movie_ready_when_any_variant_ok(media_tmp, movie_with_source, m
     assert err == "" or "rc=" in err
 
 
+# -----------------------------
+# process_movie: playable after the lowest rendition
+# -----------------------------
+@pytest.mark.django_db
+def test_process_movie_publishes_after_480_and_thumbnail(media_tmp, movie_with_source, monkeypatch):
+    m = movie_with_source
+    monkeypatch.setattr(tasks, "_probe_duration", lambda src: 60)
+    seen = {}
+
+    def fake_safe_transcode(src, out_tmp, height, errors, audio=None):
+        # state of the catalog row when the higher renditions start encoding
+        seen[height] = Movie.objects.values(
+            "processing_status", "video_480", "video_720", "thumbnail_image").get(pk=m.pk)
+        _touch(Path(out_tmp))
+        return True
+
+    monkeypatch.setattr(tasks, "_safe_transcode", fake_safe_transcode)
+    monkeypatch.setattr(tasks, "_frame_to_image", lambda *a, **k: _touch(Path(a[1])))
+    monkeypatch.setattr(tasks, "_cut_teaser", lambda *a, **k: _touch(Path(a[1])))
+
+    tasks.process_movie(m.id)
+
+    assert list(seen) == [480, 720, 1080]
+    assert seen[480]["processing_status"] == "processing"
+    assert seen[720]["processing_status"] == "ready"
+    assert seen[720]["video_480"] and seen[720]["thumbnail_image"] and not seen[720]["video_720"]
+    assert seen[1080]["video_720"]
+    m.refresh_from_db()
+    assert m.processing_status == "ready" and m.video_1080 and m.hero_image and m.teaser_video
+
+
 # -----------------------------
 # process_movie: all variants fail -> failed
 # -----------------------------
@@ -109,7 +141,7 @@ def test_process_movie_failed_when_no_variant_ok(media_tmp, movie_with_source, m
 
     monkeypatch.setattr(tasks, "_probe_duration", lambda src: None)
 
-    def always_fail(src, out_tmp, height, errors):
+    def always_fail(src, out_tmp, height, errors, audio=None):
         errors.append(f"[{height}p] rc=127 err=missing codec")
         return False
 
@@ -137,7 +169,7 @@ def test_process_movie_asset_error_keeps_ready(media_tmp, movie_with_source, mon
     monkeypatch.setattr(tasks, "_probe_duration", lambda src: 42)
 
     # Make 720p succeed so "any_ok" is True
-    def ok_only_720(src, out_tmp, height, errors):
+    def ok_only_720(src, out_tmp, height, errors, audio=None):
         if height == 720:
             _touch(Path(out_tmp))
             return True
@@ -171,7 +203,7 @@ def test_process_movie_does_not_overwrite_existing_duration(media_tmp, movie_wit
 
     monkeypatch.setattr(tasks, "_probe_duration", lambda src: 10)
 
-    def ok_480(src, out_tmp, height, errors):
+    def ok_480(src, out_tmp, height, errors, audio=None):
         if height == 480:
             _touch(Path(out_tmp))
             return True
@@ -222,4 +254,225 @@ def test__safe_transcode_collects_errors(monkeypatch, tmp_path):
     errs = []
     monkeypatch.setattr(tasks, "_transcode", raise_other)
     ok = tasks._safe_transcode(Path("in.mp4"), tmp_path / "o.mp4", 720, errs)
-    assert ok is False and "unexpected" in errs[-1]
\ No newline at end of file
+    assert ok is False and "unexpected" in errs[-1]
+
+# -----------------------------
+# save_tmp_to_field: promotion into filesystem storage
+# -----------------------------
+def _fs_field(root: Path):
+    from django.core.files.storage import FileSystemStorage
+    m = Movie(title="fs")
+    m.video_720.storage = FileSystemStorage(location=str(root))
+    return m.video_720
+
+
+def test_save_tmp_to_field_renames_into_filesystem_storage(tmp_path):
+    field = _fs_field(tmp_path / "media")
+    tmp = tmp_path / "media" / "tmp" / "movie_1.720.mp4"
+    _touch(tmp, b"rendition")
+    inode = tmp.stat().st_ino
+
+    file_utils.save_tmp_to_field(field, tmp, "movie_1.720.mp4")
+
+    final = tmp_path / "media" / "movies" / "variants" / "movie_1.720.mp4"
+    assert field.name == "movies/variants/movie_1.720.mp4"
+    assert final.read_bytes() == b"rendition"
+    assert final.stat().st_ino == inode  # moved, not copied
+    assert not tmp.exists()
+
+
+def test_save_tmp_to_field_replaces_existing_without_suffix(tmp_path):
+    field = _fs_field(tmp_path)
+    final = tmp_path / "movies" / "variants" / "movie_1.720.mp4"
+    _touch(final, b"old")
+    tmp = tmp_path / "tmp" / "new.mp4"
+    _touch(tmp, b"new")
+
+    file_utils.save_tmp_to_field(field, tmp, "movie_1.720.mp4")
+
+    assert field.name == "movies/variants/movie_1.720.mp4"
+    assert final.read_bytes() == b"new"
+    assert sorted(p.name for p in final.parent.iterdir()) == ["movie_1.720.mp4"]
+
+
+def test_promote_file_copies_across_filesystems(tmp_path, monkeypatch):
+    import errno
+    real_replace = file_utils.os.replace
+    calls = {"n": 0}
+
+    def replace_exdev_once(src, dst):
+        calls["n"] += 1
+        if calls["n"] == 1:
+            raise OSError(errno.EXDEV, "cross-device link")
+        return real_replace(src, dst)
+
+    monkeypatch.setattr(file_utils.os, "replace", replace_exdev_once)
+    tmp = tmp_path / "scratch" / "a.mp4"
+    _touch(tmp, b"data")
+    dest = tmp_path / "media" / "a.mp4"
+
+    file_utils.promote_file(tmp, dest)
+
+    assert dest.read_bytes() == b"data"
+    assert not tmp.exists()
+    assert not (tmp_path / "media" / "a.mp4.partial").exists()
+
+
+def test__scratch_dir_uses_setting(tmp_path, settings):
+    settings.MEDIA_ROOT = tmp_path / "media"
+    settings.TRANSCODE_SCRATCH_DIR = None
+    assert tasks._scratch_dir() == tmp_path / "media" / "tmp"
+    settings.TRANSCODE_SCRATCH_DIR = str(tmp_path / "fast")
+    assert tasks._scratch_dir() == tmp_path / "fast"
+    assert (tmp_path / "fast").is_dir()
+
+
+# -----------------------------
+# shared audio track
+# -----------------------------
+def _capture_run(monkeypatch):
+    cmds = []
+    monkeypatch.setattr(tasks, "_run", lambda cmd: cmds.append(cmd))
+    return cmds
+
+
+@pytest.mark.parametrize("codec,expected", [("aac", ["-c:a", "copy"]), ("opus", ["-c:a", "aac", "-b:a", "128k"])])
+def test__extract_audio_copies_aac_and_encodes_others(monkeypatch, tmp_path, codec, expected):
+    cmds = _capture_run(monkeypatch)
+    monkeypatch.setattr(tasks, "_probe_audio_codec", lambda src: codec)
+    assert tasks._extract_audio(Path("in.mkv"), tmp_path / "a.m4a") is True
+    cmd = cmds[-1]
+    assert "-vn" in cmd and cmd[cmd.index("-c:a"):cmd.index("-c:a") + len(expected)] == expected
+
+
+def test__extract_audio_without_audio_stream(monkeypatch, tmp_path):
+    cmds = _capture_run(monkeypatch)
+    monkeypatch.setattr(tasks, "_probe_audio_codec", lambda src: None)
+    assert tasks._extract_audio(Path("in.mp4"), tmp_path / "a.m4a") is False
+    assert tasks._safe_extract_audio(Path("in.mp4"), tmp_path / "a.m4a") is None
+    assert cmds == []
+
+
+def test__transcode_with_shared_audio_is_video_only_encode(monkeypatch, tmp_path):
+    cmds = _capture_run(monkeypatch)
+    tasks._transcode(Path("in.mp4"), tmp_path / "o.mp4", 720, audio=tmp_path / "a.m4a")
+    cmd = cmds[-1]
+    assert cmd.count("-i") == 2 and str(tmp_path / "a.m4a") in cmd
+    assert "1:a:0" in cmd and "0:a?" not in cmd
+    assert cmd[cmd.index("-c:a") + 1] == "copy" and "-b:a" not in cmd
+
+    tasks._transcode(Path("in.mp4"), tmp_path / "o.mp4", 720)
+    legacy = cmds[-1]
+    assert "0:a?" in legacy and legacy[legacy.index("-c:a") + 1] == "aac"
+
+
+@pytest.mark.django_db
+def test_process_movie_muxes_one_audio_track_into_all_outputs(media_tmp, movie_with_source, monkeypatch):
+    m = movie_with_source
+    monkeypatch.setattr(tasks, "_probe_duration", lambda src: 30)
+    extracted = []
+
+    def fake_extract(src, out_tmp):
+        extracted.append(out_tmp)
+        _touch(out_tmp)
+        return out_tmp
+
+    seen = []
+
+    def fake_safe_transcode(src, out_tmp, height, errors, audio=None):
+        seen.append(audio)
+        _touch(Path(out_tmp))
+        return True
+
+    teaser_audio = []
+    monkeypatch.setattr(tasks, "_safe_extract_audio", fake_extract)
+    monkeypatch.setattr(tasks, "_safe_transcode", fake_safe_transcode)
+    monkeypatch.setattr(tasks, "_frame_to_image", lambda *a, **k: _touch(Path(a[1])))
+    monkeypatch.setattr(tasks, "_cut_teaser", lambda *a, **k: (teaser_audio.append(k.get("audio")), _touch(Path(a[1]))))
+
+    tasks.process_movie(m.id)
+
+    assert len(extracted) == 1
+    assert seen == [extracted[0]] * 3 and teaser_audio == [extracted[0]]
+    assert not extracted[0].exists()  # shared track cleaned up
+
+
+# -----------------------------
+# teaser: stream copy from the 720p rendition
+# -----------------------------
+@pytest.fixture
+def teaser_calls(monkeypatch):
+    calls = {"copy": [], "encode": []}
+    monkeypatch.setattr(tasks, "_copy_teaser", lambda src, out, start, duration: calls["copy"].append((src, start)))
+    monkeypatch.setattr(tasks, "_cut_teaser", lambda src, out, start, **k: calls["encode"].append((src, start)))
+    return calls
+
+
+def test__build_teaser_copies_matching_rendition_from_nearest_keyframe(tmp_path, monkeypatch, teaser_calls):
+    r720 = tmp_path / "720.mp4"
+    _touch(r720)
+    monkeypatch.setattr(tasks, "_probe_video_stream", lambda src: {"codec_name": "h264", "width": 1280, "height": 720})
+    monkeypatch.setattr(tasks, "_nearest_keyframe", lambda src, around: 11.5)
+
+    tasks._build_teaser(r720, tmp_path / "src.mp4", tmp_path / "t.mp4", 12, duration=8)
+
+    assert teaser_calls["copy"] == [(r720, 11.5)] and teaser_calls["encode"] == []
+
+
+@pytest.mark.parametrize("stream", [
+    {"codec_name": "hevc", "width": 1280, "height": 720},
+    {"codec_name": "h264", "width": 960, "height": 720},   # 4:3 source needs letterboxing
+    None,
+])
+def test__build_teaser_reencodes_when_rendition_does_not_fit(tmp_path, monkeypatch, teaser_calls, stream):
+    r720 = tmp_path / "720.mp4"
+    _touch(r720)
+    monkeypatch.setattr(tasks, "_probe_video_stream", lambda src: stream)
+
+    tasks._build_teaser(r720, tmp_path / "src.mp4", tmp_path / "t.mp4", 12, duration=8)
+
+    assert teaser_calls["copy"] == [] and teaser_calls["encode"] == [(tmp_path / "src.mp4", 12)]
+
+
+def test__build_teaser_falls_back_when_copy_fails_or_mode_encode(tmp_path, monkeypatch, settings, teaser_calls):
+    r720 = tmp_path / "720.mp4"
+    _touch(r720)
+    monkeypatch.setattr(tasks, "_probe_video_stream", lambda src: {"codec_name": "h264", "width": 1280, "height": 720})
+    monkeypatch.setattr(tasks, "_nearest_keyframe", lambda src, around: None)
+
+    def broken_copy(*a, **k):
+        raise subprocess.CalledProcessError(1, ["ffmpeg"], stderr="x")
+
+    monkeypatch.setattr(tasks, "_copy_teaser", broken_copy)
+    tasks._build_teaser(r720, tmp_path / "src.mp4", tmp_path / "t.mp4", 12, duration=8)
+    assert len(teaser_calls["encode"]) == 1
+
+    settings.TEASER_MODE = "encode"
+    tasks._build_teaser(r720, tmp_path / "src.mp4", tmp_path / "t.mp4", 12, duration=8)
+    assert len(teaser_calls["encode"]) == 2
+
+
+def test__nearest_keyframe_parses_ffprobe_output(monkeypatch):
+    out = "4.004000\n8.008000,\n12.012000\n"
+    monkeypatch.setattr(tasks.subprocess, "run",
+                        lambda *a, **k: subprocess.CompletedProcess(a[0], 0, stdout=out, stderr=""))
+    assert tasks._nearest_keyframe(Path("v.mp4"), 9.0) == 8.008
+    monkeypatch.setattr(tasks.subprocess, "run",
+                        lambda *a, **k: subprocess.CompletedProcess(a[0], 0, stdout="", stderr=""))
+    assert tasks._nearest_keyframe(Path("v.mp4"), 9.0) is None
+
+
+# -----------------------------
+# _run: governed subprocess
+# -----------------------------
+def test__run_applies_governance_and_raises_with_stderr(monkeypatch):
+    seen = {}
+    monkeypatch.setattr(tasks.governance, "wait_for_capacity", lambda: seen.setdefault("admitted", True))
+    monkeypatch.setattr(tasks.governance, "governed_command", lambda cmd: seen.setdefault("cmd", cmd) and cmd)
+    monkeypatch.setattr(tasks.governance, "attach_to_cgroup", lambda pid: seen.setdefault("pid", pid))
+
+    with pytest.raises(subprocess.CalledProcessError) as exc:
+        tasks._run(["sh", "-c", "echo broken >&2; exit 3"])
+
+    assert exc.value.returncode == 3 and "broken" in exc.value.stderr
+    assert seen["admitted"] and seen["cmd"][0] == "sh" and seen["pid"] > 0
@@ -0,0 +1,192 @@
+# movies/tests/tests_uploads_movies.py
+from __future__ import annotations
+
+import hashlib
+import io
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from movies.models import Movie, UploadSession
+from movies.uploads import UploadError, append_chunk, staging_path
+import movies.tasks as tasks
+
+
+@pytest.fixture(autouse=True)
+def probe(monkeypatch):
+    """Uploads are probed on completion; pretend ffprobe found a playable video."""
+    fields = {"width": 1280, "height": 720, "video_codec": "h264", "duration": 12.0, "bitrate": 800_000}
+    monkeypatch.setattr("movies.uploads.check_source", lambda path: dict(fields))
+    return fields
+
+
+@pytest.fixture
+def staff_client(db, tmp_path, settings, queue):
+    settings.MEDIA_ROOT = tmp_path
+    settings.UPLOAD_STAGING_DIR = str(tmp_path / "staging")
+    user = get_user_model().objects.create_user(
+        username="staff@example.com", email="staff@example.com", password="pw", is_staff=True
+    )
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.fixture
+def movie(db):
+    return Movie.objects.create(title="Upload target", description="d")
+
+
+PAYLOAD = bytes(range(256)) * 40  # 10240 bytes
+
+
+def _create(client, movie, length=len(PAYLOAD)):
+    return client.post(
+        reverse("upload-create"), {"movie": movie.pk, "filename": "../clips/source.mp4", "length": length},
+        format="json",
+    )
+
+
+def _run_finish_jobs(queues):
+    """Run the queued finish jobs (the recording queue never runs anything)."""
+    for func, args, kwargs in queues["high"].jobs:
+        assert func == "movies.tasks.finish_upload" and kwargs == {"job_id": f"upload-{args[0]}-finish"}
+        tasks.finish_upload(*args)
+
+
+def _patch(client, session_id, offset, chunk):
+    return client.generic(
+        "PATCH",
+        reverse("upload-session", args=[session_id]),
+        data=chunk,
+        content_type="application/offset+octet-stream",
+        HTTP_UPLOAD_OFFSET=str(offset),
+    )
+
+
+@pytest.mark.django_db
+def test_create_session_returns_location_and_offset(staff_client, movie):
+    resp = _create(staff_client, movie)
+    assert resp.status_code == 201
+    assert resp["Upload-Offset"] == "0"
+    assert resp["Location"].endswith(f"/uploads/{resp.data['id']}/")
+    session = UploadSession.objects.get(pk=resp.data["id"])
+    assert session.filename == "source.mp4"
+    assert session.created_by.username == "staff@example.com"
+
+
+@pytest.mark.django_db
+def test_non_staff_cannot_upload(db, movie):
+    user = get_user_model().objects.create_user(username="u@example.com", email="u@example.com", password="pw")
+    client = APIClient()
+    client.force_authenticate(user)
+    assert _create(client, movie).status_code == 403
+
+
+@pytest.mark.django_db
+def test_length_above_limit_is_rejected(staff_client, movie, settings):
+    settings.UPLOAD_MAX_SIZE = 100
+    assert _create(staff_client, movie, length=101).status_code == 400
+
+
+@pytest.mark.django_db
+def test_chunks_resume_and_complete(staff_client, movie, queue, queues, django_capture_on_commit_callbacks):
+    session_id = _create(staff_client, movie).data["id"]
+
+    first = _patch(staff_client, session_id, 0, PAYLOAD[:4000])
+    assert first.status_code == 200
+    assert first["Upload-Offset"] == "4000"
+
+    # client lost track: HEAD tells it where to resume
+    head = staff_client.head(reverse("upload-session", args=[session_id]))
+    assert head["Upload-Offset"] == "4000"
+    assert head["Cache-Control"] == "no-store"
+
+    # a chunk at the wrong offset is refused and changes nothing
+    stale = _patch(staff_client, session_id, 0, PAYLOAD[:4000])
+    assert stale.status_code == 409
+    assert stale["Upload-Offset"] == "4000"
+
+    with django_capture_on_commit_callbacks(execute=True):
+        last = _patch(staff_client, session_id, 4000, PAYLOAD[4000:])
+    # the request only appends; hashing, probing and attaching are a job
+    assert last.status_code == 202
+    assert last.data["completed"] is False and last.data["offset"] == len(PAYLOAD)
+    assert queue.jobs == []
+    assert staff_client.delete(reverse("upload-session", args=[session_id])).status_code == 409
+
+    with django_capture_on_commit_callbacks(execute=True):
+        _run_finish_jobs(queues)
+    done = staff_client.get(reverse("upload-session", args=[session_id]))
+    assert done.data["completed"] is True
+    assert done.data["sha256"] == hashlib.sha256(PAYLOAD).hexdigest()
+
+    movie.refresh_from_db()
+    assert movie.video_file.name.endswith(".mp4")
+    with movie.video_file.open("rb") as fh:
+        assert fh.read() == PAYLOAD
+    assert movie.processing_status == "queued"
+    assert [job[0] for job in queue.jobs] == ["movies.tasks.process_movie"]
+    info = movie.media_info.get(kind="source")
+    assert info.file_name == movie.video_file.name and info.duration == 12.0
+    assert not staging_path(UploadSession.objects.get(pk=session_id)).exists()
+
+
+@pytest.mark.django_db
+def test_body_is_read_outside_the_row_lock(staff_client, movie, queues, django_capture_on_commit_callbacks):
+    session = UploadSession.objects.get(pk=_create(staff_client, movie).data["id"])
+    outer = len(connection.atomic_blocks)
+
+    class Body(io.BytesIO):
+        def read(self, size=-1):
+            assert len(connection.atomic_blocks) == outer  # no transaction / row lock while streaming
+            return super().read(size)
+
+    assert append_chunk(session, Body(PAYLOAD[:5000]), 0, 5000) == 5000
+    with django_capture_on_commit_callbacks(execute=True):
+        assert append_chunk(session, Body(PAYLOAD[5000:]), 5000, len(PAYLOAD) - 5000) == len(PAYLOAD)
+    _run_finish_jobs(queues)
+    session.refresh_from_db()
+    assert session.sha256 == hashlib.sha256(PAYLOAD).hexdigest()
+    assert list(staging_path(session).parent.iterdir()) == []  # chunk files are cleaned up
+
+
+@pytest.mark.django_db
+def test_chunk_for_an_aborted_session_is_refused(staff_client, movie):
+    session = UploadSession.objects.get(pk=_create(staff_client, movie).data["id"])
+    UploadSession.objects.filter(pk=session.pk).delete()
+    with pytest.raises(UploadError) as exc:
+        append_chunk(session, io.BytesIO(b"abc"), 0, 3)
+    assert exc.value.status == 404
+
+
+@pytest.mark.django_db
+def test_chunk_past_declared_length_is_rejected(staff_client, movie):
+    session_id = _create(staff_client, movie, length=10).data["id"]
+    assert _patch(staff_client, session_id, 0, b"x" * 11).status_code == 413
+
+
+@pytest.mark.django_db
+def test_patch_after_completion_conflicts(staff_client, movie, queues, django_capture_on_commit_callbacks):
+    session_id = _create(staff_client, movie, length=3).data["id"]
+    with django_capture_on_commit_callbacks(execute=True):
+        assert _patch(staff_client, session_id, 0, b"abc").status_code == 202
+    assert _patch(staff_client, session_id, 3, b"d").status_code == 409  # being finished
+    _run_finish_jobs(queues)
+    assert _patch(staff_client, session_id, 3, b"d").status_code == 409
+
+
+@pytest.mark.django_db
+def test_abort_discards_staged_bytes(staff_client, movie):
+    session_id = _create(staff_client, movie).data["id"]
+    _patch(staff_client, session_id, 0, PAYLOAD[:100])
+    path = staging_path(UploadSession.objects.get(pk=session_id))
+    assert path.exists()
+
+    resp = staff_client.delete(reverse("upload-session", args=[session_id]))
+    assert resp.status_code == 204
+    assert not path.exists()
+    assert not UploadSession.objects.filter(pk=session_id).exists()
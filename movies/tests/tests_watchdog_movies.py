@@ -0,0 +1,85 @@
+# movies/tests/tests_watchdog_movies.py
+from __future__ import annotations
+
+import subprocess
+import time
+
+import pytest
+
+import movies.watchdog as watchdog
+
+
+def _progress_cmd(script: str):
+    # "-progress" marks the command as progress-reporting (like our ffmpeg invocations)
+    return ["sh", "-c", script, "-progress"]
+
+
+def test_stalled_process_is_killed_quickly():
+    started = time.monotonic()
+    with pytest.raises(watchdog.StalledProcessError) as exc:
+        watchdog.run_supervised(_progress_cmd("echo out_time_us=1000; sleep 30"), stall_timeout=0.3, timeout=60)
+    assert time.monotonic() - started < 5
+    assert exc.value.returncode == -9
+    assert "stalled" in exc.value.stderr and "out_time_us=1000" in exc.value.stderr
+
+
+def test_moving_progress_keeps_process_alive():
+    script = "for i in 1 2 3 4 5 6; do echo out_time_us=$i; sleep 0.1; done; echo done >&2"
+    result = watchdog.run_supervised(_progress_cmd(script), stall_timeout=0.5, timeout=60)
+    assert result.returncode == 0
+    assert result.progress["out_time_us"] == "6"
+    assert "done" in result.stderr
+    assert result.rusage is not None and result.rusage.ru_maxrss > 0
+
+
+def test_step_timeout_kills_non_progress_command():
+    with pytest.raises(watchdog.StalledProcessError) as exc:
+        watchdog.run_supervised(["sleep", "30"], stall_timeout=0.1, timeout=0.3)
+    assert "timeout" in exc.value.reason
+
+
+def test_plain_command_output_and_exit_code():
+    calls = []
+    result = watchdog.run_supervised(["sh", "-c", "echo hi; exit 4"], on_start=calls.append)
+    assert result.returncode == 4 and result.stdout == "hi\n"
+    assert calls and calls[0] > 0
+
+
+def test_step_timeout_scales_with_media_duration(settings):
+    settings.PIPELINE_STEP_TIMEOUT_BASE = 100
+    settings.PIPELINE_STEP_TIMEOUT_FACTOR = 2
+    settings.PIPELINE_STEP_TIMEOUT_MAX = 1000
+    assert watchdog.step_timeout() == 1000
+    with watchdog.media_duration(60):
+        assert watchdog.step_timeout() == 220
+        watchdog.set_media_duration(5000)
+        assert watchdog.step_timeout() == 1000
+    assert watchdog.step_timeout() == 1000
+
+
+def test_with_progress_only_for_ffmpeg():
+    assert watchdog.with_progress(["ffmpeg", "-i", "x"]) == ["ffmpeg", "-progress", "pipe:1", "-nostats", "-i", "x"]
+    assert watchdog.with_progress(["ffprobe", "x"]) == ["ffprobe", "x"]
+
+
+def test_exception_in_supervisor_kills_child(monkeypatch):
+    # e.g. RQ's job timeout (SIGALRM) firing inside an in-process worker
+    started = []
+    real_popen = subprocess.Popen
+
+    def popen(*args, **kwargs):
+        proc = real_popen(*args, **kwargs)
+        started.append(proc)
+        return proc
+
+    class JobTimeout(Exception):
+        pass
+
+    def sleep(_):
+        raise JobTimeout()
+
+    monkeypatch.setattr(watchdog.subprocess, "Popen", popen)
+    monkeypatch.setattr(watchdog.time, "sleep", sleep)
+    with pytest.raises(JobTimeout):
+        watchdog.run_supervised(["sleep", "30"], timeout=60)
+    assert started[0].returncode is not None
@@ -0,0 +1,59 @@
+# movies/tests/tests_workers_movies.py
+from __future__ import annotations
+
+import os
+import signal
+import threading
+from pathlib import Path
+
+import pytest
+
+import movies.workers as workers
+
+
+def test_parse_pools():
+    assert workers.parse_pools(["high=2", "default=1", "high,default=3"]) == {
+        "high": 2, "default": 1, "high,default": 3}
+    with pytest.raises(ValueError):
+        workers.parse_pools(["high"])
+
+
+def test_preloaded_worker_recycles_stale_connections_around_jobs(monkeypatch):
+    calls = []
+    monkeypatch.setattr(workers, "close_old_connections", lambda: calls.append("close"))
+    monkeypatch.setattr(workers.SimpleWorker, "execute_job", lambda self, job, queue: calls.append("job"))
+    worker = workers.PreloadedWorker.__new__(workers.PreloadedWorker)
+    worker.execute_job(object(), object())
+    assert calls == ["close", "job", "close"]
+
+
+def _record_spawn(tmp_path: Path):
+    def main(queue_names, burst, max_jobs, fork_per_job):
+        (tmp_path / f"{'+'.join(queue_names)}-{os.getpid()}").write_text(f"{burst} {max_jobs} {fork_per_job}")
+    return main
+
+
+def test_run_pools_starts_configured_workers_per_queue(tmp_path, monkeypatch):
+    monkeypatch.setattr(workers, "preload", lambda: None)
+    monkeypatch.setattr(workers, "_worker_main", _record_spawn(tmp_path))
+
+    workers.run_pools({"high": 2, "high,default": 1}, burst=True, max_jobs=5, poll=0.01)
+
+    started = sorted(p.name.split("-")[0] for p in tmp_path.iterdir())
+    assert started == ["high", "high", "high+default"]
+    assert all(p.read_text() == "True 5 False" for p in tmp_path.iterdir())
+
+
+def test_run_pools_respawns_exited_workers_until_stopped(tmp_path, monkeypatch):
+    monkeypatch.setattr(workers, "preload", lambda: None)
+    monkeypatch.setattr(workers, "_worker_main", _record_spawn(tmp_path))
+    previous = signal.getsignal(signal.SIGTERM)
+    timer = threading.Timer(0.3, lambda: os.kill(os.getpid(), signal.SIGTERM))
+    timer.start()
+    try:
+        workers.run_pools({"default": 1}, burst=False, poll=0.02)
+    finally:
+        timer.cancel()
+    # the worker "exits" right away (like after max_jobs) and is replaced until SIGTERM
+    assert len(list(tmp_path.iterdir())) > 1
+    assert signal.getsignal(signal.SIGTERM) is previous
@@ -0,0 +1,153 @@
+# movies/uploads.py
+from __future__ import annotations
+
+import hashlib
+import shutil
+import uuid
+from pathlib import Path
+from typing import BinaryIO
+
+import django_rq
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .file_utils import save_tmp_to_field
+from .mediainfo import UnplayableSource, check_source, store
+from .models import UploadSession
+
+# Resumable uploads (tus-style): the client creates a session with the total length, then
+# PATCHes chunks at the current offset. Each chunk is received into its own file without any
+# lock, then appended to the staging file under a short row lock. When the last byte arrives,
+# a job on the high queue hashes and probes the file and moves it into Movie.video_file; the
+# last PATCH answers 202 and the client polls the session until it is completed (or has an error).
+
+READ_BLOCK = 1024 * 1024
+FINISH_JOB = "movies.tasks.finish_upload"
+
+
+class UploadError(Exception):
+    """Chunk rejected; `status` is the HTTP status to answer with."""
+
+    def __init__(self, detail: str, status: int):
+        super().__init__(detail)
+        self.detail = detail
+        self.status = status
+
+
+def staging_path(session: UploadSession) -> Path:
+    """Where the bytes of an unfinished upload live (UPLOAD_STAGING_DIR, default MEDIA_ROOT/uploads)."""
+    configured = getattr(settings, "UPLOAD_STAGING_DIR", None)
+    staging = Path(configured) if configured else Path(settings.MEDIA_ROOT) / "uploads"
+    staging.mkdir(parents=True, exist_ok=True)
+    return staging / f"{session.id}.part"
+
+
+def _check(session: UploadSession, offset: int, content_length: int) -> None:
+    if session.is_complete:
+        raise UploadError("Upload already completed.", 409)
+    if session.offset == session.length:
+        raise UploadError("Upload already received, it is being finished.", 409)
+    if offset != session.offset:
+        raise UploadError(f"Upload-Offset mismatch, server is at {session.offset}.", 409)
+    if session.offset + content_length > session.length:
+        raise UploadError("Chunk exceeds the declared upload length.", 413)
+
+
+def _receive(stream: BinaryIO, path: Path, content_length: int) -> int:
+    """Copy up to `content_length` bytes from `stream` into `path`; returns how many arrived."""
+    written = 0
+    with open(path, "wb") as out:
+        while written < content_length:
+            block = stream.read(min(READ_BLOCK, content_length - written))
+            if not block:
+                break
+            out.write(block)
+            written += len(block)
+    return written
+
+
+def _sha256(path: Path) -> str:
+    hasher = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(READ_BLOCK), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+def append_chunk(session: UploadSession, stream: BinaryIO, offset: int, content_length: int) -> int:
+    """
+    Append `content_length` bytes from `stream` at `offset` and return the new offset
+    (`session` is updated in place). The body is read before the session row is locked;
+    the lock only covers re-checking the offset, appending and saving the new offset.
+    The chunk that completes the upload queues `finish` (hash, probe, attach) instead of
+    running it in the request.
+    """
+    _check(session, offset, content_length)
+    path = staging_path(session)
+    chunk = path.with_name(f"{path.stem}.{uuid.uuid4().hex}.chunk")
+    try:
+        written = _receive(stream, chunk, content_length)
+        with transaction.atomic():
+            current = UploadSession.objects.select_for_update().filter(pk=session.pk).first()
+            if current is None:
+                raise UploadError("Upload was aborted.", 404)
+            session.offset, session.completed_at = current.offset, current.completed_at
+            _check(session, offset, written)
+            with open(path, "r+b" if path.exists() else "wb") as out, open(chunk, "rb") as src:
+                # drop bytes of an earlier chunk that was interrupted before its offset was saved
+                out.truncate(session.offset)
+                out.seek(session.offset)
+                shutil.copyfileobj(src, out, READ_BLOCK)
+            session.offset += written
+            session.save(update_fields=["offset", "updated_at"])
+    finally:
+        chunk.unlink(missing_ok=True)
+
+    if session.offset == session.length:
+        session_id = session.pk
+        transaction.on_commit(lambda: django_rq.get_queue("high").enqueue(
+            FINISH_JOB, session_id, job_id=f"upload-{session_id}-finish"))
+    return session.offset
+
+
+def is_finishing(session: UploadSession) -> bool:
+    """All bytes are in, but the finish job hasn't attached (or rejected) the file yet."""
+    return session.offset == session.length and not session.is_complete and not session.error
+
+
+def finish(session: UploadSession) -> None:
+    """
+    Hash and probe the completed staging file and attach it to the movie as its new
+    source (enqueues processing via signal). Runs as a queue job (movies.tasks.finish_upload).
+    An unplayable file is discarded before anything is queued; the session keeps the reason
+    in `error` for the client polling it.
+    """
+    movie = session.movie
+    staged = staging_path(session)
+    sha256 = _sha256(staged)
+    try:
+        info = check_source(staged)
+    except UnplayableSource as e:
+        staged.unlink(missing_ok=True)
+        session.error = f"Unplayable source: {e.reason}"[:255]
+        session.save(update_fields=["error", "updated_at"])
+        return
+
+    old_name = movie.video_file.name if movie.video_file else ""
+    save_tmp_to_field(movie.video_file, staged, session.filename, replace=False)
+    movie.save(update_fields=["video_file"])
+    if info is not None:
+        store(movie, "source", movie.video_file.name, info)
+    if old_name and old_name != movie.video_file.name:
+        movie.video_file.storage.delete(old_name)
+
+    session.sha256 = sha256
+    session.completed_at = timezone.now()
+    session.save(update_fields=["sha256", "completed_at", "updated_at"])
+
+
+def abort(session: UploadSession) -> None:
+    """Discard an unfinished upload and its staged bytes."""
+    staging_path(session).unlink(missing_ok=True)
+    session.delete()
@@ -6,13 +6,18 @@ from .views import (
     GenreMoviesView,
     HeroImageView,
     HeroListView,
+    HomeView,
     LogoView,
     MovieDetailView,
     MovieListCreateView,
+    ProcessingSummaryView,
     ResolveSpeedView,
     SearchMoviesView,
+    SuggestView,
     TeaserStreamView,
     ThumbnailView,
+    UploadSessionCreateView,
+    UploadSessionView,
     VideoStreamView,
 )
 
@@ -20,7 +25,9 @@ urlpatterns = [
     path("", MovieListCreateView.as_view(), name="movie-list"),
     path("<int:pk>/", MovieDetailView.as_view(), name="movie-detail"),
     path("heroes/", HeroListView.as_view(), name="movie-heroes"),
+    path("home/", HomeView.as_view(), name="movie-home"),
     path("search/", SearchMoviesView.as_view(), name="movie-search"),
+    path("suggest/", SuggestView.as_view(), name="movie-suggest"),
     path("genres/", GenreListView.as_view(), name="genre-list"),
     path("genres/<slug:slug>/", GenreMoviesView.as_view(), name="genre-movies"),
     path("<int:pk>/resolve-speed/", ResolveSpeedView.as_view(), name="resolve-speed"),
@@ -31,4 +38,7 @@ urlpatterns = [
     path("<int:pk>/hero-image/", HeroImageView.as_view(), name="hero-image"),
     path("<int:pk>/favorite/", FavoriteView.as_view(), name="favorite"),
     path("favorites/", FavoriteListView.as_view(), name="favorites"),
+    path("processing/summary/", ProcessingSummaryView.as_view(), name="processing-summary"),
+    path("uploads/", UploadSessionCreateView.as_view(), name="upload-create"),
+    path("uploads/<uuid:upload_id>/", UploadSessionView.as_view(), name="upload-session"),
 ]
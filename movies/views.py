@@ -1,16 +1,54 @@
 import mimetypes
-from django.db.models import Q
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
 from django.http import FileResponse
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
 from rest_framework.views import APIView
 from rest_framework import generics
 from rest_framework.response import Response
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework import status
+from rest_framework.throttling import ScopedRateThrottle
+from users.jwt_cookie_auth import StatelessCustomAuthentication
 from movies.funktions import check_or_404, choose_quality, get_random_flag, getSource, parse_limit, pick_random
-from .models import Favorite, Movie, Genre
-from .serializers import MovieSerializer, GenreSerializer
+from .models import Favorite, Movie, Genre, UploadSession
+from .serializers import (
+    MOVIE_LIST_FIELDS, GenreSerializer, MovieSerializer, UploadSessionSerializer, project, sparse_fields,
+)
+from . import heroes, mediainfo, renditions
+from .catalog import cached_payload, favorite_ids_for, top_per_genre, with_favorites
+from .fragments import FRAGMENT_FIELDS, movie_dicts
+from .pagination import KeysetPagination
+from .precompressed import encoded
+from .runs import summary as processing_summary
+from .search import search_movies
+from .suggest import suggest
+from .uploads import UploadError, abort, append_chunk, is_finishing
+
+
+def _catalog_page(view, request, name: str, qs, genre=None):
+    """
+    Keyset-paged movie list from the shared catalog cache, with the user's favorites merged in.
+    Items have the slim list shape unless ?fields= / ?omit= ask otherwise; the body is sent
+    pre-compressed when the client accepts it. `genre` is the slug `qs` is filtered by (part
+    of the cache key, like cursor, page size and fields).
+    """
+    paginator = KeysetPagination()
+    fields = sparse_fields(request, MOVIE_LIST_FIELDS)
+    params = {"genre": genre, "cursor": request.query_params.get(paginator.cursor_query_param),
+              "page_size": paginator.get_page_size(request), "fields": fields}
+
+    def build():
+        page = paginator.paginate_queryset(qs.only(*FRAGMENT_FIELDS), request, view=view)
+        return {"items": project(movie_dicts(page, request, fields), fields), "next": paginator.next_cursor}
+
+    payload = cached_payload(name, request, params, build)
+    paginator.request, paginator.next_cursor = request, payload["next"]
+    items = with_favorites(payload["items"], favorite_ids_for(request.user), fields)
+    shared = not any(item.get("is_favorite") for item in items)
+    return encoded(request, paginator.get_paginated_response(items), shared=shared)
 
 
 class MovieListCreateView(APIView):
@@ -18,13 +56,11 @@ class MovieListCreateView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        favorite_ids = set(Favorite.objects.filter(user=request.user).values_list("movie_id", flat=True))
         qs = Movie.objects.filter(processing_status="ready").order_by("-created_at")
         genre_slug = request.query_params.get("genre")
         if genre_slug:
             qs = qs.filter(genre__slug=genre_slug)
-        ser = MovieSerializer(qs, many=True, context={"request": request, "favorite_ids": favorite_ids})
-        return Response(ser.data, status=status.HTTP_200_OK)
+        return _catalog_page(self, request, "movies", qs, genre=genre_slug)
 
 
 class MovieDetailView(APIView):
@@ -32,28 +68,43 @@ class MovieDetailView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, pk: int):
-        movie = get_object_or_404(Movie, pk=pk, processing_status="ready")
-        ser = MovieSerializer(movie, context={"request": request})
-        return Response(ser.data, status=status.HTTP_200_OK)
+        movie = get_object_or_404(Movie.objects.only(*FRAGMENT_FIELDS), pk=pk, processing_status="ready")
+        fields = sparse_fields(request)
+        data = {**movie_dicts([movie], request, fields)[0]}
+        data["is_favorite"] = Favorite.objects.filter(user=request.user, movie_id=movie.pk).exists()
+        return Response(project([data], fields)[0], status=status.HTTP_200_OK)
 
 
 class SearchMoviesView(generics.ListAPIView):
     """Search movies by title or description. User must be logged in."""
     permission_classes = [IsAuthenticated]
     serializer_class = MovieSerializer
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
-        q = (self.request.query_params.get("q") or "").strip()
-        qs = Movie.objects.filter(processing_status="ready").prefetch_related("genre")
-        if q:
-            qs = qs.filter(Q(title__icontains=q) | Q(description__icontains=q))
-        return qs.order_by("-created_at").distinct()
+        qs, self.paginator.sort_field = search_movies(
+            Movie.objects.filter(processing_status="ready").defer("search_vector"),
+            self.request.query_params.get("q"),
+        )
+        return qs
+
+    def list(self, request, *args, **kwargs):
+        fields = sparse_fields(request, MOVIE_LIST_FIELDS)
+        page = self.paginate_queryset(self.get_queryset().only(*FRAGMENT_FIELDS))
+        items = with_favorites(movie_dicts(page, request, fields), favorite_ids_for(request.user), fields)
+        return self.get_paginated_response(items)
 
-    def get_serializer_context(self):
-        context = super().get_serializer_context()
-        fav_ids = set(Favorite.objects.filter(user=self.request.user).values_list("movie_id", flat=True))
-        context["favorite_ids"] = fav_ids
-        return context
+
+class SuggestView(APIView):
+    """Search-as-you-type: ready movie titles starting with `q`, served from the Redis index."""
+    authentication_classes = [StatelessCustomAuthentication]
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [ScopedRateThrottle]
+    throttle_scope = "suggest"
+
+    def get(self, request):
+        limit = parse_limit(request, default=10, max_value=20)
+        return Response(suggest(request.query_params.get("q", ""), limit), status=status.HTTP_200_OK)
 
 
 class HeroListView(APIView):
@@ -61,16 +112,76 @@ class HeroListView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        favorite_ids = set(Favorite.objects.filter(user=request.user).values_list("movie_id", flat=True))
-        qs = Movie.objects.filter(is_hero=True, processing_status="ready")
-        if not qs.exists():
-            return Response([], status=status.HTTP_200_OK)
-
         limit = parse_limit(request, default=3, min_value=1, max_value=10)
+        fields = sparse_fields(request)
+        movies = _pick_heroes(limit, get_random_flag(request, default=False))
+        items = movie_dicts(movies, request, fields)
+        return Response(with_favorites(items, favorite_ids_for(request.user), fields), status=status.HTTP_200_OK)
+
+
+def _pick_heroes(limit: int, randomize: bool) -> list:
+    """Newest `limit` ready heroes, or a random pick from the Redis hero pool (partial instances)."""
+    qs = Movie.objects.filter(is_hero=True, processing_status="ready").only(*FRAGMENT_FIELDS)
+    if not randomize:
+        return list(qs.order_by("-created_at")[:limit])
+    ids = heroes.sample(limit)
+    if ids is None:
+        return pick_random(qs, limit)  # no Redis pool: sample in the database
+    # only the sampled rows; ids that stopped being ready heroes (a missed signal) leave the pool
+    found = qs.in_bulk(ids)
+    stale = [pk for pk in ids if pk not in found]
+    if stale:
+        heroes.remove_movies(stale)
+    return [found[pk] for pk in ids if pk in found]
+
+
+class HomeView(APIView):
+    """
+    Everything the home screen needs in one response: heroes, every genre with its newest
+    movies (one ROW_NUMBER() window query) and the user's favorites row. The user-independent
+    part comes from the catalog cache. Query params: per_genre, heroes, random, and
+    fields / omit for all movies (slim list shape by default).
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        per_genre = parse_limit(request, default=getattr(settings, "HOME_ROW_SIZE", 12), max_value=30, name="per_genre")
+        hero_count = parse_limit(request, default=3, max_value=10, name="heroes")
         randomize = get_random_flag(request, default=False)
-        movies = pick_random(qs, limit) if randomize else list(qs.order_by("-created_at")[:limit])
-        ser = MovieSerializer(qs, many=True, context={"request": request, "favorite_ids": favorite_ids})
-        return Response(ser.data, status=status.HTTP_200_OK)
+        fields = sparse_fields(request, MOVIE_LIST_FIELDS)
+
+        def build():
+            genres = list(Genre.objects.order_by("name"))
+            rows = top_per_genre(per_genre, FRAGMENT_FIELDS)
+            hero_movies = [] if randomize else _pick_heroes(hero_count, False)
+            # heroes and rows share the shape, so their fragments come from one cache read / values() query
+            items = {d["id"]: d for d in project(movie_dicts(
+                [m for row in rows.values() for m in row] + hero_movies, request, fields), fields)}
+            return {
+                "heroes": [items[m.pk] for m in hero_movies if m.pk in items],
+                "genres": [
+                    {**GenreSerializer(genre).data,
+                     "movies": [items[m.pk] for m in rows.get(genre.pk, []) if m.pk in items]}
+                    for genre in genres
+                ],
+            }
+
+        params = {"per_genre": per_genre, "heroes": hero_count, "random": randomize, "fields": fields}
+        payload = cached_payload("home", request, params, build)
+        hero_items = payload["heroes"]
+        if randomize:
+            hero_items = project(movie_dicts(_pick_heroes(hero_count, True), request, fields), fields)
+
+        favorite_ids = favorite_ids_for(request.user)
+        favorites = Favorite.objects.filter(user=request.user, movie__processing_status="ready").select_related(
+            "movie").only("id", *(f"movie__{name}" for name in FRAGMENT_FIELDS)).order_by("-created_at", "-id")
+        favorite_movies = [fav.movie for fav in favorites[:getattr(settings, "HOME_FAVORITES", 20)]]
+
+        return encoded(request, Response({
+            "heroes": with_favorites(hero_items, favorite_ids, fields),
+            "genres": [{**g, "movies": with_favorites(g["movies"], favorite_ids, fields)} for g in payload["genres"]],
+            "favorites": with_favorites(movie_dicts(favorite_movies, request, fields), favorite_ids, fields),
+        }, status=status.HTTP_200_OK), shared=not (favorite_movies or randomize))
 
 
 class GenreListView(generics.ListAPIView):
@@ -84,16 +195,14 @@ class GenreMoviesView(generics.ListAPIView):
     """Return movies for a specific genre. User must be logged in."""
     permission_classes = [IsAuthenticated]
     serializer_class = MovieSerializer
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         slug = self.kwargs["slug"]
-        return Movie.objects.filter(genre__slug=slug, processing_status="ready").order_by("-created_at").prefetch_related("genre")
+        return Movie.objects.filter(genre__slug=slug, processing_status="ready").order_by("-created_at")
 
-    def get_serializer_context(self):
-        context = super().get_serializer_context()
-        fav_ids = set(Favorite.objects.filter(user=self.request.user).values_list("movie_id", flat=True))
-        context["favorite_ids"] = fav_ids
-        return context
+    def list(self, request, *args, **kwargs):
+        return _catalog_page(self, request, "genre", self.get_queryset(), genre=self.kwargs["slug"])
 
 
 class ResolveSpeedView(APIView):
@@ -101,7 +210,7 @@ class ResolveSpeedView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, pk):
-        movie = get_object_or_404(Movie, pk=pk, processing_status="ready")
+        movie = get_object_or_404(Movie.objects.only("id", "video_1080", "video_720", "video_480"), pk=pk, processing_status="ready")
         dl_raw = request.query_params.get("downlink")
         sh_raw = request.query_params.get("screen_h")
         try:
@@ -117,14 +226,27 @@ class ResolveSpeedView(APIView):
         has_720 = bool(movie.video_720 and getattr(movie.video_720, "name", None))
         has_480 = bool(movie.video_480 and getattr(movie.video_480, "name", None))
 
+        bitrates = mediainfo.bitrates(movie)
         quality, msg_key = choose_quality(
-            has_1080=has_1080, has_720=has_720, has_480=has_480, screen_h=screen_h, downlink_mbps=downlink
+            has_1080=has_1080, has_720=has_720, has_480=has_480, screen_h=screen_h, downlink_mbps=downlink,
+            bitrates=bitrates,
         )
+        # would an evicted rendition have been the better pick? → bring it back for next time
+        evicted = {q: renditions.is_evicted(movie, q) for q in renditions.EVICTABLE}
+        if any(evicted.values()):
+            wanted, _ = choose_quality(
+                has_1080=has_1080 or evicted["1080"], has_720=has_720 or evicted["720"], has_480=has_480,
+                screen_h=screen_h, downlink_mbps=downlink, bitrates=bitrates,
+            )
+            if wanted != quality and evicted.get(wanted):
+                renditions.touch(movie.pk, wanted)
+                renditions.request_regeneration(movie, wanted)
         stream_path = reverse("video-stream", args=[movie.pk]) + f"?q={quality}"
         url = request.build_absolute_uri(stream_path)
 
         return Response(
-            {"movie_id": movie.pk,"quality": quality,"url": url,"message_key": msg_key,},
+            {"movie_id": movie.pk,"quality": quality,"url": url,"message_key": msg_key,
+             "bitrate": bitrates.get(quality),},
             status=status.HTTP_200_OK,
         )
 
@@ -134,9 +256,13 @@ class VideoStreamView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, pk):
-        movie = get_object_or_404(Movie, pk=pk, processing_status="ready")
+        movie = get_object_or_404(Movie.objects.only("id", "video_1080", "video_720", "video_480"), pk=pk, processing_status="ready")
         q = (request.query_params.get("q") or "").strip()
         src = getSource(movie, q)
+        renditions.touch(movie.pk, q)
+        if renditions.is_evicted(movie, q):
+            # serve the best available rendition now, re-encode the requested one
+            renditions.request_regeneration(movie, q)
         file = check_or_404(src)
         resp = FileResponse(file, content_type="video/mp4")
         resp["Cache-Control"] = "private, max-age=300"
@@ -148,7 +274,7 @@ class TeaserStreamView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, pk):
-        movie = get_object_or_404(Movie, pk=pk, processing_status="ready")
+        movie = get_object_or_404(Movie.objects.only("id", "teaser_video"), pk=pk, processing_status="ready")
         file = check_or_404(movie.teaser_video)
         resp = FileResponse(file, content_type="video/mp4")
         resp["Cache-Control"] = "private, max-age=300"
@@ -160,7 +286,7 @@ class ThumbnailView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, pk):
-        movie = get_object_or_404(Movie, pk=pk, processing_status="ready")
+        movie = get_object_or_404(Movie.objects.only("id", "thumbnail_image"), pk=pk, processing_status="ready")
         file = check_or_404(movie.thumbnail_image)
         ct, _ = mimetypes.guess_type(file.name)
         resp = FileResponse(file, content_type=ct or "image/jpeg")
@@ -173,7 +299,7 @@ class LogoView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, pk):
-        movie = get_object_or_404(Movie, pk=pk, processing_status="ready")
+        movie = get_object_or_404(Movie.objects.only("id", "logo"), pk=pk, processing_status="ready")
         file = check_or_404(movie.logo)
         ct, _ = mimetypes.guess_type(file.name)
         resp = FileResponse(file, content_type=ct or "image/png")
@@ -186,7 +312,7 @@ class HeroImageView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, pk: int):
-        movie = get_object_or_404(Movie, pk=pk, processing_status="ready")
+        movie = get_object_or_404(Movie.objects.only("id", "hero_image"), pk=pk, processing_status="ready")
         file = check_or_404(movie.hero_image)
         ct, _ = mimetypes.guess_type(file.name)
         resp = FileResponse(file, content_type=ct or "image/jpeg")
@@ -200,7 +326,7 @@ class FavoriteView(APIView):
 
     # POST /api/movies/<pk>/favorite/  → add (idempotent)
     def post(self, request, pk: int):
-        movie = get_object_or_404(Movie, pk=pk)
+        movie = get_object_or_404(Movie.objects.only("id"), pk=pk)
         Favorite.objects.get_or_create(user=request.user, movie=movie)
         return Response({"detail": "added"}, status=status.HTTP_201_CREATED)
 
@@ -215,8 +341,94 @@ class FavoriteListView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        qs = Movie.objects.filter(favorited_by__user=request.user, processing_status="ready").order_by("-favorited_by__created_at")
+        # paginate the Favorite rows themselves: newest favorite first, keyset on (favorite time, id)
+        qs = Favorite.objects.filter(user=request.user, movie__processing_status="ready").select_related("movie").only(
+            "id", "created_at", *(f"movie__{name}" for name in FRAGMENT_FIELDS))
+        paginator = KeysetPagination()
+        movies = [fav.movie for fav in paginator.paginate_queryset(qs, request, view=self)]
+
+        fields = sparse_fields(request, MOVIE_LIST_FIELDS)
+        items = movie_dicts(movies, request, fields)
+        return paginator.get_paginated_response(with_favorites(items, {m.id for m in movies}, fields))
+
+
+def _upload_headers(resp, session):
+    resp["Upload-Offset"] = str(session.offset)
+    resp["Upload-Length"] = str(session.length)
+    resp["Cache-Control"] = "no-store"
+    return resp
+
+
+class UploadSessionCreateView(APIView):
+    """Start a resumable source upload for a movie. Staff only."""
+    permission_classes = [IsAdminUser]
+    throttle_classes = []  # a multi-GB upload is hundreds of chunk requests
+
+    # POST /api/movies/uploads/ {movie, filename, length} → 201 + Location
+    def post(self, request):
+        ser = UploadSessionSerializer(data=request.data)
+        ser.is_valid(raise_exception=True)
+        session = ser.save(created_by=request.user)
+        resp = Response(UploadSessionSerializer(session).data, status=status.HTTP_201_CREATED)
+        resp["Location"] = request.build_absolute_uri(reverse("upload-session", args=[session.id]))
+        return _upload_headers(resp, session)
+
+
+class UploadSessionView(APIView):
+    """Query, append to, or abort a resumable upload. Staff only."""
+    permission_classes = [IsAdminUser]
+    throttle_classes = []
+
+    # GET/HEAD → current offset (resume point)
+    def get(self, request, upload_id):
+        session = get_object_or_404(UploadSession, pk=upload_id)
+        return _upload_headers(Response(UploadSessionSerializer(session).data), session)
+
+    def head(self, request, upload_id):
+        session = get_object_or_404(UploadSession, pk=upload_id)
+        return _upload_headers(Response(status=status.HTTP_200_OK), session)
+
+    # PATCH with Upload-Offset header and raw bytes (application/offset+octet-stream)
+    def patch(self, request, upload_id):
+        try:
+            offset = int(request.headers.get("Upload-Offset", ""))
+            length = int(request.headers.get("Content-Length") or 0)
+        except ValueError:
+            return Response({"detail": "Upload-Offset header required."}, status=status.HTTP_400_BAD_REQUEST)
+        if length > getattr(settings, "UPLOAD_MAX_CHUNK_SIZE", 64 * 1024 ** 2):
+            return Response({"detail": "Chunk too large."}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+        session = get_object_or_404(UploadSession, pk=upload_id)
+        try:
+            # read the raw body stream block by block (never request.data / request.body)
+            append_chunk(session, request._request, offset, length)
+        except UploadError as e:
+            return _upload_headers(Response({"detail": e.detail}, status=e.status), session)
+        # the last chunk: hashing, probing and attaching run in a job, poll GET for the outcome
+        code = status.HTTP_202_ACCEPTED if is_finishing(session) else status.HTTP_200_OK
+        return _upload_headers(Response(UploadSessionSerializer(session).data, status=code), session)
+
+    def delete(self, request, upload_id):
+        session = get_object_or_404(UploadSession, pk=upload_id)
+        if session.is_complete:
+            return Response({"detail": "Upload already completed."}, status=status.HTTP_409_CONFLICT)
+        if is_finishing(session):
+            return Response({"detail": "Upload is being finished."}, status=status.HTTP_409_CONFLICT)
+        abort(session)
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
-        favorite_ids = set(qs.values_list("id", flat=True))
-        ser = MovieSerializer(qs, many=True, context={"request": request, "favorite_ids": favorite_ids})
-        return Response(ser.data, status=status.HTTP_200_OK)
+
+class ProcessingSummaryView(APIView):
+    """Per-step timings of recent pipeline runs (which step dominates, regressions). Staff only."""
+    permission_classes = [IsAdminUser]
+
+    # GET /api/movies/processing/summary/?days=30&movie=<id>
+    def get(self, request):
+        try:
+            days = int(request.query_params.get("days", 30))
+            movie_id = request.query_params.get("movie")
+            movie_id = int(movie_id) if movie_id else None
+        except ValueError:
+            return Response({"detail": "days and movie must be integers."}, status=status.HTTP_400_BAD_REQUEST)
+        since = timezone.now() - timedelta(days=days) if days > 0 else None
+        return Response(processing_summary(since=since, movie_id=movie_id), status=status.HTTP_200_OK)
@@ -0,0 +1,167 @@
+# movies/watchdog.py
+from __future__ import annotations
+
+import contextvars
+import os
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+from django.conf import settings
+
+# Supervisor for pipeline subprocesses. ffmpeg reports progress on stdout (`-progress pipe:1`);
+# a process whose progress stops moving is killed after PIPELINE_STALL_TIMEOUT seconds, and
+# every step has a hard timeout scaled to the media duration of the movie being processed.
+
+_media_seconds: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("media_seconds", default=None)
+
+
+class StalledProcessError(subprocess.CalledProcessError):
+    """A supervised subprocess was killed because it stalled or ran past its step timeout."""
+
+    def __init__(self, reason: str, cmd, output: str = "", stderr: str = ""):
+        super().__init__(-9, cmd, output=output, stderr=f"{reason}\n{stderr}".strip())
+        self.reason = reason
+
+
+@dataclass
+class SupervisedResult:
+    returncode: int
+    stdout: str
+    stderr: str
+    wall_s: float
+    rusage: Optional[object] = None
+    progress: dict = field(default_factory=dict)
+
+
+@contextmanager
+def media_duration(seconds: Optional[float]) -> Iterator[None]:
+    """Scale step timeouts of subprocesses started inside this block to `seconds` of media."""
+    token = _media_seconds.set(seconds)
+    try:
+        yield
+    finally:
+        _media_seconds.reset(token)
+
+
+def set_media_duration(seconds: Optional[float]) -> None:
+    """Set the media duration for the current context (use inside a `media_duration` block)."""
+    _media_seconds.set(seconds)
+
+
+def step_timeout(media_seconds: Optional[float] = None) -> float:
+    """
+    Hard limit for one step: PIPELINE_STEP_TIMEOUT_BASE + PIPELINE_STEP_TIMEOUT_FACTOR x media duration.
+    Without a known duration only PIPELINE_STEP_TIMEOUT_MAX applies.
+    """
+    if media_seconds is None:
+        media_seconds = _media_seconds.get()
+    base = float(getattr(settings, "PIPELINE_STEP_TIMEOUT_BASE", 120))
+    factor = float(getattr(settings, "PIPELINE_STEP_TIMEOUT_FACTOR", 3.0))
+    ceiling = float(getattr(settings, "PIPELINE_STEP_TIMEOUT_MAX", 4 * 3600))
+    if not media_seconds:
+        return ceiling
+    return min(ceiling, base + factor * float(media_seconds))
+
+
+def with_progress(cmd: List[str]) -> List[str]:
+    """Make ffmpeg write machine-readable progress to stdout (other commands are returned unchanged)."""
+    if cmd and Path(cmd[0]).name == "ffmpeg" and "-progress" not in cmd:
+        return [cmd[0], "-progress", "pipe:1", "-nostats", *cmd[1:]]
+    return list(cmd)
+
+
+def _is_progress_command(cmd: List[str]) -> bool:
+    return "-progress" in cmd
+
+
+def run_supervised(
+    cmd: List[str],
+    *,
+    stall_timeout: Optional[float] = None,
+    timeout: Optional[float] = None,
+    on_start=None,
+) -> SupervisedResult:
+    """
+    Start `cmd` and watch it until it exits. Kills it and raises StalledProcessError if
+    - it reports progress (ffmpeg -progress) and nothing moved for `stall_timeout` seconds, or
+    - it runs longer than `timeout` seconds.
+    The child is reaped with wait4, so its own resource usage is returned in `rusage`.
+    `on_start(pid)` is called right after the process started (e.g. cgroup placement).
+    """
+    stall_timeout = stall_timeout if stall_timeout is not None else float(
+        getattr(settings, "PIPELINE_STALL_TIMEOUT", 60))
+    timeout = timeout if timeout is not None else step_timeout()
+    watch_progress = _is_progress_command(cmd)
+
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    if on_start is not None:
+        on_start(proc.pid)
+
+    started = time.monotonic()
+    state = {"last_move": started, "progress": {}}
+    out_lines: List[str] = []
+    err_chunks: List[str] = []
+
+    def read_stdout():
+        for line in proc.stdout:
+            if not watch_progress:
+                out_lines.append(line)
+                continue
+            key, _, value = line.strip().partition("=")
+            if key in ("out_time_us", "total_size", "frame") and state["progress"].get(key) != value:
+                state["last_move"] = time.monotonic()
+            if key:
+                state["progress"][key] = value
+
+    def read_stderr():
+        for chunk in proc.stderr:
+            err_chunks.append(chunk)
+
+    readers = [threading.Thread(target=read_stdout, daemon=True), threading.Thread(target=read_stderr, daemon=True)]
+    for t in readers:
+        t.start()
+
+    killed_for: Optional[str] = None
+    poll = 0.02
+    try:
+        while True:
+            pid, status, usage = os.wait4(proc.pid, os.WNOHANG)
+            if pid:
+                break
+            now = time.monotonic()
+            if killed_for is None:
+                if watch_progress and now - state["last_move"] > stall_timeout:
+                    killed_for = (f"stalled: no progress for {stall_timeout:.0f}s "
+                                  f"(out_time_us={state['progress'].get('out_time_us', '?')})")
+                elif now - started > timeout:
+                    killed_for = f"timeout: step exceeded {timeout:.0f}s"
+                if killed_for:
+                    proc.kill()
+            time.sleep(poll)
+            poll = min(poll * 2, 0.5)
+    except BaseException:
+        # e.g. the RQ job timeout fired in an in-process worker: don't leave ffmpeg running
+        proc.kill()
+        proc.wait()
+        raise
+
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    # after a kill, grandchildren may still hold the pipes open: don't wait for them
+    for t in readers:
+        t.join(timeout=0.5 if killed_for else 5)
+    result = SupervisedResult(
+        returncode=proc.returncode,
+        stdout="".join(out_lines),
+        stderr="".join(err_chunks),
+        wall_s=time.monotonic() - started,
+        rusage=usage,
+        progress=dict(state["progress"]),
+    )
+    if killed_for:
+        raise StalledProcessError(killed_for, cmd, output=result.stdout, stderr=result.stderr)
+    return result
@@ -0,0 +1,112 @@
+# movies/workers.py
+from __future__ import annotations
+
+import importlib
+import multiprocessing
+import signal
+import time
+from typing import Dict, Iterable, List, Optional
+
+import django_rq
+from django.conf import settings
+from django.db import close_old_connections, connections
+from rq.worker import SimpleWorker, Worker
+
+# Prefork worker pool: Django and the task modules are imported once in the supervisor,
+# then N worker processes per queue are forked from it. Each worker runs its jobs in-process
+# (SimpleWorker) instead of forking a fresh work horse per job, so DB connections (CONN_MAX_AGE)
+# and Redis connections are reused across jobs. Dead workers are respawned; after
+# RQ_WORKER_MAX_JOBS jobs a worker exits and is replaced (bounds leaks in long-lived processes).
+
+PRELOAD_MODULES = ("movies.tasks",)
+
+
+class PreloadedWorker(SimpleWorker):
+    """In-process worker that drops broken/expired DB connections around every job."""
+
+    def execute_job(self, job, queue):
+        close_old_connections()
+        try:
+            return super().execute_job(job, queue)
+        finally:
+            close_old_connections()
+
+
+def parse_pools(specs: Iterable[str]) -> Dict[str, int]:
+    """['high=2', 'default=1'] -> {'high': 2, 'default': 1}. A key may list queues in priority order: 'high,default=1'."""
+    pools: Dict[str, int] = {}
+    for spec in specs:
+        queues, _, size = spec.partition("=")
+        if not queues or not size.isdigit():
+            raise ValueError(f"Pool must look like queue=size, got '{spec}'.")
+        pools[queues.strip()] = int(size)
+    return pools
+
+
+def preload() -> None:
+    """Import the task modules and close inherited DB connections before forking."""
+    for name in PRELOAD_MODULES:
+        importlib.import_module(name)
+    connections.close_all()
+
+
+def _worker_main(queue_names: List[str], burst: bool, max_jobs: Optional[int], fork_per_job: bool) -> None:
+    # fresh Redis connections in the child; redis-py pools are not shared across fork
+    queues = [django_rq.get_queue(name) for name in queue_names]
+    worker_class = Worker if fork_per_job else PreloadedWorker
+    worker = worker_class(queues, connection=queues[0].connection)
+    # with_scheduler: delayed jobs (pipeline retries with backoff) are moved onto the queues
+    worker.work(burst=burst, max_jobs=max_jobs or None, with_scheduler=True)
+
+
+def run_pools(
+    pools: Dict[str, int],
+    burst: bool = False,
+    max_jobs: Optional[int] = None,
+    fork_per_job: bool = False,
+    poll: float = 1.0,
+) -> None:
+    """
+    Start the configured worker processes and supervise them until SIGTERM/SIGINT
+    (forwarded to the workers, which finish their current job) or, with `burst`,
+    until every worker drained its queues.
+    """
+    preload()
+    ctx = multiprocessing.get_context("fork")
+    children: Dict[int, tuple] = {}
+    stopping = {"flag": False}
+
+    def spawn(key: str) -> None:
+        proc = ctx.Process(target=_worker_main, args=(key.split(","), burst, max_jobs, fork_per_job), daemon=False)
+        proc.start()
+        children[proc.pid] = (key, proc)
+
+    def stop(signum, frame):
+        stopping["flag"] = True
+        for _, proc in list(children.values()):
+            if proc.is_alive():
+                proc.terminate()  # SIGTERM: rq warm shutdown (current job completes)
+
+    previous = {sig: signal.signal(sig, stop) for sig in (signal.SIGTERM, signal.SIGINT)}
+    try:
+        for key, size in pools.items():
+            for _ in range(size):
+                spawn(key)
+        while children:
+            for pid, (key, proc) in list(children.items()):
+                if proc.is_alive():
+                    continue
+                proc.join()
+                del children[pid]
+                # max_jobs reached or the worker died: keep the pool at its size
+                if not burst and not stopping["flag"]:
+                    spawn(key)
+            time.sleep(poll)
+    finally:
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
+
+
+def configured_pools() -> Dict[str, int]:
+    """RQ_WORKER_POOLS from settings (queue(s) -> number of processes)."""
+    return dict(getattr(settings, "RQ_WORKER_POOLS", {"high": 1, "default": 1}))
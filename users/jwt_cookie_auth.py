@@ -1,4 +1,4 @@
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.authentication import JWTAuthentication, JWTStatelessUserAuthentication
 from rest_framework.authentication import CSRFCheck
 from rest_framework import exceptions
 from rest_framework_simplejwt.exceptions import InvalidToken
@@ -65,3 +65,12 @@ class CustomAuthentication(JWTAuthentication):
         return (self.get_user(validated), validated)
 
 
+
+
+class StatelessCustomAuthentication(CustomAuthentication):
+    """
+    Wie CustomAuthentication, aber ohne User-Lookup in der DB: request.user ist ein
+    TokenUser aus den Claims. Für heiße Read-Endpunkte (z. B. Typeahead).
+    """
+    def get_user(self, validated_token):
+        return JWTStatelessUserAuthentication.get_user(self, validated_token)